@@ -0,0 +1,68 @@
+"""
+Times the quest completion histogram and percentiles against the number of completions.
+
+The triggers count each completion into one stored bucket (quests_v3.duration_bucket), which is
+linear in the completions. Rebinning and percentiles then only see the stored buckets, so their
+time should stay flat as the completions grow.
+
+Usage:
+    python scripts/bench_histogram.py [--buckets 50] [--scale log] [--repeat 20]
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.histogram import BUCKETS_PER_DOUBLING, estimate_quantile, linear_edges, log_edges, rebin
+
+SIZES = [10_000, 100_000, 1_000_000]
+PERCENTILES = [0.5, 0.9, 0.99]
+
+
+def duration_bucket(seconds: float) -> int:
+    """Python copy of quests_v3.duration_bucket"""
+    return math.floor(math.log2(max(seconds, 0) + 1) * BUCKETS_PER_DOUBLING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--buckets", type=int, default=50)
+    parser.add_argument("--scale", choices=["linear", "log"], default="log")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print(f"{'completions':>12} {'stored buckets':>15} {'count (ms)':>12} {'ns/completion':>14} {'summarise (us)':>15}")
+    for size in SIZES:
+        # Completion times of a few minutes to a few days
+        durations = [rng.lognormvariate(8, 1.5) for _ in range(size)]
+
+        start = time.perf_counter()
+        counts = dict(Counter(duration_bucket(d) for d in durations))
+        counted = time.perf_counter() - start
+
+        fastest, slowest = min(durations), max(durations)
+        edges_for = log_edges if args.scale == "log" else linear_edges
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            rebin(counts, edges_for(fastest, slowest, args.buckets))
+            for p in PERCENTILES:
+                estimate_quantile(counts, p, fastest, slowest)
+        summarised = (time.perf_counter() - start) / args.repeat
+
+        print(
+            f"{size:>12,} {len(counts):>15} {counted * 1e3:>12.1f} "
+            f"{counted / size * 1e9:>14.0f} {summarised * 1e6:>15.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import hashlib
+import time
 from enum import Enum
 from typing import Annotated, Optional
 from fastapi import Depends, HTTPException, Request, Security, status
@@ -9,6 +11,8 @@ from pydantic import ValidationError
 from src.dependencies.auth.token import decode_token
 from src.errors import GuildScopedTokenRequired, InvalidCredentials, MissingScope, TokenExpired
 from src.models.auth import SCOPE_DESCRIPTIONS, TokenPayload
+from src.settings import settings
+from src.utils.cache import LRUCache
 from fastapi.security import SecurityScopes
 
 
@@ -20,6 +24,15 @@ class OAuth2ClientCredentials(OAuth2):
         return authorization.removeprefix("Bearer ").strip()
 
 
+# Validated tokens and their granted scopes, keyed by the token's SHA-256 digest.
+# Entries expire with the token, so an expired token is never served from here.
+decoded_tokens: LRUCache[bytes, tuple[TokenPayload, frozenset[str]]] = LRUCache(
+    "auth.tokens",
+    settings.AUTH_TOKEN_CACHE_SIZE,
+    settings.TOKEN_TTL_SECONDS
+)
+
+
 oauth2_scheme = OAuth2ClientCredentials(
     flows=OAuthFlows(
         clientCredentials=OAuthFlowClientCredentials(
@@ -48,16 +61,25 @@ async def get_current_client(
     if token is None:
         raise InvalidCredentials(authenticate_value)
 
-    try:
-        payload = decode_token(token)
-        client = TokenPayload(**payload)
-    except jwt.ExpiredSignatureError:
-        raise TokenExpired(authenticate_value)
-    except (jwt.InvalidTokenError, ValidationError):
-        raise InvalidCredentials(authenticate_value)
+    cache_key = hashlib.sha256(token.encode()).digest()
+
+    cached = decoded_tokens.get(cache_key)
+    if cached is None:
+        try:
+            payload = decode_token(token)
+            client = TokenPayload(**payload)
+        except jwt.ExpiredSignatureError:
+            raise TokenExpired(authenticate_value)
+        except (jwt.InvalidTokenError, ValidationError):
+            raise InvalidCredentials(authenticate_value)
+
+        cached = client, frozenset(scope.value for scope in client.scopes)
+        decoded_tokens.set(cache_key, cached, ttl=client.exp - time.time())
+
+    client, granted = cached
 
     for scope in security_scopes.scopes:
-        if scope not in client.scopes:
+        if scope not in granted:
             raise MissingScope(scope, authenticate_value)
 
     return client
@@ -1,29 +1,148 @@
-from typing import Optional
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Optional, TypeVar
+from uuid import UUID
 
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
+from opentelemetry import metrics, trace
 
 from src.dependencies.database import db
+from src.errors import ServiceUnavailable
+from src.settings import settings
+from src.utils.cache import LRUCache
+from src.utils.periodic import PeriodicTask
+
+T = TypeVar("T")
 
 ph = PasswordHasher()
 
-async def verify_api_key(client_id: str, raw_key: str) -> Optional[dict]:
-    row = await db.fetchrow(
-        "SELECT * FROM auth.clients WHERE client_id = $1 AND is_active = TRUE",
-        client_id
-    )
+# argon2 releases the GIL while hashing, so a few threads keep the event loop free
+# while capping how much CPU and memory (64 MiB per hash) credential checks can take
+_hash_pool = ThreadPoolExecutor(max_workers=settings.AUTH_HASH_WORKERS, thread_name_prefix="argon2")
+_hash_pending = 0
+
+# Keyed by (client_id, HMAC of the secret) so raw secrets are never held in memory.
+# The HMAC key only lives in this process, like the cache itself.
+_cache_key = secrets.token_bytes(32)
+verified_clients: LRUCache[tuple[str, bytes], dict] = LRUCache(
+    "auth_clients",
+    max_size=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_S
+)
+
+meter = metrics.get_meter("nexuscore.auth")
+hash_duration = meter.create_histogram(
+    "auth.hash.duration", unit="s", description="Time taken by argon2 hashes and verifications, including queueing"
+)
+hash_pending = meter.create_up_down_counter(
+    "auth.hash.pending", description="argon2 hashes and verifications queued or running"
+)
+hash_rejected = meter.create_counter(
+    "auth.hash.rejected", description="Credential checks turned away because too many were pending"
+)
+
+
+class LastUsedTracker:
+    """
+    Collects when each client last authenticated and writes them all in one statement
+    every `flush_interval` seconds, and once more on shutdown, instead of on every token request.
+    """
+    def __init__(self, flush_interval: float):
+        self._last_used: dict[UUID, datetime] = {}
+        self._task = PeriodicTask("auth.last_used.flush", flush_interval, self.flush, run_on_stop=True)
+
+    def touch(self, client_id: UUID):
+        self._last_used[client_id] = datetime.now(timezone.utc)
+
+    def start(self):
+        self._task.start()
+
+    async def stop(self):
+        await self._task.stop()
+
+    async def flush(self):
+        if not self._last_used:
+            return
+
+        pending, self._last_used = self._last_used, {}
+        trace.get_current_span().set_attribute("auth.clients", len(pending))
+
+        try:
+            await db.execute("""
+                UPDATE auth.clients c
+                SET last_used_at = GREATEST(c.last_used_at, u.last_used_at)
+                FROM unnest($1::uuid[], $2::timestamptz[]) AS u(client_id, last_used_at)
+                WHERE c.client_id = u.client_id
+            """, list(pending.keys()), list(pending.values()))
+        except BaseException:
+            # Anything touched since is newer, and wins
+            self._last_used = {**pending, **self._last_used}
+            raise
+
+
+last_used = LastUsedTracker(settings.AUTH_LAST_USED_FLUSH_S)
 
-    if not row:
-        return None
+
+async def _run_hasher(func: Callable[..., T], *args) -> T:
+    """
+    Runs an argon2 call on the hashing pool. Once `AUTH_HASH_MAX_PENDING` calls are
+    queued or running, further ones are rejected with a 503 instead of piling up.
+    """
+    global _hash_pending
+
+    if _hash_pending >= settings.AUTH_HASH_MAX_PENDING:
+        hash_rejected.add(1)
+        raise ServiceUnavailable(message="Too many credential checks in progress, try again shortly.")
+
+    _hash_pending += 1
+    hash_pending.add(1)
+    start = time.perf_counter()
 
     try:
-        ph.verify(row["hashed_key"], raw_key)
-    except VerifyMismatchError:
-        return None
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, func, *args)
+    finally:
+        _hash_pending -= 1
+        hash_pending.add(-1)
+        hash_duration.record(time.perf_counter() - start)
+
+
+async def hash_api_key(raw_key: str) -> str:
+    return await _run_hasher(ph.hash, raw_key)
+
+
+async def verify_api_key(client_id: str, raw_key: str) -> Optional[dict]:
+    """
+    Returns the active client these credentials belong to, or None.
+
+    Successful verifications are cached for `AUTH_CACHE_TTL_S`, so repeat token requests skip
+    argon2 and the client lookup. A deactivated client or rotated key can keep working for that long.
+    """
+    cache_key = (client_id, hmac.digest(_cache_key, raw_key.encode(), hashlib.sha256))
+
+    client = verified_clients.get(cache_key)
+    if client is None:
+        row = await db.fetchrow(
+            "SELECT * FROM auth.clients WHERE client_id = $1 AND is_active = TRUE",
+            client_id
+        )
+
+        if not row:
+            return None
+
+        try:
+            await _run_hasher(ph.verify, row["hashed_key"], raw_key)
+        except VerifyMismatchError:
+            return None
+
+        client = dict(row)
+        verified_clients.set(cache_key, client)
 
-    await db.execute(
-        "UPDATE auth.clients SET last_used_at = now() WHERE client_id = $1",
-        client_id
-    )
+    last_used.touch(client["client_id"])
 
-    return dict(row)
\ No newline at end of file
+    return client
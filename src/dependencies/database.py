@@ -1,12 +1,49 @@
-from contextlib import asynccontextmanager
+import asyncio
+import math
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from typing import Optional
 
-from asyncpg import Pool, create_pool
-from opentelemetry import trace
+import asyncpg
+from asyncpg import Connection, Pool, connect, create_pool
+from opentelemetry import metrics, trace
 
 from src.settings import settings
+from src.utils.periodic import PeriodicTask
 
 tracer = trace.get_tracer("nexuscore.database")
+meter = metrics.get_meter("nexuscore.database")
+statements_prepared = meter.create_counter(
+    "db.statements.prepared",
+    description="Statements parsed and planned by Postgres, because the connection had not prepared them yet"
+)
+statements_reused = meter.create_counter(
+    "db.statements.reused",
+    description="Statements answered from a connection's prepared statement cache"
+)
+
+# Set inside Database.primary(), where replica reads go to the primary instead
+_force_primary: ContextVar[bool] = ContextVar("db_force_primary", default=False)
+
+# Errors that mean the replica could not answer, rather than that the query is wrong
+_REPLICA_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.SerializationError)
+
+
+class StatementCountingConnection(Connection):
+    """
+    Counts how many statements each pool connection prepares and how many it reuses from its statement cache,
+    so the reuse of a query shape can be seen per process rather than assumed.
+    """
+    # asyncpg has no public hook for statement preparation, so this overrides the private Connection._get_statement
+    # and looks in its statement cache the way it does, keyed by (query, record_class, ignore_custom_codec).
+    # Both are asyncpg internals (connection.py in 0.31) and need checking when asyncpg is upgraded.
+    async def _get_statement(self, query, timeout, *, use_cache=True, **kwargs):
+        record_class = kwargs.get("record_class") or self._protocol.get_record_class()
+        key = (query, record_class, kwargs.get("ignore_custom_codec", False))
+
+        cached = use_cache and self._stmt_cache.get(key, promote=False) is not None
+        (statements_reused if cached else statements_prepared).add(1)
+        return await super()._get_statement(query, timeout, use_cache=use_cache, **kwargs)
 
 
 class TracedConnection:
@@ -32,25 +69,165 @@ class TracedConnection:
             span.set_attribute("db.statement", query.strip())
             return await self._conn.execute(query, *args)
 
+    async def copy_records_to_table(self, table_name: str, *, records, columns=None, schema_name: str = None):
+        with tracer.start_as_current_span("db.copy") as span:
+            span.set_attribute("db.system", "postgresql")
+            span.set_attribute("db.sql.table", f"{schema_name}.{table_name}" if schema_name else table_name)
+            return await self._conn.copy_records_to_table(table_name, records=records, columns=columns,
+                                                          schema_name=schema_name)
+
+
+    async def cursor(self, query: str, *args, prefetch: int = 1000):
+        """
+        Iterates over the rows of a server-side cursor, `prefetch` rows at a time.
+        Must be used inside a transaction.
+        """
+        span = tracer.start_span("db.cursor")
+        span.set_attribute("db.system", "postgresql")
+        span.set_attribute("db.statement", query.strip())
+
+        rows = 0
+        try:
+            async for row in self._conn.cursor(query, *args, prefetch=prefetch):
+                rows += 1
+                yield row
+        finally:
+            span.set_attribute("db.rows", rows)
+            span.end()
+
+
+class ReplicaReads:
+    """
+    Reads that can be a few seconds behind, like analytics, statistics and leaderboards.
+    They are answered by the read replica when one is set up and keeping up, and by the primary otherwise.
+    """
+    def __init__(self, db: "Database"):
+        self._db = db
+
+    async def fetch(self, query: str, *args):
+        with tracer.start_as_current_span("db.fetch"):
+            return await self._db._read_replica("fetch", query, *args)
+
+    async def fetchrow(self, query: str, *args):
+        with tracer.start_as_current_span("db.fetchrow"):
+            return await self._db._read_replica("fetchrow", query, *args)
+
+    async def fetchval(self, query: str, *args):
+        with tracer.start_as_current_span("db.fetchval"):
+            return await self._db._read_replica("fetchval", query, *args)
+
 
 class Database:
+    """
+    The primary pool, and an optional read replica pool when `DATABASE_REPLICA_DSN` is set.
+
+    Everything goes to the primary unless it opts in through `db.replica`. Those reads go to the replica
+    while its lag is under `DATABASE_REPLICA_MAX_LAG_S` and it can be reached, and fall back to the primary
+    otherwise. Code that has just written and reads its own writes back wraps those reads in `db.primary()`.
+    """
     def __init__(self):
         self.__pool: Pool = None
+        self.__replica: Optional[Pool] = None
+        self.replica_lag = math.inf
+        self.replica = ReplicaReads(self)
+        self._lag_check = PeriodicTask("db.replica.lag", settings.DATABASE_REPLICA_LAG_CHECK_S, self._check_replica_lag)
+        self._exports = asyncio.Semaphore(settings.DATABASE_EXPORT_MAX_CONNECTIONS)
+
+    async def init_pool(
+            self,
+            statement_cache_size: int = settings.DATABASE_STATEMENT_CACHE_SIZE,
+            max_cached_statement_lifetime: int = settings.DATABASE_STATEMENT_LIFETIME_S
+    ):
+        """
+        Prepared statements are cached per connection, up to `statement_cache_size` of them,
+        each for `max_cached_statement_lifetime` seconds. A size of 0 turns the cache off,
+        a lifetime of 0 keeps statements until they are evicted.
+        """
+        pool_options = dict(max_size=settings.DATABASE_POOL_MAX_SIZE,
+                            command_timeout=settings.DATABASE_COMMAND_TIMEOUT_S,
+                            max_inactive_connection_lifetime=settings.DATABASE_POOL_MAX_IDLE_S,
+                            statement_cache_size=statement_cache_size,
+                            max_cached_statement_lifetime=max_cached_statement_lifetime,
+                            connection_class=StatementCountingConnection,
+                            loop=None)
 
-    async def init_pool(self):
         self.__pool = await create_pool(database=settings.DATABASE_NAME,
                                       user=settings.DATABASE_USER,
                                       password=settings.DATABASE_PASSWORD,
                                       host=settings.DATABASE_HOST,
                                       port=settings.DATABASE_PORT,
-                                      min_size=1,
-                                      max_size=10,
-                                      loop=None)
+                                      min_size=settings.DATABASE_POOL_MIN_SIZE,
+                                      **pool_options)
+
+        if settings.DATABASE_REPLICA_DSN:
+            # Connects lazily, so that a replica being down never stops the API from starting
+            self.__replica = await create_pool(dsn=settings.DATABASE_REPLICA_DSN, min_size=0, **pool_options)
+            self._lag_check.start()
+            self._lag_check.trigger()
+
+    async def connect(self) -> Connection:
+        """Opens a standalone connection outside the pool, e.g. to LISTEN on"""
+        return await connect(database=settings.DATABASE_NAME,
+                             user=settings.DATABASE_USER,
+                             password=settings.DATABASE_PASSWORD,
+                             host=settings.DATABASE_HOST,
+                             port=settings.DATABASE_PORT)
 
     async def close_pool(self):
+        await self._lag_check.stop()
+
+        if self.__replica:
+            await self.__replica.close()
+
         if self.__pool:
             await self.__pool.close()
 
+    async def _check_replica_lag(self):
+        # No lag while the replica has replayed everything it received, even if the primary has been idle
+        try:
+            self.replica_lag = await self.__replica.fetchval("""
+                SELECT CASE
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+                END::float8
+            """)
+        except Exception:
+            self.replica_lag = math.inf
+            raise
+        finally:
+            trace.get_current_span().set_attribute("db.replica.lag_s", self.replica_lag)
+
+    @staticmethod
+    @contextmanager
+    def primary():
+        """Sends `db.replica` reads made inside the block, including by tasks it starts, to the primary"""
+        token = _force_primary.set(True)
+        try:
+            yield
+        finally:
+            _force_primary.reset(token)
+
+    async def _read_replica(self, method: str, query: str, *args):
+        span = trace.get_current_span()
+        span.set_attribute("db.system", "postgresql")
+        span.set_attribute("db.statement", query.strip())
+
+        use_replica = (self.__replica is not None
+                       and not _force_primary.get()
+                       and self.replica_lag <= settings.DATABASE_REPLICA_MAX_LAG_S)
+
+        if use_replica:
+            try:
+                span.set_attribute("db.pool", "replica")
+                return await getattr(self.__replica, method)(query, *args)
+            except _REPLICA_ERRORS as e:
+                # Kept off the replica until the next lag check finds it healthy again
+                span.record_exception(e)
+                self.replica_lag = math.inf
+
+        span.set_attribute("db.pool", "primary")
+        return await getattr(self.__pool, method)(query, *args)
+
     async def fetch(self, query: str, *args):
         with tracer.start_as_current_span("db.fetch") as span:
             span.set_attribute("db.system", "postgresql")
@@ -83,6 +260,43 @@ class Database:
                 async with connection.transaction():
                     yield TracedConnection(connection)
 
+    @asynccontextmanager
+    async def get_read_only_transaction(self):
+        """
+        A READ ONLY transaction on a connection of its own, for long reads like exports that last
+        as long as the client takes to download them. They never hold a pool connection, so slow clients
+        cannot starve the pools. Opened on the replica when there is one, and at most
+        `DATABASE_EXPORT_MAX_CONNECTIONS` at once. Each statement is limited to `DATABASE_EXPORT_STATEMENT_TIMEOUT_S`.
+        """
+        server_settings = {"statement_timeout": str(int(settings.DATABASE_EXPORT_STATEMENT_TIMEOUT_S * 1000))}
+
+        async with self._exports:
+            with tracer.start_as_current_span("db.transaction") as tx_span:
+                tx_span.set_attribute("db.system", "postgresql")
+
+                connection = None
+                if self.__replica is not None and self.replica_lag <= settings.DATABASE_REPLICA_MAX_LAG_S:
+                    try:
+                        connection = await connect(dsn=settings.DATABASE_REPLICA_DSN, server_settings=server_settings)
+                        tx_span.set_attribute("db.pool", "replica")
+                    except _REPLICA_ERRORS as e:
+                        tx_span.record_exception(e)
+
+                if connection is None:
+                    connection = await connect(database=settings.DATABASE_NAME,
+                                               user=settings.DATABASE_USER,
+                                               password=settings.DATABASE_PASSWORD,
+                                               host=settings.DATABASE_HOST,
+                                               port=settings.DATABASE_PORT,
+                                               server_settings=server_settings)
+                    tx_span.set_attribute("db.pool", "primary")
+
+                try:
+                    async with connection.transaction(readonly=True):
+                        yield TracedConnection(connection)
+                finally:
+                    await connection.close()
+
     @asynccontextmanager
     async def get_connection(self):
         async with self.__pool.acquire() as connection:
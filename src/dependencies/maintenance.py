@@ -0,0 +1,70 @@
+from src.dependencies.database import db
+from src.repositories.leaderboard import LeaderboardRepository
+from src.services.leaderboard import LeaderboardService
+from src.settings import settings
+from src.utils.periodic import PeriodicTask
+
+# Tables partitioned by month on "time", see events.create_monthly_partitions
+PARTITIONED_TABLES = ['events.connections', 'events.interactions']
+
+
+async def create_event_partitions():
+    """
+    Makes sure every partitioned event table has a partition for this month
+    and the next `PARTITION_MONTHS_AHEAD` months, so inserts never fall into the default partition.
+    """
+    for table in PARTITIONED_TABLES:
+        await db.fetchval("""
+            SELECT events.create_monthly_partitions($1::regclass, (now() AT TIME ZONE 'UTC')::date, $2)
+        """, table, settings.PARTITION_MONTHS_AHEAD + 1)
+
+
+partition_maintenance = PeriodicTask(
+    "events.partitions",
+    interval=settings.PARTITION_MAINTENANCE_INTERVAL_S,
+    func=create_event_partitions
+)
+
+
+async def rebuild_interaction_counts():
+    """
+    Recomputes `events.interaction_counts` from the interactions themselves,
+    fixing any drift from rows written or removed outside the API.
+    Blocks interaction inserts while it runs.
+    """
+    await db.fetchval("SELECT events.rebuild_interaction_counts()")
+
+
+interaction_counts_rebuild = PeriodicTask(
+    "events.interaction_counts.rebuild",
+    interval=settings.INTERACTION_COUNTS_REBUILD_INTERVAL_S,
+    func=rebuild_interaction_counts
+)
+
+
+async def fold_quest_statistics():
+    """
+    Adds the statistics changes queued by the quest and objective progress triggers
+    onto the rollups, see quests_v3.fold_quest_statistics
+    """
+    await db.fetchval("SELECT quests_v3.fold_quest_statistics()")
+
+
+quest_statistics_fold = PeriodicTask(
+    "quests.statistics.fold",
+    interval=settings.QUEST_STATISTICS_FOLD_INTERVAL_S,
+    func=fold_quest_statistics,
+    run_on_stop=True
+)
+
+
+async def refresh_leaderboards():
+    """Keeps the current leaderboard snapshots fresh, so reads rarely have to rank a board themselves"""
+    await LeaderboardService(LeaderboardRepository(db)).refresh_stale()
+
+
+leaderboard_refresh = PeriodicTask(
+    "leaderboards.refresh",
+    interval=settings.LEADERBOARD_REFRESH_INTERVAL_S,
+    func=refresh_leaderboards
+)
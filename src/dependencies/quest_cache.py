@@ -0,0 +1,64 @@
+from typing import Optional
+
+from asyncpg import Connection
+from opentelemetry import trace
+
+from src.dependencies.database import db
+from src.models.quests.quest import QuestOut
+from src.settings import settings
+from src.utils.cache import LRUCache
+from src.utils.periodic import PeriodicTask
+
+# Sent by QuestRepository.notify_changed, with "<guild_id>:<quest_id>" as the payload
+QUEST_CHANGED_CHANNEL = "quest_changed"
+
+quest_cache: LRUCache[tuple[int, int], QuestOut] = LRUCache(
+    "quests",
+    max_size=settings.QUEST_CACHE_SIZE,
+    ttl=settings.QUEST_CACHE_TTL_S
+)
+
+def get_quest_cache() -> LRUCache[tuple[int, int], QuestOut]:
+    return quest_cache
+
+
+class QuestCacheListener:
+    """
+    Keeps the quest cache coherent across API replicas, by listening for
+    quest changes committed by any of them and dropping those quests.
+
+    While the listening connection is down, notifications are missed,
+    so the whole cache is cleared every time it (re)connects.
+    """
+    def __init__(self, cache: LRUCache, check_interval: float = 30):
+        self.cache = cache
+        self._conn: Optional[Connection] = None
+        self._task = PeriodicTask("quest_cache.listen", check_interval, self._ensure_listening)
+
+    def _on_notification(self, _conn, _pid, _channel, payload: str):
+        guild_id, quest_id = payload.split(":")
+        self.cache.invalidate((int(guild_id), int(quest_id)))
+
+    async def _ensure_listening(self):
+        if self._conn is not None and not self._conn.is_closed():
+            return
+
+        self._conn = await db.connect()
+        await self._conn.add_listener(QUEST_CHANGED_CHANNEL, self._on_notification)
+        self.cache.clear()
+
+        trace.get_current_span().add_event("quest_cache.listening")
+
+    def start(self):
+        self._task.start()
+        self._task.trigger()
+
+    async def stop(self):
+        await self._task.stop()
+
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+
+quest_cache_listener = QuestCacheListener(quest_cache)
@@ -2,6 +2,7 @@ from fastapi import Depends
 
 from src.dependencies.database import Database, get_db
 from src.repositories.guild import GuildRepository
+from src.repositories.leaderboard import LeaderboardRepository
 from src.repositories.quests.objective import ObjectiveRepository
 from src.repositories.pin import PinRepository
 from src.repositories.project import ProjectRepository
@@ -21,6 +22,11 @@ def get_guild_repo(
 ) -> GuildRepository:
     return GuildRepository(database)
 
+def get_leaderboard_repo(
+        database: Database = Depends(get_db),
+) -> LeaderboardRepository:
+    return LeaderboardRepository(database)
+
 def get_user_repo(
         database: Database = Depends(get_db)
 ) -> UserRepository:
@@ -1,9 +1,13 @@
 from botocore.client import BaseClient
 from fastapi import Depends
 
+from src.dependencies.database import get_db
+from src.dependencies.quest_cache import get_quest_cache
 from src.dependencies.r2_client import get_r2_client
+from src.dependencies.write_buffer import WriteBehindBuffer, get_interaction_buffer
 from src.dependencies.repositories import (
     get_guild_repo,
+    get_leaderboard_repo,
     get_objective_progress_repo, get_objective_repo,
     get_project_repo,
     get_quest_progress_repo, get_quest_repo,
@@ -14,6 +18,7 @@ from src.dependencies.repositories import (
     get_reward_repo
 )
 from src.repositories.guild import GuildRepository
+from src.repositories.leaderboard import LeaderboardRepository
 from src.repositories.quests.objective import ObjectiveRepository
 from src.repositories.project import ProjectRepository
 from src.repositories.quests.objective_progress import ObjectiveProgressRepository
@@ -28,6 +33,7 @@ from src.repositories.wiki.page import PageRepository
 from src.repositories.world import WorldRepository
 from src.services.guild import GuildService
 from src.services.image import ImageService
+from src.services.leaderboard import LeaderboardService
 from src.services.project import ProjectService
 from src.services.pin import PinService
 from src.services.quest import QuestService
@@ -35,13 +41,14 @@ from src.services.quest_progress import QuestProgressService
 from src.services.user import UserService
 from src.services.wiki import WikiService
 from src.services.world import WorldService
+from src.utils.cache import LRUCache
 
 
-def get_guild_service(
-        guild_repo: GuildRepository = Depends(get_guild_repo),
-        user_repo: UserRepository = Depends(get_user_repo),
-) -> GuildService:
-    return GuildService(guild_repo, user_repo)
+
+def get_leaderboard_service(
+        leaderboard_repo: LeaderboardRepository = Depends(get_leaderboard_repo),
+) -> LeaderboardService:
+    return LeaderboardService(leaderboard_repo)
 
 def get_project_service(
         project_repo: ProjectRepository = Depends(get_project_repo),
@@ -70,16 +77,39 @@ def get_quest_service(
         reward_repo: RewardRepository = Depends(get_reward_repo),
         user_repo: UserRepository = Depends(get_user_repo),
         statistics_repo: QuestStatisticsRepository = Depends(get_quest_statistics_repo),
+        quest_cache: LRUCache = Depends(get_quest_cache),
 ) -> QuestService:
-    return QuestService(quest_repo, objective_repo, reward_repo, user_repo, statistics_repo)
+    return QuestService(quest_repo, objective_repo, reward_repo, user_repo, statistics_repo, quest_cache)
 
 def get_quest_progress_service(
         quest_repo: QuestRepository = Depends(get_quest_repo),
         objective_repo: ObjectiveRepository = Depends(get_objective_repo),
         quest_progress_repo: QuestProgressRepository = Depends(get_quest_progress_repo),
         objective_progress_repo: ObjectiveProgressRepository = Depends(get_objective_progress_repo),
+        quest_cache: LRUCache = Depends(get_quest_cache),
 ) -> QuestProgressService:
-    return QuestProgressService(quest_repo, objective_repo, quest_progress_repo, objective_progress_repo)
+    return QuestProgressService(quest_repo, objective_repo, quest_progress_repo, objective_progress_repo, quest_cache)
+
+def get_guild_service(
+        guild_repo: GuildRepository = Depends(get_guild_repo),
+        user_repo: UserRepository = Depends(get_user_repo),
+        interaction_buffer: WriteBehindBuffer = Depends(get_interaction_buffer),
+        quest_progress_service: QuestProgressService = Depends(get_quest_progress_service),
+) -> GuildService:
+    return GuildService(guild_repo, user_repo, interaction_buffer, quest_progress_service)
+
+def build_guild_service() -> GuildService:
+    """The GuildService outside of a request, resolving its dependencies through the factories above"""
+    database = get_db()
+    quest_progress_service = get_quest_progress_service(
+        get_quest_repo(database),
+        get_objective_repo(database),
+        get_quest_progress_repo(database),
+        get_objective_progress_repo(database),
+        get_quest_cache()
+    )
+
+    return get_guild_service(get_guild_repo(database), get_user_repo(database), get_interaction_buffer(), quest_progress_service)
 
 def get_wiki_service(
         page_repo: PageRepository = Depends(get_wiki_page_repo),
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import math
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+import asyncpg
+from opentelemetry import metrics, trace
+
+from src.dependencies.database import db
+from src.errors import ServiceUnavailable
+from src.settings import settings
+from src.utils.periodic import PeriodicTask
+
+T = TypeVar("T")
+
+meter = metrics.get_meter("nexuscore.buffer")
+rows_dead_lettered = meter.create_counter(
+    "buffer.rows.dead_lettered",
+    description="Buffered rows that could not be written and were moved to events.dead_letter"
+)
+rows_dropped = meter.create_counter(
+    "buffer.rows.dropped",
+    description="Buffered rows that could not be written or dead-lettered, and are lost"
+)
+
+
+class WriteBehindBuffer(Generic[T]):
+    """
+    Holds rows in memory and writes them in batches through a flush function,
+    every `flush_interval` seconds or as soon as `flush_rows` rows are waiting.
+
+    Memory is bounded by `max_rows`. Once the buffer is full, `put` raises
+    ServiceUnavailable so that clients back off and retry after the next flush.
+
+    Rows have already been acknowledged, so failed writes lose as little as possible:
+    - A batch the database rejects (e.g. an unknown ThornyID) is split in half and each half
+      written again, until only the rejected rows are left. Those are dead-lettered.
+    - Any other failure puts the rows not yet written back at the front of the buffer to be retried.
+      Halves that already committed are not retried.
+      After `max_retries` failed attempts in a row, those rows are dead-lettered instead,
+      so one batch that can never be written cannot fill the buffer.
+
+    Dead-lettered rows go to events.dead_letter. If that fails too, a rejected row is dropped
+    and a retried batch stays in the buffer. Both are counted in OpenTelemetry.
+    """
+    def __init__(self, name: str, max_rows: int, flush_rows: int, flush_interval: float, max_retries: int):
+        self.name = name
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+
+        self._rows: list[T] = []
+        self._failures = 0
+        self._lock = asyncio.Lock()
+        self._write: Optional[Callable[[list[T]], Awaitable[None]]] = None
+        self._task = PeriodicTask(f"{name}.flush", flush_interval, self.flush, run_on_stop=True)
+
+    @property
+    def running(self) -> bool:
+        return self._task.running
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def start(self, write: Callable[[list[T]], Awaitable[None]]):
+        self._write = write
+        self._task.start()
+
+    async def stop(self):
+        await self._task.stop()
+
+    def put(self, rows: list[T]):
+        if len(self._rows) + len(rows) > self.max_rows:
+            raise ServiceUnavailable(
+                message=f"The {self.name} buffer is full, try again shortly.",
+                retry_after=max(1, math.ceil(self.flush_interval))
+            )
+
+        self._rows.extend(rows)
+
+        if len(self._rows) >= self.flush_rows:
+            self._task.trigger()
+
+    async def flush(self):
+        async with self._lock:
+            while self._rows:
+                rows, self._rows = self._rows[:self.flush_rows], self._rows[self.flush_rows:]
+
+                span = trace.get_current_span()
+                span.set_attribute("buffer.name", self.name)
+                span.set_attribute("buffer.rows", len(rows))
+
+                # Chunks still to write, last one first. Split halves commit on their own,
+                # so only what is left here is retried or dead-lettered when a write fails
+                pending = [rows]
+                try:
+                    await self._write_or_split(pending)
+                except Exception as e:
+                    unwritten = [row for chunk in reversed(pending) for row in chunk]
+                    self._failures += 1
+                    span.set_attribute("buffer.failures", self._failures)
+
+                    if self._failures < self.max_retries or not await self._dead_letter(unwritten, repr(e)):
+                        self._rows[:0] = unwritten
+                        raise
+
+                    span.record_exception(e)
+                except BaseException:
+                    self._rows[:0] = [row for chunk in reversed(pending) for row in chunk]
+                    raise
+
+                self._failures = 0
+
+    async def _write_or_split(self, pending: list[list[T]]):
+        """
+        Writes the chunks in `pending`, last first, splitting any chunk the database rejects.
+        A chunk is only removed once it is written or dead-lettered, so on failure `pending` holds what is left.
+        """
+        while pending:
+            chunk = pending[-1]
+            try:
+                await self._write(chunk)
+            except (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError) as e:
+                if len(chunk) > 1:
+                    middle = len(chunk) // 2
+                    pending[-1:] = [chunk[middle:], chunk[:middle]]
+                    continue
+
+                if not await self._dead_letter(chunk, repr(e)):
+                    rows_dropped.add(1, {"buffer.name": self.name})
+
+            pending.pop()
+
+    async def _dead_letter(self, rows: list[T], reason: str) -> bool:
+        """Moves rows to events.dead_letter, returning whether that worked"""
+        payloads = [
+            json.dumps(row._asdict() if hasattr(row, "_asdict") else row, default=str)
+            for row in rows
+        ]
+
+        try:
+            await db.execute("""
+                INSERT INTO events.dead_letter(buffer, reason, payload)
+                SELECT $1, $2, p FROM unnest($3::jsonb[]) AS p
+            """, self.name, reason, payloads)
+        except Exception as e:
+            trace.get_current_span().record_exception(e)
+            return False
+
+        rows_dead_lettered.add(len(rows), {"buffer.name": self.name})
+        return True
+
+
+interaction_buffer = WriteBehindBuffer(
+    "interactions",
+    max_rows=settings.INTERACTION_BUFFER_MAX_ROWS,
+    flush_rows=settings.INTERACTION_BUFFER_FLUSH_ROWS,
+    flush_interval=settings.INTERACTION_BUFFER_FLUSH_MS / 1000,
+    max_retries=settings.INTERACTION_BUFFER_MAX_RETRIES
+)
+
+def get_interaction_buffer() -> WriteBehindBuffer:
+    return interaction_buffer
@@ -97,4 +97,16 @@ class GuildScopedTokenRequired(NexusException):
                 "error": "guild_scoped_token_required",
                 "message": "This endpoint requires a guild-scoped token. Request a new token with a guild_id specified."
             }
+        )
+
+
+class ServiceUnavailable(NexusException):
+    def __init__(self, message: str = "Service temporarily unavailable.", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "service_unavailable",
+                "message": message
+            },
+            headers={"Retry-After": str(retry_after)}
         )
\ No newline at end of file
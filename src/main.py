@@ -5,8 +5,20 @@ from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from scalar_fastapi import get_scalar_api_reference, Theme, AgentScalarConfig
 from fastapi.middleware.cors import CORSMiddleware
 
+from src.dependencies.auth.keys import last_used
 from src.dependencies.database import db
+from src.dependencies.maintenance import (
+    interaction_counts_rebuild,
+    leaderboard_refresh,
+    partition_maintenance,
+    quest_statistics_fold
+)
+from src.dependencies.quest_cache import quest_cache_listener
 from src.dependencies.r2_client import init_r2_client
+from src.dependencies.services import build_guild_service
+from src.dependencies.write_buffer import interaction_buffer
+from src.settings import settings
+from src.utils.cursor import NEXT_CURSOR_HEADER
 
 from src.routes import api_router
 from src.routes.auth import auth_router
@@ -19,7 +31,31 @@ async def lifespan(app: FastAPI):
     setup_telemetry()
     FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck,docs,openapi.json,")
     await db.init_pool()
+
+    partition_maintenance.start()
+    partition_maintenance.trigger()
+
+    if settings.INTERACTION_COUNTS_REBUILD_INTERVAL_S > 0:
+        interaction_counts_rebuild.start()
+
+    quest_statistics_fold.start()
+    leaderboard_refresh.start()
+    last_used.start()
+    quest_cache_listener.start()
+
+    if settings.INTERACTION_BUFFER_ENABLED:
+        interaction_buffer.start(build_guild_service().write_interactions)
+
     yield
+
+    # Flushes whatever is still buffered, so it must happen before the pool closes
+    await interaction_buffer.stop()
+    await last_used.stop()
+    await partition_maintenance.stop()
+    await interaction_counts_rebuild.stop()
+    await quest_statistics_fold.stop()
+    await leaderboard_refresh.stop()
+    await quest_cache_listener.stop()
     await db.close_pool()
 
 app = FastAPI(
@@ -61,6 +97,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(auth_router)
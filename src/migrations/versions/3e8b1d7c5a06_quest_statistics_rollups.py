@@ -0,0 +1,366 @@
+"""quest-statistics-rollups
+
+Revision ID: 3e8b1d7c5a06
+Revises: d4f7a2c9e615
+Create Date: 2026-10-17 16:08:12.905317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8b1d7c5a06'
+down_revision: Union[str, Sequence[str], None] = 'd4f7a2c9e615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Quest statistics, kept up to date by triggers on quest_progress and objective_progress,
+    # so reading them costs the same however many players have attempted a quest
+    op.execute("""
+        CREATE TABLE quests_v3.quest_statistics (
+            quest_id int8 NOT NULL,
+            total_accepts int8 DEFAULT 0 NOT NULL,
+            total_pending int8 DEFAULT 0 NOT NULL,
+            total_started int8 DEFAULT 0 NOT NULL,
+            total_completed int8 DEFAULT 0 NOT NULL,
+            total_failed int8 DEFAULT 0 NOT NULL,
+            timed_completions int8 DEFAULT 0 NOT NULL,
+            completion_seconds_sum float8 DEFAULT 0 NOT NULL,
+            fastest_completion_seconds float8 NULL,
+            slowest_completion_seconds float8 NULL,
+            unique_players int8 DEFAULT 0 NOT NULL,
+            repeat_attempt_players int8 DEFAULT 0 NOT NULL,
+            CONSTRAINT quest_statistics_pk PRIMARY KEY (quest_id)
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.quest_attempts (
+            quest_id int8 NOT NULL,
+            thorny_id int8 NOT NULL,
+            attempts int4 DEFAULT 0 NOT NULL,
+            CONSTRAINT quest_attempts_pk PRIMARY KEY (quest_id, thorny_id)
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.quest_daily_activity (
+            quest_id int8 NOT NULL,
+            "date" date NOT NULL,
+            accepts int8 DEFAULT 0 NOT NULL,
+            completions int8 DEFAULT 0 NOT NULL,
+            failures int8 DEFAULT 0 NOT NULL,
+            CONSTRAINT quest_daily_activity_pk PRIMARY KEY (quest_id, "date")
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.objective_statistics (
+            objective_id int8 NOT NULL,
+            players_reached int8 DEFAULT 0 NOT NULL,
+            players_completed int8 DEFAULT 0 NOT NULL,
+            players_failed int8 DEFAULT 0 NOT NULL,
+            timed_completions int8 DEFAULT 0 NOT NULL,
+            time_seconds_sum float8 DEFAULT 0 NOT NULL,
+            CONSTRAINT objective_statistics_pk PRIMARY KEY (objective_id)
+        );
+    """)
+
+    # Completion times are counted into fixed log-scale buckets, 8 per doubling, see src/utils/histogram.py
+    op.execute("""
+        CREATE TABLE quests_v3.quest_completion_histogram (
+            quest_id int8 NOT NULL,
+            bucket int4 NOT NULL,
+            count int8 DEFAULT 0 NOT NULL,
+            CONSTRAINT quest_completion_histogram_pk PRIMARY KEY (quest_id, bucket)
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.objective_time_histogram (
+            objective_id int8 NOT NULL,
+            bucket int4 NOT NULL,
+            count int8 DEFAULT 0 NOT NULL,
+            CONSTRAINT objective_time_histogram_pk PRIMARY KEY (objective_id, bucket)
+        );
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.duration_bucket(seconds float8)
+        RETURNS int4
+        LANGUAGE sql
+        IMMUTABLE
+        AS $$
+            SELECT floor(ln(GREATEST(seconds, 0) + 1) / ln(2) * 8)::int4;
+        $$;
+    """)
+
+    # Adds (sign = 1) or removes (sign = -1) one quest progress row's contribution to the statistics.
+    # Fastest and slowest can only be widened incrementally, so removing a completion that was
+    # either one rescans that quest's completions.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.count_quest_progress(p quests_v3.quest_progress, sign int4)
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            duration float8;
+            player_attempts int4;
+        BEGIN
+            IF p.status = 'completed' AND p.start_time IS NOT NULL AND p.end_time IS NOT NULL THEN
+                duration := EXTRACT(EPOCH FROM (p.end_time - p.start_time));
+            END IF;
+
+            INSERT INTO quests_v3.quest_attempts AS a (quest_id, thorny_id, attempts)
+            VALUES (p.quest_id, p.thorny_id, sign)
+            ON CONFLICT (quest_id, thorny_id)
+            DO UPDATE SET attempts = a.attempts + EXCLUDED.attempts
+            RETURNING a.attempts INTO player_attempts;
+
+            IF player_attempts = 0 THEN
+                DELETE FROM quests_v3.quest_attempts WHERE quest_id = p.quest_id AND thorny_id = p.thorny_id;
+            END IF;
+
+            INSERT INTO quests_v3.quest_statistics AS s (
+                quest_id,
+                total_accepts,
+                total_pending,
+                total_started,
+                total_completed,
+                total_failed,
+                timed_completions,
+                completion_seconds_sum,
+                fastest_completion_seconds,
+                slowest_completion_seconds,
+                unique_players,
+                repeat_attempt_players
+            )
+            VALUES (
+                p.quest_id,
+                sign,
+                sign * (p.status = 'pending')::int4,
+                sign * (p.status IN ('active', 'completed', 'failed'))::int4,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4,
+                sign * (duration IS NOT NULL)::int4,
+                sign * COALESCE(duration, 0),
+                CASE WHEN sign > 0 THEN duration END,
+                CASE WHEN sign > 0 THEN duration END,
+                (player_attempts > 0)::int4 - (player_attempts - sign > 0)::int4,
+                (player_attempts > 1)::int4 - (player_attempts - sign > 1)::int4
+            )
+            ON CONFLICT (quest_id) DO UPDATE SET
+                total_accepts = s.total_accepts + EXCLUDED.total_accepts,
+                total_pending = s.total_pending + EXCLUDED.total_pending,
+                total_started = s.total_started + EXCLUDED.total_started,
+                total_completed = s.total_completed + EXCLUDED.total_completed,
+                total_failed = s.total_failed + EXCLUDED.total_failed,
+                timed_completions = s.timed_completions + EXCLUDED.timed_completions,
+                completion_seconds_sum = s.completion_seconds_sum + EXCLUDED.completion_seconds_sum,
+                fastest_completion_seconds = LEAST(s.fastest_completion_seconds, EXCLUDED.fastest_completion_seconds),
+                slowest_completion_seconds = GREATEST(s.slowest_completion_seconds, EXCLUDED.slowest_completion_seconds),
+                unique_players = s.unique_players + EXCLUDED.unique_players,
+                repeat_attempt_players = s.repeat_attempt_players + EXCLUDED.repeat_attempt_players;
+
+            IF sign < 0 AND duration IS NOT NULL THEN
+                UPDATE quests_v3.quest_statistics s
+                SET fastest_completion_seconds = r.fastest,
+                    slowest_completion_seconds = r.slowest
+                FROM (
+                    SELECT MIN(EXTRACT(EPOCH FROM (end_time - start_time))) AS fastest,
+                           MAX(EXTRACT(EPOCH FROM (end_time - start_time))) AS slowest
+                    FROM quests_v3.quest_progress
+                    WHERE quest_id = p.quest_id
+                    AND status = 'completed'
+                    AND start_time IS NOT NULL
+                    AND end_time IS NOT NULL
+                ) r
+                WHERE s.quest_id = p.quest_id
+                AND (duration <= s.fastest_completion_seconds OR duration >= s.slowest_completion_seconds);
+            END IF;
+
+            IF duration IS NOT NULL THEN
+                INSERT INTO quests_v3.quest_completion_histogram AS h (quest_id, bucket, count)
+                VALUES (p.quest_id, quests_v3.duration_bucket(duration), sign)
+                ON CONFLICT (quest_id, bucket)
+                DO UPDATE SET count = h.count + EXCLUDED.count;
+            END IF;
+
+            INSERT INTO quests_v3.quest_daily_activity AS d (quest_id, "date", accepts, completions, failures)
+            VALUES (
+                p.quest_id,
+                p.accept_time::date,
+                sign,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4
+            )
+            ON CONFLICT (quest_id, "date") DO UPDATE SET
+                accepts = d.accepts + EXCLUDED.accepts,
+                completions = d.completions + EXCLUDED.completions,
+                failures = d.failures + EXCLUDED.failures;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.count_objective_progress(p quests_v3.objective_progress, sign int4)
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            duration float8;
+        BEGIN
+            IF p.status = 'completed' AND p.start_time IS NOT NULL AND p.end_time IS NOT NULL THEN
+                duration := EXTRACT(EPOCH FROM (p.end_time - p.start_time));
+            END IF;
+
+            INSERT INTO quests_v3.objective_statistics AS s (
+                objective_id,
+                players_reached,
+                players_completed,
+                players_failed,
+                timed_completions,
+                time_seconds_sum
+            )
+            VALUES (
+                p.objective_id,
+                sign,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4,
+                sign * (duration IS NOT NULL)::int4,
+                sign * COALESCE(duration, 0)
+            )
+            ON CONFLICT (objective_id) DO UPDATE SET
+                players_reached = s.players_reached + EXCLUDED.players_reached,
+                players_completed = s.players_completed + EXCLUDED.players_completed,
+                players_failed = s.players_failed + EXCLUDED.players_failed,
+                timed_completions = s.timed_completions + EXCLUDED.timed_completions,
+                time_seconds_sum = s.time_seconds_sum + EXCLUDED.time_seconds_sum;
+
+            IF duration IS NOT NULL THEN
+                INSERT INTO quests_v3.objective_time_histogram AS h (objective_id, bucket, count)
+                VALUES (p.objective_id, quests_v3.duration_bucket(duration), sign)
+                ON CONFLICT (objective_id, bucket)
+                DO UPDATE SET count = h.count + EXCLUDED.count;
+            END IF;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.quest_progress_statistics()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM quests_v3.count_quest_progress(OLD, -1);
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM quests_v3.count_quest_progress(NEW, 1);
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.objective_progress_statistics()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM quests_v3.count_objective_progress(OLD, -1);
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM quests_v3.count_objective_progress(NEW, 1);
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$;
+    """)
+
+    # Updates that leave every counted column as it was (e.g. target progress ticks) skip the statistics entirely
+    op.execute("""
+        CREATE TRIGGER quest_progress_statistics_insert_delete
+        AFTER INSERT OR DELETE ON quests_v3.quest_progress
+        FOR EACH ROW EXECUTE FUNCTION quests_v3.quest_progress_statistics();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER quest_progress_statistics_update
+        AFTER UPDATE ON quests_v3.quest_progress
+        FOR EACH ROW
+        WHEN ((OLD.quest_id, OLD.thorny_id, OLD.accept_time, OLD.start_time, OLD.end_time, OLD.status)
+              IS DISTINCT FROM (NEW.quest_id, NEW.thorny_id, NEW.accept_time, NEW.start_time, NEW.end_time, NEW.status))
+        EXECUTE FUNCTION quests_v3.quest_progress_statistics();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER objective_progress_statistics_insert_delete
+        AFTER INSERT OR DELETE ON quests_v3.objective_progress
+        FOR EACH ROW EXECUTE FUNCTION quests_v3.objective_progress_statistics();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER objective_progress_statistics_update
+        AFTER UPDATE ON quests_v3.objective_progress
+        FOR EACH ROW
+        WHEN ((OLD.objective_id, OLD.start_time, OLD.end_time, OLD.status)
+              IS DISTINCT FROM (NEW.objective_id, NEW.start_time, NEW.end_time, NEW.status))
+        EXECUTE FUNCTION quests_v3.objective_progress_statistics();
+    """)
+
+    # Recomputes every statistic from the progress tables, for the backfill and for repairing drift.
+    # The SHARE locks hold off progress writes until the rebuild commits.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.rebuild_quest_statistics()
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            LOCK TABLE quests_v3.quest_progress, quests_v3.objective_progress IN SHARE MODE;
+
+            TRUNCATE quests_v3.quest_statistics,
+                     quests_v3.quest_attempts,
+                     quests_v3.quest_daily_activity,
+                     quests_v3.quest_completion_histogram,
+                     quests_v3.objective_statistics,
+                     quests_v3.objective_time_histogram;
+
+            PERFORM quests_v3.count_quest_progress(p, 1) FROM quests_v3.quest_progress p;
+            PERFORM quests_v3.count_objective_progress(p, 1) FROM quests_v3.objective_progress p;
+        END;
+        $$;
+    """)
+
+    op.execute("SELECT quests_v3.rebuild_quest_statistics();")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER objective_progress_statistics_update ON quests_v3.objective_progress;")
+    op.execute("DROP TRIGGER objective_progress_statistics_insert_delete ON quests_v3.objective_progress;")
+    op.execute("DROP TRIGGER quest_progress_statistics_update ON quests_v3.quest_progress;")
+    op.execute("DROP TRIGGER quest_progress_statistics_insert_delete ON quests_v3.quest_progress;")
+    op.execute("DROP FUNCTION quests_v3.rebuild_quest_statistics();")
+    op.execute("DROP FUNCTION quests_v3.objective_progress_statistics();")
+    op.execute("DROP FUNCTION quests_v3.quest_progress_statistics();")
+    op.execute("DROP FUNCTION quests_v3.count_objective_progress(quests_v3.objective_progress, int4);")
+    op.execute("DROP FUNCTION quests_v3.count_quest_progress(quests_v3.quest_progress, int4);")
+    op.execute("DROP FUNCTION quests_v3.duration_bucket(float8);")
+    op.execute("DROP TABLE quests_v3.objective_time_histogram;")
+    op.execute("DROP TABLE quests_v3.quest_completion_histogram;")
+    op.execute("DROP TABLE quests_v3.objective_statistics;")
+    op.execute("DROP TABLE quests_v3.quest_daily_activity;")
+    op.execute("DROP TABLE quests_v3.quest_attempts;")
+    op.execute("DROP TABLE quests_v3.quest_statistics;")
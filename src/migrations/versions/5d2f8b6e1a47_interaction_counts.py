@@ -0,0 +1,71 @@
+"""interaction-counts
+
+Revision ID: 5d2f8b6e1a47
+Revises: e41a7c2d5f88
+Create Date: 2026-10-17 12:26:54.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8b6e1a47'
+down_revision: Union[str, Sequence[str], None] = 'e41a7c2d5f88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-user interaction counters, incremented alongside every interaction insert
+    op.execute("""
+        CREATE TABLE events.interaction_counts (
+            thorny_id int8 NOT NULL,
+            "type" varchar NOT NULL,
+            reference varchar NOT NULL,
+            count int8 DEFAULT 0 NOT NULL,
+            CONSTRAINT interaction_counts_pk PRIMARY KEY (thorny_id, "type", reference)
+        );
+    """)
+
+    op.execute("""
+        ALTER TABLE events.interaction_counts
+        ADD CONSTRAINT interaction_counts_user_fk
+        FOREIGN KEY (thorny_id) REFERENCES users."user"(thorny_id);
+    """)
+
+    # Recomputes every counter from events.interactions.
+    # The SHARE lock waits for in-flight inserts and holds new ones off until the rebuild commits,
+    # and is taken on interactions first, the same order inserts lock the two tables in.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events.rebuild_interaction_counts()
+        RETURNS int8
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            rebuilt int8;
+        BEGIN
+            LOCK TABLE events.interactions IN SHARE MODE;
+            LOCK TABLE events.interaction_counts IN EXCLUSIVE MODE;
+
+            DELETE FROM events.interaction_counts;
+
+            INSERT INTO events.interaction_counts(thorny_id, "type", reference, count)
+            SELECT thorny_id, "type", reference, count(*)
+            FROM events.interactions
+            GROUP BY thorny_id, "type", reference;
+
+            GET DIAGNOSTICS rebuilt = ROW_COUNT;
+            RETURN rebuilt;
+        END;
+        $$;
+    """)
+
+    op.execute("SELECT events.rebuild_interaction_counts();")
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION events.rebuild_interaction_counts();")
+    op.execute("DROP TABLE events.interaction_counts;")
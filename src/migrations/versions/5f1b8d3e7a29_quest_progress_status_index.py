@@ -0,0 +1,31 @@
+"""quest-progress-status-index
+
+Revision ID: 5f1b8d3e7a29
+Revises: a7e3c9d2b614
+Create Date: 2026-10-17 19:58:12.604317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1b8d3e7a29'
+down_revision: Union[str, Sequence[str], None] = 'a7e3c9d2b614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backs the fastest/slowest rescan in quests_v3.fold_quest_statistics, which reads every completed
+    # progress of a quest that lost a timed completion. The rescan runs once per such quest per fold,
+    # not in the progress triggers, and without this index it would read all of the quest's progress.
+    op.execute("""
+        CREATE INDEX idx_quest_progress_quest_id_status ON quests_v3.quest_progress USING btree (quest_id, status);
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX quests_v3.idx_quest_progress_quest_id_status;")
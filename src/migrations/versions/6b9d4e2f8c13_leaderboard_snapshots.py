@@ -0,0 +1,55 @@
+"""leaderboard-snapshots
+
+Revision ID: 6b9d4e2f8c13
+Revises: 3e8b1d7c5a06
+Create Date: 2026-10-17 16:47:31.520846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b9d4e2f8c13'
+down_revision: Union[str, Sequence[str], None] = '3e8b1d7c5a06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Ranked leaderboards per (guild, board, period), rebuilt by LeaderboardService rather than on every read.
+    # The period is "all" for all-time boards, or the month as YYYY-MM.
+    op.execute("""
+        CREATE TABLE guilds.leaderboard_snapshot (
+            guild_id int8 NOT NULL,
+            board varchar NOT NULL,
+            period varchar NOT NULL,
+            "rank" int4 NOT NULL,
+            thorny_id int8 NOT NULL,
+            discord_id int8 NOT NULL,
+            value float8 NOT NULL,
+            CONSTRAINT leaderboard_snapshot_pk PRIMARY KEY (guild_id, board, period, "rank")
+        );
+    """)
+
+    op.execute("""
+        CREATE UNIQUE INDEX idx_leaderboard_snapshot_thorny_id
+        ON guilds.leaderboard_snapshot USING btree (guild_id, board, period, thorny_id);
+    """)
+
+    op.execute("""
+        CREATE TABLE guilds.leaderboard_refresh (
+            guild_id int8 NOT NULL,
+            board varchar NOT NULL,
+            period varchar NOT NULL,
+            refreshed_at timestamptz DEFAULT now() NOT NULL,
+            CONSTRAINT leaderboard_refresh_pk PRIMARY KEY (guild_id, board, period)
+        );
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE guilds.leaderboard_refresh;")
+    op.execute("DROP TABLE guilds.leaderboard_snapshot;")
@@ -0,0 +1,83 @@
+"""sessions-table
+
+Revision ID: 7c1e4f2a9b30
+Revises: 23b5838e1d36
+Create Date: 2026-10-17 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4f2a9b30'
+down_revision: Union[str, Sequence[str], None] = '23b5838e1d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sessions, written when a connect opens a session and a disconnect closes it
+    op.execute("""
+        CREATE TABLE events.sessions (
+            connect_event_id    int8 NOT NULL,
+            thorny_id           int8 NOT NULL,
+            connect_time        timestamptz NOT NULL,
+            disconnect_event_id int8 NULL,
+            disconnect_time     timestamptz NULL,
+            playtime            interval GENERATED ALWAYS AS (disconnect_time - connect_time) STORED,
+            CONSTRAINT sessions_pk PRIMARY KEY (connect_event_id)
+        );
+    """)
+
+    op.execute("""
+        ALTER TABLE events.sessions
+        ADD CONSTRAINT sessions_user_fk
+        FOREIGN KEY (thorny_id) REFERENCES users."user"(thorny_id);
+    """)
+
+    op.execute("CREATE INDEX idx_sessions_thorny_id ON events.sessions USING btree (thorny_id, connect_time DESC);")
+    op.execute("CREATE INDEX idx_sessions_connect_time ON events.sessions USING btree (connect_time);")
+    op.execute("CREATE INDEX idx_sessions_disconnect_time ON events.sessions USING btree (disconnect_time);")
+
+    # One-off backfill, pairing connections exactly the way the old view did
+    op.execute("""
+        INSERT INTO events.sessions(connect_event_id, thorny_id, connect_time, disconnect_event_id, disconnect_time)
+        SELECT connect_event_id, thorny_id, connect_time, disconnect_event_id, disconnect_time
+        FROM events.sessions_view;
+    """)
+
+    # Keep the view around for anything still reading it, but serve it from the table
+    op.execute("""
+        CREATE OR REPLACE VIEW events.sessions_view
+        AS SELECT s.connect_event_id,
+            s.connect_time,
+            s.disconnect_event_id,
+            s.disconnect_time,
+            s.playtime,
+            s.thorny_id
+           FROM events.sessions s
+          ORDER BY s.connect_time;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE VIEW events.sessions_view
+        AS SELECT connect.connection_id AS connect_event_id,
+            connect."time" AS connect_time,
+            disconnect.connection_id AS disconnect_event_id,
+            disconnect."time" AS disconnect_time,
+            disconnect."time" - connect."time" AS playtime,
+            connect.thorny_id
+           FROM events.connections connect
+             LEFT JOIN events.connections disconnect ON connect.thorny_id = disconnect.thorny_id AND disconnect.type::text = 'disconnect'::text AND disconnect.ignored = false AND disconnect."time" = (( SELECT min(d."time") AS min
+                   FROM events.connections d
+                  WHERE d.type::text = 'disconnect'::text AND d.ignored = false AND d.thorny_id = connect.thorny_id AND d."time" > connect."time"))
+          WHERE connect.type::text = 'connect'::text AND connect.ignored = false
+          ORDER BY connect."time";
+    """)
+
+    op.execute("DROP TABLE events.sessions;")
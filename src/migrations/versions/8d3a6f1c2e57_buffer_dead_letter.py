@@ -0,0 +1,36 @@
+"""buffer-dead-letter
+
+Revision ID: 8d3a6f1c2e57
+Revises: f2c7a9e4b381
+Create Date: 2026-10-17 19:02:11.480915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3a6f1c2e57'
+down_revision: Union[str, Sequence[str], None] = 'f2c7a9e4b381'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Buffered rows that could not be written, kept so that they can be inspected and replayed by hand
+    op.execute("""
+        CREATE TABLE events.dead_letter (
+            dead_letter_id bigserial NOT NULL,
+            buffer varchar NOT NULL,
+            reason text NOT NULL,
+            payload jsonb NOT NULL,
+            failed_at timestamptz DEFAULT now() NOT NULL,
+            CONSTRAINT dead_letter_pk PRIMARY KEY (dead_letter_id)
+        );
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE events.dead_letter;")
@@ -0,0 +1,144 @@
+"""interaction-positions
+
+Revision ID: 9a6c3e1f7b52
+Revises: 5d2f8b6e1a47
+Create Date: 2026-10-17 13:48:05.902374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6c3e1f7b52'
+down_revision: Union[str, Sequence[str], None] = '5d2f8b6e1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored x/y/z for exact filters, and the horizontal (x, z) position for the GiST index.
+    # Box, radius and chunk lookups narrow down on the index first, then check y.
+    op.execute("""
+        ALTER TABLE events.interactions
+            ADD COLUMN x int2 GENERATED ALWAYS AS (coordinates[1]) STORED,
+            ADD COLUMN y int2 GENERATED ALWAYS AS (coordinates[2]) STORED,
+            ADD COLUMN z int2 GENERATED ALWAYS AS (coordinates[3]) STORED,
+            ADD COLUMN position point GENERATED ALWAYS AS (point(coordinates[1], coordinates[3])) STORED;
+    """)
+
+    op.execute("CREATE INDEX interactions_position_gist_idx ON events.interactions USING gist (position);")
+    op.execute("DROP INDEX events.interactions_coordinates_gin_idx;")
+
+    # New partitions must carry the generated columns too, and rows moved out of the
+    # default partition can only be inserted through their non-generated columns
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events.create_monthly_partitions(parent regclass, from_month date, months int)
+        RETURNS int
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            parent_schema text;
+            parent_name text;
+            insert_columns text;
+            partition_name text;
+            month_start timestamptz;
+            month_end timestamptz;
+            created int := 0;
+        BEGIN
+            SELECT n.nspname, c.relname INTO parent_schema, parent_name
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.oid = parent;
+
+            SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO insert_columns
+            FROM pg_attribute
+            WHERE attrelid = parent
+            AND attnum > 0
+            AND NOT attisdropped
+            AND attgenerated = '';
+
+            FOR i IN 0 .. months - 1 LOOP
+                month_start := (date_trunc('month', from_month::timestamp) + make_interval(months => i)) AT TIME ZONE 'UTC';
+                month_end := (date_trunc('month', from_month::timestamp) + make_interval(months => i + 1)) AT TIME ZONE 'UTC';
+                partition_name := parent_name || '_' || to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM');
+
+                CONTINUE WHEN to_regclass(format('%I.%I', parent_schema, partition_name)) IS NOT NULL;
+
+                EXECUTE format('CREATE TABLE %I.%I (LIKE %s INCLUDING DEFAULTS INCLUDING GENERATED)',
+                               parent_schema, partition_name, parent);
+
+                EXECUTE format('WITH moved AS (DELETE FROM %I.%I WHERE "time" >= %L AND "time" < %L RETURNING %s) '
+                               'INSERT INTO %I.%I (%s) SELECT * FROM moved',
+                               parent_schema, parent_name || '_default', month_start, month_end, insert_columns,
+                               parent_schema, partition_name, insert_columns);
+
+                EXECUTE format('ALTER TABLE %s ATTACH PARTITION %I.%I FOR VALUES FROM (%L) TO (%L)',
+                               parent, parent_schema, partition_name, month_start, month_end);
+
+                created := created + 1;
+            END LOOP;
+
+            RETURN created;
+        END;
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events.create_monthly_partitions(parent regclass, from_month date, months int)
+        RETURNS int
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            parent_schema text;
+            parent_name text;
+            partition_name text;
+            month_start timestamptz;
+            month_end timestamptz;
+            created int := 0;
+        BEGIN
+            SELECT n.nspname, c.relname INTO parent_schema, parent_name
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.oid = parent;
+
+            FOR i IN 0 .. months - 1 LOOP
+                month_start := (date_trunc('month', from_month::timestamp) + make_interval(months => i)) AT TIME ZONE 'UTC';
+                month_end := (date_trunc('month', from_month::timestamp) + make_interval(months => i + 1)) AT TIME ZONE 'UTC';
+                partition_name := parent_name || '_' || to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM');
+
+                CONTINUE WHEN to_regclass(format('%I.%I', parent_schema, partition_name)) IS NOT NULL;
+
+                EXECUTE format('CREATE TABLE %I.%I (LIKE %s INCLUDING DEFAULTS)',
+                               parent_schema, partition_name, parent);
+
+                EXECUTE format('WITH moved AS (DELETE FROM %I.%I WHERE "time" >= %L AND "time" < %L RETURNING *) '
+                               'INSERT INTO %I.%I SELECT * FROM moved',
+                               parent_schema, parent_name || '_default', month_start, month_end,
+                               parent_schema, partition_name);
+
+                EXECUTE format('ALTER TABLE %s ATTACH PARTITION %I.%I FOR VALUES FROM (%L) TO (%L)',
+                               parent, parent_schema, partition_name, month_start, month_end);
+
+                created := created + 1;
+            END LOOP;
+
+            RETURN created;
+        END;
+        $$;
+    """)
+
+    op.execute("CREATE INDEX interactions_coordinates_gin_idx ON events.interactions USING gin (coordinates);")
+    op.execute("DROP INDEX events.interactions_position_gist_idx;")
+
+    op.execute("""
+        ALTER TABLE events.interactions
+            DROP COLUMN position,
+            DROP COLUMN z,
+            DROP COLUMN y,
+            DROP COLUMN x;
+    """)
@@ -0,0 +1,523 @@
+"""quest-statistics-pending
+
+Revision ID: a7e3c9d2b614
+Revises: 8d3a6f1c2e57
+Create Date: 2026-10-17 19:41:37.215804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3c9d2b614'
+down_revision: Union[str, Sequence[str], None] = '8d3a6f1c2e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The statistics triggers no longer update the shared rollup rows themselves. Upserting them in the
+    # trigger locked a popular quest's statistics row for the whole of every accept and completion, and
+    # accepting (quest row, then objective rows) and matching (objective rows, then quest row) took those
+    # locks in opposite orders, so they could deadlock.
+    #
+    # Instead, each trigger appends its change to a "pending" table, which takes no locks on shared rows.
+    # quests_v3.fold_quest_statistics(), run every QUEST_STATISTICS_FOLD_INTERVAL_S seconds, sums the
+    # pending changes into the rollups in key order, so the statistics lag behind by up to that interval.
+    # quest_attempts is still upserted directly, it is per player and only locked by that player's progress.
+    op.execute("""
+        CREATE TABLE quests_v3.quest_statistics_pending (
+            quest_id int8 NOT NULL,
+            total_accepts int8 NOT NULL,
+            total_pending int8 NOT NULL,
+            total_started int8 NOT NULL,
+            total_completed int8 NOT NULL,
+            total_failed int8 NOT NULL,
+            timed_completions int8 NOT NULL,
+            completion_seconds_sum float8 NOT NULL,
+            fastest_completion_seconds float8 NULL,
+            slowest_completion_seconds float8 NULL,
+            unique_players int8 NOT NULL,
+            repeat_attempt_players int8 NOT NULL,
+            removed_timed_completion bool NOT NULL
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.quest_daily_activity_pending (
+            quest_id int8 NOT NULL,
+            "date" date NOT NULL,
+            accepts int8 NOT NULL,
+            completions int8 NOT NULL,
+            failures int8 NOT NULL
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.quest_completion_histogram_pending (
+            quest_id int8 NOT NULL,
+            bucket int4 NOT NULL,
+            count int8 NOT NULL
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.objective_statistics_pending (
+            objective_id int8 NOT NULL,
+            players_reached int8 NOT NULL,
+            players_completed int8 NOT NULL,
+            players_failed int8 NOT NULL,
+            timed_completions int8 NOT NULL,
+            time_seconds_sum float8 NOT NULL
+        );
+    """)
+
+    op.execute("""
+        CREATE TABLE quests_v3.objective_time_histogram_pending (
+            objective_id int8 NOT NULL,
+            bucket int4 NOT NULL,
+            count int8 NOT NULL
+        );
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.count_quest_progress(p quests_v3.quest_progress, sign int4)
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            duration float8;
+            player_attempts int4;
+        BEGIN
+            IF p.status = 'completed' AND p.start_time IS NOT NULL AND p.end_time IS NOT NULL THEN
+                duration := EXTRACT(EPOCH FROM (p.end_time - p.start_time));
+            END IF;
+
+            INSERT INTO quests_v3.quest_attempts AS a (quest_id, thorny_id, attempts)
+            VALUES (p.quest_id, p.thorny_id, sign)
+            ON CONFLICT (quest_id, thorny_id)
+            DO UPDATE SET attempts = a.attempts + EXCLUDED.attempts
+            RETURNING a.attempts INTO player_attempts;
+
+            IF player_attempts = 0 THEN
+                DELETE FROM quests_v3.quest_attempts WHERE quest_id = p.quest_id AND thorny_id = p.thorny_id;
+            END IF;
+
+            INSERT INTO quests_v3.quest_statistics_pending VALUES (
+                p.quest_id,
+                sign,
+                sign * (p.status = 'pending')::int4,
+                sign * (p.status IN ('active', 'completed', 'failed'))::int4,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4,
+                sign * (duration IS NOT NULL)::int4,
+                sign * COALESCE(duration, 0),
+                CASE WHEN sign > 0 THEN duration END,
+                CASE WHEN sign > 0 THEN duration END,
+                (player_attempts > 0)::int4 - (player_attempts - sign > 0)::int4,
+                (player_attempts > 1)::int4 - (player_attempts - sign > 1)::int4,
+                sign < 0 AND duration IS NOT NULL
+            );
+
+            IF duration IS NOT NULL THEN
+                INSERT INTO quests_v3.quest_completion_histogram_pending
+                VALUES (p.quest_id, quests_v3.duration_bucket(duration), sign);
+            END IF;
+
+            INSERT INTO quests_v3.quest_daily_activity_pending VALUES (
+                p.quest_id,
+                p.accept_time::date,
+                sign,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4
+            );
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.count_objective_progress(p quests_v3.objective_progress, sign int4)
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            duration float8;
+        BEGIN
+            IF p.status = 'completed' AND p.start_time IS NOT NULL AND p.end_time IS NOT NULL THEN
+                duration := EXTRACT(EPOCH FROM (p.end_time - p.start_time));
+            END IF;
+
+            INSERT INTO quests_v3.objective_statistics_pending VALUES (
+                p.objective_id,
+                sign,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4,
+                sign * (duration IS NOT NULL)::int4,
+                sign * COALESCE(duration, 0)
+            );
+
+            IF duration IS NOT NULL THEN
+                INSERT INTO quests_v3.objective_time_histogram_pending
+                VALUES (p.objective_id, quests_v3.duration_bucket(duration), sign);
+            END IF;
+        END;
+        $$;
+    """)
+
+    # Each pending table is emptied and summed in one statement, so changes committed while it runs wait
+    # for the next fold. Concurrent folds, e.g. from several API replicas, skip instead of queueing.
+    # Fastest and slowest can only be widened by summing, so a quest that lost a timed completion
+    # has them recomputed from its completions, once per fold however many completions it lost.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.fold_quest_statistics()
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            rescan int8[];
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('quests_v3.fold_quest_statistics')) THEN
+                RETURN;
+            END IF;
+
+            WITH folded AS (
+                DELETE FROM quests_v3.quest_statistics_pending RETURNING *
+            ),
+            summed AS (
+                SELECT quest_id,
+                       sum(total_accepts) AS total_accepts,
+                       sum(total_pending) AS total_pending,
+                       sum(total_started) AS total_started,
+                       sum(total_completed) AS total_completed,
+                       sum(total_failed) AS total_failed,
+                       sum(timed_completions) AS timed_completions,
+                       sum(completion_seconds_sum) AS completion_seconds_sum,
+                       min(fastest_completion_seconds) AS fastest_completion_seconds,
+                       max(slowest_completion_seconds) AS slowest_completion_seconds,
+                       sum(unique_players) AS unique_players,
+                       sum(repeat_attempt_players) AS repeat_attempt_players,
+                       bool_or(removed_timed_completion) AS removed_timed_completion
+                FROM folded
+                GROUP BY quest_id
+            ),
+            upserted AS (
+                INSERT INTO quests_v3.quest_statistics AS s (
+                    quest_id,
+                    total_accepts,
+                    total_pending,
+                    total_started,
+                    total_completed,
+                    total_failed,
+                    timed_completions,
+                    completion_seconds_sum,
+                    fastest_completion_seconds,
+                    slowest_completion_seconds,
+                    unique_players,
+                    repeat_attempt_players
+                )
+                SELECT quest_id, total_accepts, total_pending, total_started, total_completed, total_failed,
+                       timed_completions, completion_seconds_sum, fastest_completion_seconds,
+                       slowest_completion_seconds, unique_players, repeat_attempt_players
+                FROM summed
+                ORDER BY quest_id
+                ON CONFLICT (quest_id) DO UPDATE SET
+                    total_accepts = s.total_accepts + EXCLUDED.total_accepts,
+                    total_pending = s.total_pending + EXCLUDED.total_pending,
+                    total_started = s.total_started + EXCLUDED.total_started,
+                    total_completed = s.total_completed + EXCLUDED.total_completed,
+                    total_failed = s.total_failed + EXCLUDED.total_failed,
+                    timed_completions = s.timed_completions + EXCLUDED.timed_completions,
+                    completion_seconds_sum = s.completion_seconds_sum + EXCLUDED.completion_seconds_sum,
+                    fastest_completion_seconds = LEAST(s.fastest_completion_seconds, EXCLUDED.fastest_completion_seconds),
+                    slowest_completion_seconds = GREATEST(s.slowest_completion_seconds, EXCLUDED.slowest_completion_seconds),
+                    unique_players = s.unique_players + EXCLUDED.unique_players,
+                    repeat_attempt_players = s.repeat_attempt_players + EXCLUDED.repeat_attempt_players
+            )
+            SELECT array_agg(quest_id) INTO rescan FROM summed WHERE removed_timed_completion;
+
+            IF rescan IS NOT NULL THEN
+                UPDATE quests_v3.quest_statistics s
+                SET fastest_completion_seconds = r.fastest,
+                    slowest_completion_seconds = r.slowest
+                FROM unnest(rescan) AS q(quest_id)
+                CROSS JOIN LATERAL (
+                    SELECT MIN(EXTRACT(EPOCH FROM (p.end_time - p.start_time))) AS fastest,
+                           MAX(EXTRACT(EPOCH FROM (p.end_time - p.start_time))) AS slowest
+                    FROM quests_v3.quest_progress p
+                    WHERE p.quest_id = q.quest_id
+                    AND p.status = 'completed'
+                    AND p.start_time IS NOT NULL
+                    AND p.end_time IS NOT NULL
+                ) r
+                WHERE s.quest_id = q.quest_id;
+            END IF;
+
+            WITH folded AS (
+                DELETE FROM quests_v3.quest_daily_activity_pending RETURNING *
+            )
+            INSERT INTO quests_v3.quest_daily_activity AS d (quest_id, "date", accepts, completions, failures)
+            SELECT quest_id, "date", sum(accepts), sum(completions), sum(failures)
+            FROM folded
+            GROUP BY quest_id, "date"
+            ORDER BY quest_id, "date"
+            ON CONFLICT (quest_id, "date") DO UPDATE SET
+                accepts = d.accepts + EXCLUDED.accepts,
+                completions = d.completions + EXCLUDED.completions,
+                failures = d.failures + EXCLUDED.failures;
+
+            WITH folded AS (
+                DELETE FROM quests_v3.quest_completion_histogram_pending RETURNING *
+            )
+            INSERT INTO quests_v3.quest_completion_histogram AS h (quest_id, bucket, count)
+            SELECT quest_id, bucket, sum(count)
+            FROM folded
+            GROUP BY quest_id, bucket
+            ORDER BY quest_id, bucket
+            ON CONFLICT (quest_id, bucket) DO UPDATE SET count = h.count + EXCLUDED.count;
+
+            WITH folded AS (
+                DELETE FROM quests_v3.objective_statistics_pending RETURNING *
+            )
+            INSERT INTO quests_v3.objective_statistics AS s (
+                objective_id,
+                players_reached,
+                players_completed,
+                players_failed,
+                timed_completions,
+                time_seconds_sum
+            )
+            SELECT objective_id, sum(players_reached), sum(players_completed), sum(players_failed),
+                   sum(timed_completions), sum(time_seconds_sum)
+            FROM folded
+            GROUP BY objective_id
+            ORDER BY objective_id
+            ON CONFLICT (objective_id) DO UPDATE SET
+                players_reached = s.players_reached + EXCLUDED.players_reached,
+                players_completed = s.players_completed + EXCLUDED.players_completed,
+                players_failed = s.players_failed + EXCLUDED.players_failed,
+                timed_completions = s.timed_completions + EXCLUDED.timed_completions,
+                time_seconds_sum = s.time_seconds_sum + EXCLUDED.time_seconds_sum;
+
+            WITH folded AS (
+                DELETE FROM quests_v3.objective_time_histogram_pending RETURNING *
+            )
+            INSERT INTO quests_v3.objective_time_histogram AS h (objective_id, bucket, count)
+            SELECT objective_id, bucket, sum(count)
+            FROM folded
+            GROUP BY objective_id, bucket
+            ORDER BY objective_id, bucket
+            ON CONFLICT (objective_id, bucket) DO UPDATE SET count = h.count + EXCLUDED.count;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.rebuild_quest_statistics()
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            LOCK TABLE quests_v3.quest_progress, quests_v3.objective_progress IN SHARE MODE;
+
+            TRUNCATE quests_v3.quest_statistics,
+                     quests_v3.quest_attempts,
+                     quests_v3.quest_daily_activity,
+                     quests_v3.quest_completion_histogram,
+                     quests_v3.objective_statistics,
+                     quests_v3.objective_time_histogram,
+                     quests_v3.quest_statistics_pending,
+                     quests_v3.quest_daily_activity_pending,
+                     quests_v3.quest_completion_histogram_pending,
+                     quests_v3.objective_statistics_pending,
+                     quests_v3.objective_time_histogram_pending;
+
+            PERFORM quests_v3.count_quest_progress(p, 1) FROM quests_v3.quest_progress p;
+            PERFORM quests_v3.count_objective_progress(p, 1) FROM quests_v3.objective_progress p;
+            PERFORM quests_v3.fold_quest_statistics();
+        END;
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("SELECT quests_v3.fold_quest_statistics();")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.rebuild_quest_statistics()
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            LOCK TABLE quests_v3.quest_progress, quests_v3.objective_progress IN SHARE MODE;
+
+            TRUNCATE quests_v3.quest_statistics,
+                     quests_v3.quest_attempts,
+                     quests_v3.quest_daily_activity,
+                     quests_v3.quest_completion_histogram,
+                     quests_v3.objective_statistics,
+                     quests_v3.objective_time_histogram;
+
+            PERFORM quests_v3.count_quest_progress(p, 1) FROM quests_v3.quest_progress p;
+            PERFORM quests_v3.count_objective_progress(p, 1) FROM quests_v3.objective_progress p;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.count_quest_progress(p quests_v3.quest_progress, sign int4)
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            duration float8;
+            player_attempts int4;
+        BEGIN
+            IF p.status = 'completed' AND p.start_time IS NOT NULL AND p.end_time IS NOT NULL THEN
+                duration := EXTRACT(EPOCH FROM (p.end_time - p.start_time));
+            END IF;
+
+            INSERT INTO quests_v3.quest_attempts AS a (quest_id, thorny_id, attempts)
+            VALUES (p.quest_id, p.thorny_id, sign)
+            ON CONFLICT (quest_id, thorny_id)
+            DO UPDATE SET attempts = a.attempts + EXCLUDED.attempts
+            RETURNING a.attempts INTO player_attempts;
+
+            IF player_attempts = 0 THEN
+                DELETE FROM quests_v3.quest_attempts WHERE quest_id = p.quest_id AND thorny_id = p.thorny_id;
+            END IF;
+
+            INSERT INTO quests_v3.quest_statistics AS s (
+                quest_id,
+                total_accepts,
+                total_pending,
+                total_started,
+                total_completed,
+                total_failed,
+                timed_completions,
+                completion_seconds_sum,
+                fastest_completion_seconds,
+                slowest_completion_seconds,
+                unique_players,
+                repeat_attempt_players
+            )
+            VALUES (
+                p.quest_id,
+                sign,
+                sign * (p.status = 'pending')::int4,
+                sign * (p.status IN ('active', 'completed', 'failed'))::int4,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4,
+                sign * (duration IS NOT NULL)::int4,
+                sign * COALESCE(duration, 0),
+                CASE WHEN sign > 0 THEN duration END,
+                CASE WHEN sign > 0 THEN duration END,
+                (player_attempts > 0)::int4 - (player_attempts - sign > 0)::int4,
+                (player_attempts > 1)::int4 - (player_attempts - sign > 1)::int4
+            )
+            ON CONFLICT (quest_id) DO UPDATE SET
+                total_accepts = s.total_accepts + EXCLUDED.total_accepts,
+                total_pending = s.total_pending + EXCLUDED.total_pending,
+                total_started = s.total_started + EXCLUDED.total_started,
+                total_completed = s.total_completed + EXCLUDED.total_completed,
+                total_failed = s.total_failed + EXCLUDED.total_failed,
+                timed_completions = s.timed_completions + EXCLUDED.timed_completions,
+                completion_seconds_sum = s.completion_seconds_sum + EXCLUDED.completion_seconds_sum,
+                fastest_completion_seconds = LEAST(s.fastest_completion_seconds, EXCLUDED.fastest_completion_seconds),
+                slowest_completion_seconds = GREATEST(s.slowest_completion_seconds, EXCLUDED.slowest_completion_seconds),
+                unique_players = s.unique_players + EXCLUDED.unique_players,
+                repeat_attempt_players = s.repeat_attempt_players + EXCLUDED.repeat_attempt_players;
+
+            IF sign < 0 AND duration IS NOT NULL THEN
+                UPDATE quests_v3.quest_statistics s
+                SET fastest_completion_seconds = r.fastest,
+                    slowest_completion_seconds = r.slowest
+                FROM (
+                    SELECT MIN(EXTRACT(EPOCH FROM (end_time - start_time))) AS fastest,
+                           MAX(EXTRACT(EPOCH FROM (end_time - start_time))) AS slowest
+                    FROM quests_v3.quest_progress
+                    WHERE quest_id = p.quest_id
+                    AND status = 'completed'
+                    AND start_time IS NOT NULL
+                    AND end_time IS NOT NULL
+                ) r
+                WHERE s.quest_id = p.quest_id
+                AND (duration <= s.fastest_completion_seconds OR duration >= s.slowest_completion_seconds);
+            END IF;
+
+            IF duration IS NOT NULL THEN
+                INSERT INTO quests_v3.quest_completion_histogram AS h (quest_id, bucket, count)
+                VALUES (p.quest_id, quests_v3.duration_bucket(duration), sign)
+                ON CONFLICT (quest_id, bucket)
+                DO UPDATE SET count = h.count + EXCLUDED.count;
+            END IF;
+
+            INSERT INTO quests_v3.quest_daily_activity AS d (quest_id, "date", accepts, completions, failures)
+            VALUES (
+                p.quest_id,
+                p.accept_time::date,
+                sign,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4
+            )
+            ON CONFLICT (quest_id, "date") DO UPDATE SET
+                accepts = d.accepts + EXCLUDED.accepts,
+                completions = d.completions + EXCLUDED.completions,
+                failures = d.failures + EXCLUDED.failures;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION quests_v3.count_objective_progress(p quests_v3.objective_progress, sign int4)
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            duration float8;
+        BEGIN
+            IF p.status = 'completed' AND p.start_time IS NOT NULL AND p.end_time IS NOT NULL THEN
+                duration := EXTRACT(EPOCH FROM (p.end_time - p.start_time));
+            END IF;
+
+            INSERT INTO quests_v3.objective_statistics AS s (
+                objective_id,
+                players_reached,
+                players_completed,
+                players_failed,
+                timed_completions,
+                time_seconds_sum
+            )
+            VALUES (
+                p.objective_id,
+                sign,
+                sign * (p.status = 'completed')::int4,
+                sign * (p.status = 'failed')::int4,
+                sign * (duration IS NOT NULL)::int4,
+                sign * COALESCE(duration, 0)
+            )
+            ON CONFLICT (objective_id) DO UPDATE SET
+                players_reached = s.players_reached + EXCLUDED.players_reached,
+                players_completed = s.players_completed + EXCLUDED.players_completed,
+                players_failed = s.players_failed + EXCLUDED.players_failed,
+                timed_completions = s.timed_completions + EXCLUDED.timed_completions,
+                time_seconds_sum = s.time_seconds_sum + EXCLUDED.time_seconds_sum;
+
+            IF duration IS NOT NULL THEN
+                INSERT INTO quests_v3.objective_time_histogram AS h (objective_id, bucket, count)
+                VALUES (p.objective_id, quests_v3.duration_bucket(duration), sign)
+                ON CONFLICT (objective_id, bucket)
+                DO UPDATE SET count = h.count + EXCLUDED.count;
+            END IF;
+        END;
+        $$;
+    """)
+
+    op.execute("DROP FUNCTION quests_v3.fold_quest_statistics();")
+    op.execute("DROP TABLE quests_v3.objective_time_histogram_pending;")
+    op.execute("DROP TABLE quests_v3.objective_statistics_pending;")
+    op.execute("DROP TABLE quests_v3.quest_completion_histogram_pending;")
+    op.execute("DROP TABLE quests_v3.quest_daily_activity_pending;")
+    op.execute("DROP TABLE quests_v3.quest_statistics_pending;")
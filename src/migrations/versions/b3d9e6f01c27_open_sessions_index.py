@@ -0,0 +1,30 @@
+"""open-sessions-index
+
+Revision ID: b3d9e6f01c27
+Revises: 7c1e4f2a9b30
+Create Date: 2026-10-17 10:03:18.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9e6f01c27'
+down_revision: Union[str, Sequence[str], None] = '7c1e4f2a9b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only open sessions are indexed, so the index stays as small as the number of online players
+    op.execute("""
+        CREATE INDEX idx_sessions_open ON events.sessions USING btree (thorny_id)
+            WHERE disconnect_time IS NULL;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX events.idx_sessions_open;")
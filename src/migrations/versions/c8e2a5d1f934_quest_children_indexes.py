@@ -0,0 +1,29 @@
+"""quest-children-indexes
+
+Revision ID: c8e2a5d1f934
+Revises: 9a6c3e1f7b52
+Create Date: 2026-10-17 15:10:38.644120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2a5d1f934'
+down_revision: Union[str, Sequence[str], None] = '9a6c3e1f7b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Objectives and rewards are loaded for a whole page of quests at once
+    op.execute("CREATE INDEX idx_objective_quest_id ON quests_v3.objective USING btree (quest_id, order_index);")
+    op.execute("CREATE INDEX idx_reward_quest_id ON quests_v3.reward USING btree (quest_id);")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX quests_v3.idx_reward_quest_id;")
+    op.execute("DROP INDEX quests_v3.idx_objective_quest_id;")
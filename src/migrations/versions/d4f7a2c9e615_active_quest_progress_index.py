@@ -0,0 +1,30 @@
+"""active-quest-progress-index
+
+Revision ID: d4f7a2c9e615
+Revises: c8e2a5d1f934
+Create Date: 2026-10-17 15:42:07.318452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f7a2c9e615'
+down_revision: Union[str, Sequence[str], None] = 'c8e2a5d1f934'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every interaction batch looks up the active quests of its users when quest matching is enabled
+    op.execute("""
+        CREATE INDEX idx_quest_progress_active_thorny_id ON quests_v3.quest_progress USING btree (thorny_id)
+        WHERE status = 'active';
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX quests_v3.idx_quest_progress_active_thorny_id;")
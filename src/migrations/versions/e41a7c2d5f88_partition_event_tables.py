@@ -0,0 +1,256 @@
+"""partition-event-tables
+
+Revision ID: e41a7c2d5f88
+Revises: b3d9e6f01c27
+Create Date: 2026-10-17 11:02:17.530611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a7c2d5f88'
+down_revision: Union[str, Sequence[str], None] = 'b3d9e6f01c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# How many months past the current one get a partition straight away
+MONTHS_AHEAD = 3
+
+
+def _partition_from_first_row(table: str):
+    # One partition per month from the oldest row up to MONTHS_AHEAD months from now
+    op.execute(f"""
+        SELECT events.create_monthly_partitions(
+            'events.{table}'::regclass,
+            m.first_month,
+            (extract(year FROM age(m.this_month, m.first_month)) * 12
+                + extract(month FROM age(m.this_month, m.first_month)))::int + {MONTHS_AHEAD + 1}
+        )
+        FROM (
+            SELECT date_trunc('month', coalesce(min("time"), now()) AT TIME ZONE 'UTC')::date AS first_month,
+                   date_trunc('month', now() AT TIME ZONE 'UTC')::date AS this_month
+            FROM events.{table}_legacy
+        ) m;
+    """)
+
+
+def upgrade() -> None:
+    # Creates any missing monthly partitions of `parent`, starting at `from_month`.
+    # Rows that already landed in the default partition for that month are moved over first.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events.create_monthly_partitions(parent regclass, from_month date, months int)
+        RETURNS int
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            parent_schema text;
+            parent_name text;
+            partition_name text;
+            month_start timestamptz;
+            month_end timestamptz;
+            created int := 0;
+        BEGIN
+            SELECT n.nspname, c.relname INTO parent_schema, parent_name
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.oid = parent;
+
+            FOR i IN 0 .. months - 1 LOOP
+                month_start := (date_trunc('month', from_month::timestamp) + make_interval(months => i)) AT TIME ZONE 'UTC';
+                month_end := (date_trunc('month', from_month::timestamp) + make_interval(months => i + 1)) AT TIME ZONE 'UTC';
+                partition_name := parent_name || '_' || to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM');
+
+                CONTINUE WHEN to_regclass(format('%I.%I', parent_schema, partition_name)) IS NOT NULL;
+
+                EXECUTE format('CREATE TABLE %I.%I (LIKE %s INCLUDING DEFAULTS)',
+                               parent_schema, partition_name, parent);
+
+                EXECUTE format('WITH moved AS (DELETE FROM %I.%I WHERE "time" >= %L AND "time" < %L RETURNING *) '
+                               'INSERT INTO %I.%I SELECT * FROM moved',
+                               parent_schema, parent_name || '_default', month_start, month_end,
+                               parent_schema, partition_name);
+
+                EXECUTE format('ALTER TABLE %s ATTACH PARTITION %I.%I FOR VALUES FROM (%L) TO (%L)',
+                               parent, parent_schema, partition_name, month_start, month_end);
+
+                created := created + 1;
+            END LOOP;
+
+            RETURN created;
+        END;
+        $$;
+    """)
+
+    # Connections
+    op.execute("ALTER TABLE events.connections RENAME TO connections_legacy;")
+    op.execute("ALTER TABLE events.connections_legacy RENAME CONSTRAINT connection_pk TO connection_legacy_pk;")
+    op.execute("ALTER SEQUENCE events.connections_connection_id_seq OWNED BY NONE;")
+    op.execute("DROP INDEX events.idx_connections_ignored;")
+    op.execute("DROP INDEX events.idx_connections_thorny_id;")
+    op.execute("DROP INDEX events.idx_connections_time;")
+    op.execute("DROP INDEX events.idx_connections_type;")
+
+    op.execute("""
+        CREATE TABLE events.connections (
+            connection_id int8 DEFAULT nextval('events.connections_connection_id_seq'::regclass) NOT NULL,
+            "time" timestamptz DEFAULT now() NOT NULL,
+            "type" varchar NOT NULL,
+            thorny_id int8 NOT NULL,
+            ignored bool DEFAULT false NOT NULL,
+            CONSTRAINT connection_pk PRIMARY KEY (connection_id, "time")
+        ) PARTITION BY RANGE ("time");
+    """)
+    op.execute("ALTER SEQUENCE events.connections_connection_id_seq OWNED BY events.connections.connection_id;")
+    op.execute("CREATE TABLE events.connections_default PARTITION OF events.connections DEFAULT;")
+
+    _partition_from_first_row('connections')
+
+    op.execute("""
+        INSERT INTO events.connections(connection_id, "time", "type", thorny_id, ignored)
+        SELECT connection_id, "time", "type", thorny_id, ignored
+        FROM events.connections_legacy;
+    """)
+    op.execute("DROP TABLE events.connections_legacy;")
+
+    op.execute("CREATE INDEX idx_connections_ignored ON events.connections USING btree (ignored);")
+    op.execute("CREATE INDEX idx_connections_thorny_id ON events.connections USING btree (thorny_id);")
+    op.execute("CREATE INDEX idx_connections_time ON events.connections USING btree (\"time\");")
+    op.execute("CREATE INDEX idx_connections_type ON events.connections USING btree (type);")
+
+    op.execute("""
+        ALTER TABLE events.connections
+        ADD CONSTRAINT connections_user_fk
+        FOREIGN KEY (thorny_id) REFERENCES users."user"(thorny_id);
+    """)
+
+    # Interactions
+    op.execute("ALTER TABLE events.interactions RENAME TO interactions_legacy;")
+    op.execute("ALTER TABLE events.interactions_legacy RENAME CONSTRAINT interaction_pk TO interaction_legacy_pk;")
+    op.execute("ALTER SEQUENCE events.interactions_interaction_id_seq OWNED BY NONE;")
+    op.execute("DROP INDEX events.interactions_coordinates_gin_idx;")
+    op.execute("DROP INDEX events.interactions_reference_idx;")
+    op.execute("DROP INDEX events.interactions_thorny_id_idx;")
+    op.execute("DROP INDEX events.interactions_time_idx;")
+
+    op.execute("""
+        CREATE TABLE events.interactions (
+            interaction_id int8 DEFAULT nextval('events.interactions_interaction_id_seq'::regclass) NOT NULL,
+            thorny_id int8 NOT NULL,
+            "type" varchar NOT NULL,
+            "time" timestamptz DEFAULT now() NOT NULL,
+            dimension varchar DEFAULT 'minecraft:overworld'::character varying NOT NULL,
+            reference varchar NOT NULL,
+            mainhand varchar NULL,
+            coordinates _int2 NULL,
+            CONSTRAINT interaction_pk PRIMARY KEY (interaction_id, "time")
+        ) PARTITION BY RANGE ("time");
+    """)
+    op.execute("ALTER SEQUENCE events.interactions_interaction_id_seq OWNED BY events.interactions.interaction_id;")
+    op.execute("CREATE TABLE events.interactions_default PARTITION OF events.interactions DEFAULT;")
+
+    _partition_from_first_row('interactions')
+
+    op.execute("""
+        INSERT INTO events.interactions(interaction_id, thorny_id, "type", "time", dimension, reference, mainhand, coordinates)
+        SELECT interaction_id, thorny_id, "type", "time", dimension, reference, mainhand, coordinates
+        FROM events.interactions_legacy;
+    """)
+    op.execute("DROP TABLE events.interactions_legacy;")
+
+    op.execute("CREATE INDEX interactions_coordinates_gin_idx ON events.interactions USING gin (coordinates);")
+    op.execute("CREATE INDEX interactions_reference_idx ON events.interactions USING btree (reference);")
+    op.execute("CREATE INDEX interactions_thorny_id_idx ON events.interactions USING btree (thorny_id, type, reference);")
+    op.execute("CREATE INDEX interactions_time_idx ON events.interactions USING btree (\"time\", reference, coordinates);")
+
+    op.execute("""
+        ALTER TABLE events.interactions
+        ADD CONSTRAINT interactions_user_fk
+        FOREIGN KEY (thorny_id) REFERENCES users."user"(thorny_id);
+    """)
+
+
+def downgrade() -> None:
+    # Interactions
+    op.execute("ALTER TABLE events.interactions RENAME TO interactions_partitioned;")
+    op.execute("ALTER TABLE events.interactions_partitioned RENAME CONSTRAINT interaction_pk TO interaction_partitioned_pk;")
+    op.execute("ALTER SEQUENCE events.interactions_interaction_id_seq OWNED BY NONE;")
+    op.execute("DROP INDEX events.interactions_coordinates_gin_idx;")
+    op.execute("DROP INDEX events.interactions_reference_idx;")
+    op.execute("DROP INDEX events.interactions_thorny_id_idx;")
+    op.execute("DROP INDEX events.interactions_time_idx;")
+
+    op.execute("""
+        CREATE TABLE events.interactions (
+            interaction_id int8 DEFAULT nextval('events.interactions_interaction_id_seq'::regclass) NOT NULL,
+            thorny_id int8 NOT NULL,
+            "type" varchar NOT NULL,
+            "time" timestamptz DEFAULT now() NOT NULL,
+            dimension varchar DEFAULT 'minecraft:overworld'::character varying NOT NULL,
+            reference varchar NOT NULL,
+            mainhand varchar NULL,
+            coordinates _int2 NULL,
+            CONSTRAINT interaction_pk PRIMARY KEY (interaction_id)
+        );
+    """)
+    op.execute("ALTER SEQUENCE events.interactions_interaction_id_seq OWNED BY events.interactions.interaction_id;")
+    op.execute("""
+        INSERT INTO events.interactions(interaction_id, thorny_id, "type", "time", dimension, reference, mainhand, coordinates)
+        SELECT interaction_id, thorny_id, "type", "time", dimension, reference, mainhand, coordinates
+        FROM events.interactions_partitioned;
+    """)
+    op.execute("DROP TABLE events.interactions_partitioned;")
+
+    op.execute("CREATE INDEX interactions_coordinates_gin_idx ON events.interactions USING gin (coordinates);")
+    op.execute("CREATE INDEX interactions_reference_idx ON events.interactions USING btree (reference);")
+    op.execute("CREATE INDEX interactions_thorny_id_idx ON events.interactions USING btree (thorny_id, type, reference);")
+    op.execute("CREATE INDEX interactions_time_idx ON events.interactions USING btree (\"time\", reference, coordinates);")
+
+    op.execute("""
+        ALTER TABLE events.interactions
+        ADD CONSTRAINT interactions_user_fk
+        FOREIGN KEY (thorny_id) REFERENCES users."user"(thorny_id);
+    """)
+
+    # Connections
+    op.execute("ALTER TABLE events.connections RENAME TO connections_partitioned;")
+    op.execute("ALTER TABLE events.connections_partitioned RENAME CONSTRAINT connection_pk TO connection_partitioned_pk;")
+    op.execute("ALTER SEQUENCE events.connections_connection_id_seq OWNED BY NONE;")
+    op.execute("DROP INDEX events.idx_connections_ignored;")
+    op.execute("DROP INDEX events.idx_connections_thorny_id;")
+    op.execute("DROP INDEX events.idx_connections_time;")
+    op.execute("DROP INDEX events.idx_connections_type;")
+
+    op.execute("""
+        CREATE TABLE events.connections (
+            connection_id int8 DEFAULT nextval('events.connections_connection_id_seq'::regclass) NOT NULL,
+            "time" timestamptz DEFAULT now() NOT NULL,
+            "type" varchar NOT NULL,
+            thorny_id int8 NOT NULL,
+            ignored bool DEFAULT false NOT NULL,
+            CONSTRAINT connection_pk PRIMARY KEY (connection_id)
+        );
+    """)
+    op.execute("ALTER SEQUENCE events.connections_connection_id_seq OWNED BY events.connections.connection_id;")
+    op.execute("""
+        INSERT INTO events.connections(connection_id, "time", "type", thorny_id, ignored)
+        SELECT connection_id, "time", "type", thorny_id, ignored
+        FROM events.connections_partitioned;
+    """)
+    op.execute("DROP TABLE events.connections_partitioned;")
+
+    op.execute("CREATE INDEX idx_connections_ignored ON events.connections USING btree (ignored);")
+    op.execute("CREATE INDEX idx_connections_thorny_id ON events.connections USING btree (thorny_id);")
+    op.execute("CREATE INDEX idx_connections_time ON events.connections USING btree (\"time\");")
+    op.execute("CREATE INDEX idx_connections_type ON events.connections USING btree (type);")
+
+    op.execute("""
+        ALTER TABLE events.connections
+        ADD CONSTRAINT connections_user_fk
+        FOREIGN KEY (thorny_id) REFERENCES users."user"(thorny_id);
+    """)
+
+    op.execute("DROP FUNCTION events.create_monthly_partitions(regclass, date, int);")
@@ -0,0 +1,149 @@
+"""playtime-daily
+
+Revision ID: f2c7a9e4b381
+Revises: 6b9d4e2f8c13
+Create Date: 2026-10-17 17:21:45.076239
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c7a9e4b381'
+down_revision: Union[str, Sequence[str], None] = '6b9d4e2f8c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Playtime per user per UTC day, added to when a session closes.
+    # A session crossing midnight is split between the days it was played on,
+    # and counted in "sessions" on the day it started.
+    op.execute("""
+        CREATE TABLE events.playtime_daily (
+            guild_id int8 NOT NULL,
+            thorny_id int8 NOT NULL,
+            "day" date NOT NULL,
+            seconds float8 DEFAULT 0 NOT NULL,
+            sessions int4 DEFAULT 0 NOT NULL,
+            CONSTRAINT playtime_daily_pk PRIMARY KEY (guild_id, "day", thorny_id)
+        );
+    """)
+
+    op.execute("CREATE INDEX idx_playtime_daily_thorny_id ON events.playtime_daily USING btree (thorny_id, \"day\" DESC);")
+
+    # Adds (sign = 1) or removes (sign = -1) one closed session's playtime
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events.count_session_playtime(s events.sessions, sign int4)
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF s.disconnect_time IS NULL OR s.disconnect_time <= s.connect_time THEN
+                RETURN;
+            END IF;
+
+            INSERT INTO events.playtime_daily AS p (guild_id, thorny_id, "day", seconds, sessions)
+            SELECT u.guild_id,
+                   s.thorny_id,
+                   d.day::date,
+                   sign * EXTRACT(EPOCH FROM (
+                       LEAST(s.disconnect_time, (d.day + interval '1 day') AT TIME ZONE 'UTC')
+                       - GREATEST(s.connect_time, d.day AT TIME ZONE 'UTC')
+                   )),
+                   sign * (d.day::date = (s.connect_time AT TIME ZONE 'UTC')::date)::int4
+            FROM users."user" u,
+                 generate_series(
+                     date_trunc('day', s.connect_time AT TIME ZONE 'UTC'),
+                     date_trunc('day', s.disconnect_time AT TIME ZONE 'UTC'),
+                     interval '1 day'
+                 ) AS d(day)
+            WHERE u.thorny_id = s.thorny_id
+            ON CONFLICT (guild_id, "day", thorny_id) DO UPDATE SET
+                seconds = p.seconds + EXCLUDED.seconds,
+                sessions = p.sessions + EXCLUDED.sessions;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events.session_playtime()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM events.count_session_playtime(OLD, -1);
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM events.count_session_playtime(NEW, 1);
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$;
+    """)
+
+    op.execute("""
+        CREATE TRIGGER sessions_playtime_insert_delete
+        AFTER INSERT OR DELETE ON events.sessions
+        FOR EACH ROW EXECUTE FUNCTION events.session_playtime();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER sessions_playtime_update
+        AFTER UPDATE ON events.sessions
+        FOR EACH ROW
+        WHEN ((OLD.thorny_id, OLD.connect_time, OLD.disconnect_time)
+              IS DISTINCT FROM (NEW.thorny_id, NEW.connect_time, NEW.disconnect_time))
+        EXECUTE FUNCTION events.session_playtime();
+    """)
+
+    # Recomputes the rollup from every closed session, for the backfill and for repairing drift.
+    # The SHARE lock holds off sessions being opened or closed until the rebuild commits.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events.rebuild_playtime_daily()
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            LOCK TABLE events.sessions IN SHARE MODE;
+
+            TRUNCATE events.playtime_daily;
+
+            INSERT INTO events.playtime_daily(guild_id, thorny_id, "day", seconds, sessions)
+            SELECT u.guild_id,
+                   s.thorny_id,
+                   d.day::date,
+                   sum(EXTRACT(EPOCH FROM (
+                       LEAST(s.disconnect_time, (d.day + interval '1 day') AT TIME ZONE 'UTC')
+                       - GREATEST(s.connect_time, d.day AT TIME ZONE 'UTC')
+                   ))),
+                   count(*) FILTER (WHERE d.day::date = (s.connect_time AT TIME ZONE 'UTC')::date)
+            FROM events.sessions s
+            JOIN users."user" u ON u.thorny_id = s.thorny_id
+            CROSS JOIN LATERAL generate_series(
+                date_trunc('day', s.connect_time AT TIME ZONE 'UTC'),
+                date_trunc('day', s.disconnect_time AT TIME ZONE 'UTC'),
+                interval '1 day'
+            ) AS d(day)
+            WHERE s.disconnect_time > s.connect_time
+            GROUP BY u.guild_id, s.thorny_id, d.day;
+        END;
+        $$;
+    """)
+
+    op.execute("SELECT events.rebuild_playtime_daily();")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER sessions_playtime_update ON events.sessions;")
+    op.execute("DROP TRIGGER sessions_playtime_insert_delete ON events.sessions;")
+    op.execute("DROP FUNCTION events.rebuild_playtime_daily();")
+    op.execute("DROP FUNCTION events.session_playtime();")
+    op.execute("DROP FUNCTION events.count_session_playtime(events.sessions, int4);")
+    op.execute("DROP TABLE events.playtime_daily;")
@@ -1,9 +1,9 @@
 from .channels import ChannelOut
 from .features import FeatureOut
 from .guild import GuildIn, GuildUpdate, GuildOut
-from .leaderboards import LeaderboardModel
+from .leaderboards import LeaderboardModel, LeaderboardQuery, LeaderboardRank
 from .playtime import GuildPlaytimeAnalysis
 from .online_members import OnlineMember
-from .connection import ConnectionIn, ConnectionOut
-from .interaction import InteractionIn, InteractionOut
+from .connection import ConnectionBatch, ConnectionBatchIn, ConnectionIn, ConnectionOut
+from .interaction import InteractionBatchOut, InteractionIn, InteractionOut
 from .session import SessionOut
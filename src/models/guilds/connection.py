@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import Field, BaseModel
 from typing_extensions import Annotated
@@ -36,5 +36,13 @@ class ConnectionIn(BaseModel):
     thorny_id: ThornyID
     type: ConnectionType
 
+class ConnectionBatchIn(ConnectionIn):
+    time: Optional[ConnectionTime] = None
+
+ConnectionBatch = Annotated[list[ConnectionBatchIn], Field(
+    description="Connection events in the order they happened. Each user's events must be in time order",
+    max_length=1000
+)]
+
 class ConnectionOut(ConnectionDB):
     pass
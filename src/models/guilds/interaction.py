@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal, Optional
+from typing import Literal, NamedTuple, Optional
 
 from pydantic import Field, BaseModel
 from typing_extensions import Annotated
@@ -63,11 +63,33 @@ class InteractionIn(BaseModel):
 class InteractionOut(InteractionDB):
     pass
 
+class InteractionRecord(NamedTuple):
+    """A validated interaction, in `events.interactions` column order, ready to be copied in bulk"""
+    thorny_id: int
+    type: str
+    coordinates: tuple[int, int, int]
+    reference: str
+    mainhand: Optional[str]
+    dimension: str
+    time: datetime
+
+class InteractionBatchOut(BaseModel):
+    accepted: int = Field(description="The number of interactions accepted", examples=[250])
+    buffered: bool = Field(description="Whether the interactions were buffered to be written shortly, "
+                                       "rather than written before responding",
+                           examples=[False])
+
 class InteractionQuery(BaseModel):
     coordinates: Optional[list[int]] = Field(description="The coordinates where it happened",
                                              examples=[[-432, 74, 85]], default=None)
-    coordinates_end: Optional[list[int]] = Field(description="Optional End coordinates",
+    coordinates_end: Optional[list[int]] = Field(description="Optional End coordinates. "
+                                                             "Returns everything in the box between both corners",
                                                  examples=[[-432, 74, 85]], default=None)
+    radius: Optional[int] = Field(description="Optional radius in blocks. "
+                                              "Returns everything within this distance of `coordinates`",
+                                  examples=[16], default=None, ge=0, le=30000)
+    chunk: Optional[list[int]] = Field(description="The chunk X and Z where it happened, at any height",
+                                       examples=[[-27, 5]], default=None)
     thorny_ids: Optional[list[int]] = Field(description="The thorny IDs to filter by",
                                             examples=[1, 2021, 543], default=None)
     interaction_types: Optional[list[InteractionType]] = Field(description="The interaction types to filter by",
@@ -80,6 +102,8 @@ class InteractionQuery(BaseModel):
                                            examples=["2025-01-01 04:00:00+00:00"], default=None)
     time_end: Optional[datetime] = Field(description="The end time of the interaction events",
                                          examples=["2025-01-01 04:00:00+00:00"], default=None)
+    cursor: Optional[str] = Field(description="The next_cursor returned with the previous page. When given, page is ignored",
+                                  examples=["WyJpbnRlcmFjdGlvbnMiLDM0MjJd"], default=None)
     page: Optional[int] = Field(description="The page number of the results. Defaults to 1",
                                 examples=[1], default=1)
     page_size: Optional[int] = Field(description="The number of results per page. Defaults to 100",
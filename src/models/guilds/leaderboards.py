@@ -1,12 +1,24 @@
-import json
-from datetime import datetime, date
+from datetime import date
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
-from src.dependencies.database import Database
+Board = Literal["playtime", "currency", "levels", "quests"]
+
+# The period of boards that are not split by month
+ALL_TIME = "all"
+
+# Boards ranked per month, the rest are all-time
+MONTHLY_BOARDS = {"playtime"}
+
+
+def month_period(month: date) -> str:
+    """The snapshot period of the month that `month` falls in"""
+    return month.strftime("%Y-%m")
 
 
 class LeaderboardEntry(BaseModel):
+    rank: int = Field(description="The position on the leaderboard, starting at 1")
     value: float | int = Field(description="The value of the leaderboard, if it's playtime then it is seconds, etc.")
     thorny_id: int
     discord_id: int
@@ -14,121 +26,31 @@ class LeaderboardEntry(BaseModel):
 
 class LeaderboardModel(BaseModel):
     leaderboard: list[LeaderboardEntry]
-
-    @classmethod
-    async def fetch_playtime(cls, db: Database, month_start: date, guild_id: int) -> "LeaderboardModel":
-        if month_start.month % 12 + 1 == 1:
-            year = month_start.year + 1
-        else:
-            year = month_start.year
-
-        month_end = datetime(year=year, month=month_start.month % 12 + 1, day=1)
-        data = await db.fetchrow("""
-                    with t as (
-                    select extract(epoch from sum(playtime)) as playtime, sv.thorny_id, u.user_id from events.sessions_view sv 
-                    inner join users."user" u 
-                    on u.thorny_id = sv.thorny_id 
-                    where sv.connect_time between $1 and $2
-                    and u.active = true
-                    and u.guild_id = $3
-                    group by sv.thorny_id, u.user_id
-                    order by playtime desc
-                    )
-
-                    select coalesce(
-                        (
-                        select json_agg(json_build_object('value', t.playtime,
-                                                          'thorny_id', t.thorny_id,
-                                                          'discord_id', t.user_id))
-                        from t
-                        ),
-                        '[]'::json
-                    ) as leaderboard
-                    """, month_start, month_end, guild_id)
-
-        return cls(**{'leaderboard': json.loads(data['leaderboard'])})
-
-    @classmethod
-    async def fetch_currency(cls, db: Database, guild_id: int) -> "LeaderboardModel":
-        data = await db.fetchrow("""
-                                        with t as (
-                                            select thorny_id, user_id, balance
-                                            from users."user"
-                                            where guild_id = $1
-                                            and active = true
-                                            order by balance desc
-                                        )
-                                        
-                                        select coalesce(
-                                            (
-                                            select
-                                            json_agg(json_build_object('thorny_id', t.thorny_id,
-                                                                       'discord_id', t.user_id,
-                                                                       'value', t.balance))
-                                            from t
-                                            ),
-                                            '[]'::json
-                                        ) as leaderboard
-                                      """,
-                                      guild_id)
-
-        return cls(**{'leaderboard': json.loads(data['leaderboard'])})
-
-    @classmethod
-    async def fetch_levels(cls, db: Database, guild_id: int) -> "LeaderboardModel":
-        data = await db.fetchrow("""
-                                        with t as (
-                                            select thorny_id, user_id, level
-                                            from users."user"
-                                            where guild_id = $1
-                                            and active = true
-                                            order by level desc
-                                        )
-
-                                        select coalesce(
-                                            (
-                                            select
-                                            json_agg(json_build_object('thorny_id', t.thorny_id,
-                                                                       'discord_id', t.user_id,
-                                                                       'value', t.level))
-                                            from t
-                                            ),
-                                            '[]'::json
-                                        ) as leaderboard
-                                      """,
-                                      guild_id)
-
-        return cls(**{'leaderboard': json.loads(data['leaderboard'])})
-
-    @classmethod
-    async def fetch_quests(cls, db: Database, guild_id: int) -> "LeaderboardModel":
-        data = await db.fetchrow("""
-                                        with t as (
-                                            select u.thorny_id, u.user_id, count(q.status) as quests_count
-                                            from users."user" u
-                                            inner join users.quests_v3 q on q.thorny_id = u.thorny_id
-                                            where u.guild_id = $1
-                                            and q.status = 'completed'
-                                            and u.active = true
-                                            group by u.thorny_id
-                                            order by quests_count desc
-                                        )
-
-                                        select coalesce(
-                                            (
-                                            select
-                                            json_agg(json_build_object('thorny_id', t.thorny_id,
-                                                                       'discord_id', t.user_id,
-                                                                       'value', t.quests_count))
-                                            from t
-                                            ),
-                                            '[]'::json
-                                        ) as leaderboard
-                                      """,
-                                      guild_id)
-
-        return cls(**{'leaderboard': json.loads(data['leaderboard'])})
+    total: int = Field(description="The number of users on the whole leaderboard")
 
     @classmethod
     def doc_schema(cls):
-        return cls.model_json_schema(ref_template="#/components/schemas/{model}")
\ No newline at end of file
+        return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+class LeaderboardRank(BaseModel):
+    entry: LeaderboardEntry = Field(description="The user's own entry")
+    neighbours: list[LeaderboardEntry] = Field(
+        description="The entries around the user, in order, including the user's own"
+    )
+    total: int = Field(description="The number of users on the whole leaderboard")
+
+
+class LeaderboardQuery(BaseModel):
+    limit: Optional[int] = Field(
+        description="The most entries to return. Default: the whole leaderboard",
+        examples=[10],
+        default=None,
+        ge=1
+    )
+    offset: int = Field(
+        description="The number of entries to skip from the top. Default: 0",
+        examples=[10],
+        default=0,
+        ge=0
+    )
@@ -67,6 +67,11 @@ class SessionQuery(BaseModel):
         examples=["2025-01-01 05:00:00+00:00"],
         default=None
     )
+    cursor: Optional[str] = Field(
+        description="The next_cursor returned with the previous page. When given, page is ignored",
+        examples=["WyJzZXNzaW9ucyIsIjIwMjYtMTAtMTdUMTg6MDA6MDArMDA6MDAiLDM0MjJd"],
+        default=None
+    )
     page: Optional[int] = Field(
         description="The page number of the results. Defaults to 1",
         examples=[1],
@@ -2,10 +2,12 @@ import json
 from datetime import datetime
 from typing import Annotated, Literal, Optional
 
-from pydantic import Field, model_validator, BaseModel
+from pydantic import Field, model_validator, BaseModel, UUID4
 
+from src.models.quests.objective_customization.customization import Customizations
 from src.models.quests.objective_customization.progress import CustomizationProgress
 from src.models.quests.objective_targets.progress import TargetProgress
+from src.models.quests.objective_targets.target import Targets
 
 
 ProgressID = Annotated[int, Field(
@@ -34,6 +36,18 @@ TargetProgressList = Annotated[list[TargetProgress], Field(
 CustomizationProgressDict = Annotated[CustomizationProgress, Field(
     description="Specific customization info to track"
 )]
+TargetUUID = Annotated[UUID4, Field(
+    description="The UUID of the target to update",
+    examples=['3f2b8c1e-5d4a-4b6f-9e7d-2a1c0b9f8e7d']
+)]
+Increment = Annotated[int, Field(
+    description="The amount to add to the target's count. Can be negative.",
+    examples=[1]
+)]
+Count = Annotated[int, Field(
+    description="The count to set the target to. Unlike an increment, this is safe to retry.",
+    examples=[50]
+)]
 
 
 class ObjectiveProgressDB(BaseModel):
@@ -73,3 +87,37 @@ class ObjectiveProgressUpdate(BaseModel):
     status: Optional[ProgressStatus] = None
     target_progress: Optional[TargetProgressList] = None
     customization_progress: Optional[CustomizationProgressDict] = None
+
+
+class TargetProgressDelta(BaseModel):
+    target_uuid: TargetUUID
+    increment: Optional[Increment] = None
+    count: Optional[Count] = None
+
+    @model_validator(mode='after')
+    def check_delta(self) -> "TargetProgressDelta":
+        if (self.increment is None) == (self.count is None):
+            raise ValueError("Exactly one of increment or count must be given")
+
+        return self
+
+
+class ObjectiveProgressMatch(ObjectiveProgressDB):
+    """An objective's progress alongside its definition, for matching interactions against"""
+    thorny_id: int
+    order_index: int
+    logic: Literal["and", "or", "sequential"]
+    target_count: Optional[int]
+    targets: list[Targets]
+    customizations: Customizations
+
+    @model_validator(mode='before')
+    @classmethod
+    def pre_process_definition_json(cls, data):
+        if isinstance(data.get('targets'), str):
+            data['targets'] = json.loads(data['targets'])
+
+        if isinstance(data.get('customizations'), str):
+            data['customizations'] = json.loads(data['customizations'])
+
+        return data
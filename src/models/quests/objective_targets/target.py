@@ -46,4 +46,12 @@ class ScriptEventTargetModel(TargetBaseModel):
 Targets = Annotated[
     Union[MineTargetModel, KillTargetModel, ScriptEventTargetModel],
     Field(discriminator="target_type")
-]
\ No newline at end of file
+]
+
+
+# The field on each target type holding what an interaction's `reference` must equal to count towards it
+TARGET_REFERENCE_MAP = {
+    "mine": "block",
+    "kill": "entity",
+    "scriptevent": "script_id"
+}
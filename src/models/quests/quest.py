@@ -121,6 +121,11 @@ class QuestQuery(BaseModel):
         examples=[True],
         default=None,
     )
+    cursor: Optional[str] = Field(
+        description="The next_cursor returned with the previous page. When given, page is ignored",
+        examples=["WyJxdWVzdHMiLDQyXQ"],
+        default=None
+    )
     page: Optional[int] = Field(
         description="The page to return. Default: 1",
         examples=[1],
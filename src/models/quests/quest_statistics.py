@@ -1,7 +1,7 @@
 from datetime import date as Date
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 
-from pydantic import Field, BaseModel
+from pydantic import Field, model_validator, BaseModel
 
 QuestID = Annotated[int, Field(
     description="The Quest ID",
@@ -26,7 +26,8 @@ class ObjectiveStatistics(BaseModel):
         default=None
     )
     median_time_seconds: Optional[int] = Field(
-        description="Median time in seconds spent on this objective, across completions",
+        description="Median time in seconds spent on this objective, across completions. "
+                    "Estimated from a log-scale histogram, to within about 9%",
         default=None
     )
 
@@ -37,6 +38,11 @@ class QuestCompletionBucket(BaseModel):
     count: int = Field(description="Number of completions that fall within this bucket", examples=[14])
 
 
+class CompletionPercentile(BaseModel):
+    percentile: float = Field(description="The percentile, between 0 and 1", examples=[0.9])
+    seconds: int = Field(description="The estimated completion time at this percentile, in seconds", examples=[5400])
+
+
 class DailyActivityEntry(BaseModel):
     date: Date = Field(description="The calendar date", examples=["2026-01-01"])
     accepts: int = Field(description="Number of quest accepts on this date")
@@ -71,7 +77,8 @@ class QuestStatisticsOut(BaseModel):
         default=None
     )
     median_completion_time_seconds: Optional[int] = Field(
-        description="Median time in seconds to complete the quest",
+        description="Median time in seconds to complete the quest. "
+                    "Estimated from a log-scale histogram, to within about 9%",
         default=None
     )
     fastest_completion_seconds: Optional[int] = Field(
@@ -94,6 +101,38 @@ class QuestStatisticsOut(BaseModel):
     completion_time_histogram: list[QuestCompletionBucket] = Field(
         description="Bucketed completion times for histogram display"
     )
+    completion_time_percentiles: list[CompletionPercentile] = Field(
+        description="Estimated completion times at the requested percentiles, to within about 9%"
+    )
     daily_activity: list[DailyActivityEntry] = Field(
         description="Daily accepts, completions, and failures for time-series line charts"
     )
+
+
+class QuestStatisticsQuery(BaseModel):
+    histogram_buckets: int = Field(
+        description="The number of buckets in the completion time histogram. Default: 10",
+        examples=[20],
+        default=10,
+        ge=1,
+        le=100
+    )
+    histogram_scale: Literal["linear", "log"] = Field(
+        description="Whether histogram buckets are evenly sized, or each a constant ratio wider than the last. "
+                    "Log buckets suit completion times spread across minutes and days. Default: linear",
+        examples=["log"],
+        default="linear"
+    )
+    percentiles: list[float] = Field(
+        description="The completion time percentiles to estimate, between 0 and 1. Default: 0.5, 0.9 and 0.99",
+        examples=[[0.5, 0.9]],
+        default=[0.5, 0.9, 0.99],
+        max_length=20
+    )
+
+    @model_validator(mode='after')
+    def check_percentiles(self) -> "QuestStatisticsQuery":
+        if any(p < 0 or p > 1 for p in self.percentiles):
+            raise ValueError("Percentiles must be between 0 and 1")
+
+        return self
@@ -1,11 +1,11 @@
-import asyncio
-
 from pydantic import Field
 from fastapi import HTTPException
 
 from src.dependencies.database import Database
 from src.utils.base import LegacyBaseModel, LegacyBaseList
 
+SUMMARY_TYPES = ('mine', 'place', 'kill', 'die', 'use')
+
 
 class InteractionStatistic(LegacyBaseModel):
     reference: str = Field(description="The interaction reference",
@@ -23,10 +23,9 @@ class InteractionStatisticsList(LegacyBaseList[InteractionStatistic]):
             raise HTTPException(status_code=400, detail="Missing required parameters")
 
         data = await db.fetch("""
-                                    select "type", reference, count(reference) as "count" from events.interactions i 
-                                    where i.thorny_id = $1
-                                    and i.type = $2
-                                    group by type, reference
+                                    select "type", reference, "count" from events.interaction_counts c
+                                    where c.thorny_id = $1
+                                    and c.type = $2
                                     order by "count" desc
                                    """, thorny_id, interaction_type)
 
@@ -54,12 +53,12 @@ class InteractionTotals(LegacyBaseModel):
 
         data = await db.fetchrow("""
                                         SELECT
-                                            COALESCE(SUM(CASE WHEN type = 'mine' THEN 1 ELSE 0 END), 0) as mine,
-                                            COALESCE(SUM(CASE WHEN type = 'place' THEN 1 ELSE 0 END), 0) as place,
-                                            COALESCE(SUM(CASE WHEN type = 'kill' THEN 1 ELSE 0 END), 0) as kill,
-                                            COALESCE(SUM(CASE WHEN type = 'die' THEN 1 ELSE 0 END), 0) as die,
-                                            COALESCE(SUM(CASE WHEN type = 'use' THEN 1 ELSE 0 END), 0) as use
-                                        FROM events.interactions
+                                            COALESCE(SUM("count") FILTER (WHERE type = 'mine'), 0) as mine,
+                                            COALESCE(SUM("count") FILTER (WHERE type = 'place'), 0) as place,
+                                            COALESCE(SUM("count") FILTER (WHERE type = 'kill'), 0) as kill,
+                                            COALESCE(SUM("count") FILTER (WHERE type = 'die'), 0) as die,
+                                            COALESCE(SUM("count") FILTER (WHERE type = 'use'), 0) as use
+                                        FROM events.interaction_counts
                                         WHERE thorny_id = $1;
                                         """, thorny_id)
         if data:
@@ -82,16 +81,26 @@ class InteractionSummary(LegacyBaseModel):
         if not thorny_id:
             raise HTTPException(status_code=400, detail="Missing required parameters")
 
-        totals, mine, place, kills, deaths, uses = await asyncio.gather(
-            InteractionTotals.fetch(db, thorny_id),
-            InteractionStatisticsList.fetch(db, thorny_id, 'mine'),
-            InteractionStatisticsList.fetch(db, thorny_id, 'place'),
-            InteractionStatisticsList.fetch(db, thorny_id, 'kill'),
-            InteractionStatisticsList.fetch(db, thorny_id, 'die'),
-            InteractionStatisticsList.fetch(db, thorny_id, 'use')
-        )
-
-        if totals:
-            return cls(blocks_mined=mine, blocks_placed=place, kills=kills, deaths=deaths, uses=uses, totals=totals)
-        else:
+        # One read of the user's counters, split per type here instead of one query per type
+        data = await db.fetch("""
+                                    select "type", reference, "count" from events.interaction_counts c
+                                    where c.thorny_id = $1
+                                    and c.type = ANY($2::varchar[])
+                                    order by "count" desc
+                                   """, thorny_id, list(SUMMARY_TYPES))
+
+        stats: dict[str, list[InteractionStatistic]] = {t: [] for t in SUMMARY_TYPES}
+        for stat in data:
+            stats[stat['type']].append(InteractionStatistic(**stat))
+
+        if not all(stats.values()):
             raise HTTPException(status_code=404, detail="No interactions found")
+
+        totals = InteractionTotals(**{t: sum(s.count for s in stats[t]) for t in SUMMARY_TYPES})
+
+        return cls(blocks_mined=InteractionStatisticsList(root=stats['mine']),
+                   blocks_placed=InteractionStatisticsList(root=stats['place']),
+                   kills=InteractionStatisticsList(root=stats['kill']),
+                   deaths=InteractionStatisticsList(root=stats['die']),
+                   uses=InteractionStatisticsList(root=stats['use']),
+                   totals=totals)
@@ -20,18 +20,11 @@ class DailyPlaytimeList(LegacyBaseList[DailyPlaytime]):
         if not thorny_id:
             raise HTTPException(status_code=400, detail="Missing required parameters")
 
-        data = await db.fetch("""
-                                    SELECT t.day, SUM(t.playtime) AS playtime
-                                    FROM (
-                                        SELECT COALESCE(EXTRACT(EPOCH FROM SUM(playtime)), 0) AS playtime, 
-                                               DATE(connect_time) AS day
-                                        FROM events.sessions_view sv 
-                                        INNER JOIN users.user ON sv.thorny_id = users.user.thorny_id 
-                                        WHERE sv.thorny_id = $1
-                                        GROUP BY day
-                                    ) AS t
-                                    GROUP BY t.day
-                                    ORDER BY t.day DESC
+        data = await db.replica.fetch("""
+                                    SELECT day, seconds AS playtime
+                                    FROM events.playtime_daily
+                                    WHERE thorny_id = $1
+                                    ORDER BY day DESC
                                     LIMIT 7
                                    """, thorny_id)
 
@@ -58,18 +51,12 @@ class MonthlyPlaytimeList(LegacyBaseList[MonthlyPlaytime]):
         if not thorny_id:
             raise HTTPException(status_code=400, detail="Missing required parameters")
 
-        data = await db.fetch("""
-                                    SELECT t.month AS month, SUM(t.playtime) AS playtime
-                                    FROM (
-                                        SELECT COALESCE(EXTRACT(EPOCH FROM SUM(playtime)), 0) AS playtime,
-                                               date_trunc('month', connect_time)::date as month
-                                        FROM events.sessions_view sv 
-                                        INNER JOIN users.user ON sv.thorny_id = users.user.thorny_id 
-                                        WHERE sv.thorny_id = $1
-                                        GROUP BY month
-                                    ) AS t
-                                    GROUP BY t.month
-                                    ORDER BY t.month DESC
+        data = await db.replica.fetch("""
+                                    SELECT date_trunc('month', day)::date AS month, SUM(seconds) AS playtime
+                                    FROM events.playtime_daily
+                                    WHERE thorny_id = $1
+                                    GROUP BY month
+                                    ORDER BY month DESC
                                     LIMIT 12
                                    """, thorny_id)
 
@@ -98,16 +85,15 @@ class PlaytimeSummary(LegacyBaseModel):
         if not thorny_id:
             raise HTTPException(status_code=400, detail="Missing required parameters")
 
-        data = await db.fetchrow("""
+        data = await db.replica.fetchrow("""
                                       WITH total_playtime AS (
-                                        SELECT SUM (EXTRACT (EPOCH FROM playtime)) AS total_playtime
-                                        FROM events.sessions_view sv
+                                        SELECT SUM(seconds) AS total_playtime
+                                        FROM events.playtime_daily
                                         WHERE thorny_id = $1
-                                        GROUP BY thorny_id
                                       ),
                                       session AS (
                                         SELECT connect_time as session
-                                        FROM events.sessions_view sv
+                                        FROM events.sessions sv
                                         WHERE thorny_id = $1
                                         AND disconnect_time IS NULL
                                         GROUP BY thorny_id, connect_time
@@ -154,6 +154,11 @@ class PageQuery(BaseModel):
         examples=["asc"],
         default=None
     )
+    cursor: Optional[str] = Field(
+        description="The next_cursor returned with the previous page. When given, page is ignored",
+        examples=["WyJ3aWtpOk5vbmU6YXNjIiw0Ml0"],
+        default=None
+    )
     page: Optional[int] = Field(
         description="The page number to return",
         examples=[1],
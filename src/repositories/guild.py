@@ -1,16 +1,29 @@
 import json
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Optional
 
 import asyncpg
+from asyncpg.pool import PoolConnectionProxy
+
 from src.dependencies.database import Database
 from src.errors import AlreadyExists, NotFound
 from src.models.guilds import GuildPlaytimeAnalysis
 from src.models.guilds.channels import ChannelDB
-from src.models.guilds.connection import ConnectionDB, ConnectionIn
+from src.models.guilds.connection import ConnectionBatchIn, ConnectionDB, ConnectionIn
 from src.models.guilds.features import FeatureDB
 from src.models.guilds.guild import GuildDB, GuildIn, GuildUpdate
-from src.models.guilds.interaction import InteractionDB, InteractionIn, InteractionQuery
+from src.models.guilds.interaction import InteractionDB, InteractionIn, InteractionQuery, InteractionRecord
 from src.models.guilds.online_members import OnlineMember
 from src.models.guilds.session import SessionDB, SessionQuery
+from src.utils.cursor import decode_cursor, encode_cursor
+from src.utils.query import QueryBuilder
+
+# Column order of the rows yielded by stream_interactions and stream_sessions
+INTERACTION_EXPORT_COLUMNS = ['interaction_id', 'thorny_id', 'type', 'coordinates', 'reference',
+                              'mainhand', 'time', 'dimension']
+SESSION_EXPORT_COLUMNS = ['connect_event_id', 'thorny_id', 'connect_time',
+                          'disconnect_event_id', 'disconnect_time', 'playtime']
 
 
 class GuildRepository:
@@ -97,7 +110,7 @@ class GuildRepository:
                 u.dimension,
                 u.hidden,
                 u.xuid
-           FROM events.sessions_view sv
+           FROM events.sessions sv
            INNER JOIN users.user u ON sv.thorny_id = u.thorny_id
            WHERE u.guild_id = $1
            AND sv.disconnect_time IS NULL
@@ -105,84 +118,118 @@ class GuildRepository:
 
         return [OnlineMember.model_validate(dict(row)) for row in data]
 
-    async def fetch_sessions(self, guild_id: int, query: SessionQuery) -> list[SessionDB]:
-        query_parts = ["SELECT * FROM events.sessions_view sv", "INNER JOIN users.\"user\" u ON sv.thorny_id = u.thorny_id"]
-        conditions = ["guild_id = $1"]
-        params: list = [guild_id]
+    @staticmethod
+    def _session_filters(guild_id: int, query: SessionQuery) -> QueryBuilder:
+        builder = QueryBuilder()
+        builder.where(f"guild_id = {builder.param(guild_id)}")
 
         if query.active:
-            conditions.append(f"sv.disconnect_time IS NULL")
+            builder.where("sv.disconnect_time IS NULL")
 
         # Handle time filtering
         if query.time_start is not None and query.time_end is not None:
-            param_idx = len(params)
-            conditions.append(
-                f"sv.connect_time < ${param_idx + 1}::timestamptz AND sv.disconnect_time >= ${param_idx + 2}::timestamptz")
-            params.extend([
-                query.time_end,
-                query.time_start
-            ])
+            builder.where(f"sv.connect_time < {builder.param(query.time_end, 'timestamptz')} "
+                          f"AND sv.disconnect_time >= {builder.param(query.time_start, 'timestamptz')}")
 
         elif query.time_start is not None:
-            param_idx = len(params)
-            conditions.append(f"(sv.disconnect_time >= ${param_idx + 1}::timestamptz OR sv.disconnect_time IS NULL)")
-            params.append(query.time_start)
+            builder.where(f"(sv.disconnect_time >= {builder.param(query.time_start, 'timestamptz')} "
+                          f"OR sv.disconnect_time IS NULL)")
 
         elif query.time_end is not None:
-            param_idx = len(params)
-            conditions.append(f"sv.connect_time < ${param_idx + 1}::timestamptz")
-            params.append(query.time_end)
-
-        # Add WHERE clause if we have conditions
-        if conditions:
-            query_parts.append("WHERE")
-            query_parts.append(" AND ".join(conditions))
+            builder.where(f"sv.connect_time < {builder.param(query.time_end, 'timestamptz')}")
+
+        return builder
+
+    async def stream_sessions(self, guild_id: int, query: SessionQuery) -> AsyncIterator[asyncpg.Record]:
+        builder = self._session_filters(guild_id, query)
+
+        async with self.db.get_read_only_transaction() as conn:
+            async for row in conn.cursor(f"""
+                SELECT sv.connect_event_id, sv.thorny_id, sv.connect_time,
+                       sv.disconnect_event_id, sv.disconnect_time,
+                       extract(epoch FROM sv.playtime)::float8 AS playtime
+                FROM events.sessions sv
+                INNER JOIN users."user" u ON sv.thorny_id = u.thorny_id
+                {builder.where_sql}
+                ORDER BY sv.connect_time, sv.connect_event_id
+            """, *builder.params):
+                yield row
+
+    async def fetch_sessions(self, guild_id: int, query: SessionQuery) -> tuple[list[SessionDB], Optional[str]]:
+        builder = self._session_filters(guild_id, query)
+
+        # Handle the cursor, picking up after the last session of the previous page.
+        # Open sessions have no disconnect_time and come first when sorting by it.
+        if query.cursor is not None and query.active:
+            connect_time, connect_event_id = decode_cursor(query.cursor, "sessions:active", datetime, int)
+            builder.where(f"(sv.connect_time, sv.connect_event_id) < "
+                          f"({builder.param(connect_time, 'timestamptz')}, {builder.param(connect_event_id, 'int8')})")
+
+        elif query.cursor is not None:
+            disconnect_time, connect_event_id = decode_cursor(query.cursor, "sessions", datetime, int)
+
+            if disconnect_time is None:
+                builder.where(f"(sv.disconnect_time IS NOT NULL OR sv.connect_event_id < {builder.param(connect_event_id, 'int8')})")
+            else:
+                builder.where(f"(sv.disconnect_time, sv.connect_event_id) < "
+                              f"({builder.param(disconnect_time, 'timestamptz')}, {builder.param(connect_event_id, 'int8')})")
 
-        # Add ORDER BY clause
+        # Order with the session ID as a tie-breaker so pages never overlap
         if query.active:
-            query_parts.append("ORDER BY connect_time DESC")
+            order_by = "sv.connect_time DESC, sv.connect_event_id DESC"
         else:
-            query_parts.append("ORDER BY disconnect_time DESC")
+            order_by = "sv.disconnect_time DESC NULLS FIRST, sv.connect_event_id DESC"
 
-        # Handle pagination with OFFSET and LIMIT
+        # Handle pagination, with a cursor taking the place of OFFSET.
+        # One extra row is fetched to know whether there is a next page.
+        limit, offset = None, 0
         if query.page is not None and query.page_size is not None:
-            # Calculate offset: (page - 1) * page_size
-            offset = (query.page - 1) * query.page_size
-            param_idx = len(params)
+            limit = query.page_size + 1
+            offset = 0 if query.cursor is not None else (query.page - 1) * query.page_size
+
+        query_sql, params = builder.build(
+            "SELECT * FROM events.sessions sv INNER JOIN users.\"user\" u ON sv.thorny_id = u.thorny_id",
+            order_by,
+            limit,
+            offset
+        )
 
-            query_parts.append(f"LIMIT ${param_idx + 1}::int OFFSET ${param_idx + 2}::int")
-            params.extend([query.page_size, offset])
+        # Execute the query
+        data = await self.db.fetch(query_sql, *params)
+        sessions = [SessionDB.model_validate(dict(row)) for row in data]
 
-        query = " ".join(query_parts)
+        next_cursor = None
+        if query.page_size is not None and len(sessions) > query.page_size:
+            sessions = sessions[:query.page_size]
+            last = sessions[-1]
 
-        # Execute the query
-        data = await self.db.fetch(query, *params)
+            if query.active:
+                next_cursor = encode_cursor("sessions:active", last.connect_time, last.connect_event_id)
+            else:
+                next_cursor = encode_cursor("sessions", last.disconnect_time, last.connect_event_id)
 
-        return [SessionDB.model_validate(dict(row)) for row in data]
+        return sessions, next_cursor
 
     async def fetch_playtime_analysis(self, guild_id: int) -> GuildPlaytimeAnalysis:
-        data = await self.db.fetchrow("""
+        # Everything is read from events.playtime_daily, where days are UTC and sessions are split at midnight
+        data = await self.db.replica.fetchrow("""
             with totals as (
-                select 
-                    sum(sv.playtime) as total_playtime,
-                    count(distinct sv.thorny_id) as total_unique_players
-                from 
-                    events.sessions_view sv 
-                inner join
-                    users."user"
-                on
-                    users."user".thorny_id = sv.thorny_id
+                select
+                    sum(p.seconds) as total_playtime,
+                    count(distinct p.thorny_id) as total_unique_players
+                from
+                    events.playtime_daily p
                 where
-                    users."user".guild_id = $1
-                    and sv.connect_time >= '2022-07-29'
+                    p.guild_id = $1
+                    and p.day >= '2022-07-29'
             ),
             daily_playtime as (
                 select
                     gs.day::date as day,
-                    coalesce(sum(sv.playtime), interval '0') as total,
-                    coalesce(count(distinct sv.thorny_id), 0) as unique_players,
-                    coalesce(count(sv.*), 0) as total_sessions,
-                    avg(sv.playtime) as avg_playtime
+                    coalesce(sum(p.seconds), 0) as total,
+                    count(distinct p.thorny_id) as unique_players,
+                    coalesce(sum(p.sessions), 0) as total_sessions,
+                    sum(p.seconds) / nullif(sum(p.sessions), 0) as avg_playtime
                 from
                     generate_series(
                         current_date - interval '13 days',
@@ -190,12 +237,9 @@ class GuildRepository:
                         interval '1 day'
                     ) as gs(day)
                 left join
-                    events.sessions_view sv
-                        on date(sv.connect_time) = gs.day::date
-                left join
-                    users."user"
-                        on users."user".thorny_id = sv.thorny_id
-                        and users."user".guild_id = $1
+                    events.playtime_daily p
+                        on p.guild_id = $1
+                        and p.day = gs.day::date
                 group by gs.day
                 order by gs.day desc
             ),
@@ -203,61 +247,59 @@ class GuildRepository:
                 select
                     extract(week from gs.week_start)::int                             as week,
                     extract(year from gs.week_start)::int                             as year,
-                    coalesce(sum(sv.playtime), interval '0')                          as total,
-                    coalesce(count(distinct sv.thorny_id), 0)                         as unique_players,
-                    coalesce(count(sv.*), 0)                                          as total_sessions,
-                    avg(sv.playtime)                                                  as avg_playtime
+                    coalesce(sum(p.seconds), 0)                                       as total,
+                    count(distinct p.thorny_id)                                       as unique_players,
+                    coalesce(sum(p.sessions), 0)                                      as total_sessions,
+                    sum(p.seconds) / nullif(sum(p.sessions), 0)                       as avg_playtime
                 from
                     generate_series(
-                        current_date - interval '7 weeks',
-                        current_date,
+                        date_trunc('week', current_date - interval '7 weeks'),
+                        date_trunc('week', current_date),
                         interval '1 week'
                     ) as gs(week_start)
-                left join events.sessions_view sv
-                    on date_trunc('week', sv.connect_time) = date_trunc('week', gs.week_start)
-                left join users."user"
-                    on users."user".thorny_id = sv.thorny_id
-                    and users."user".guild_id = $1
+                left join events.playtime_daily p
+                    on p.guild_id = $1
+                    and p.day >= gs.week_start::date
+                    and p.day < (gs.week_start + interval '1 week')::date
                 group by gs.week_start
                 order by gs.week_start desc
             ),
             monthly_playtime as (
                 select
                     gs.month::date                                                     as month,
-                    extract(epoch from coalesce(sum(sv.playtime), interval '0'))::int  as total,
-                    coalesce(count(distinct sv.thorny_id), 0)                          as unique_players
+                    coalesce(sum(p.seconds), 0)::int                                   as total,
+                    count(distinct p.thorny_id)                                        as unique_players
                 from
                     generate_series(
                         date_trunc('month', current_date) - interval '12 months',
                         date_trunc('month', current_date),
                         interval '1 month'
                     ) as gs(month)
-                left join events.sessions_view sv
-                    on date_trunc('month', sv.connect_time) = gs.month
-                left join users."user"
-                    on users."user".thorny_id = sv.thorny_id
-                    and users."user".guild_id = $1
+                left join events.playtime_daily p
+                    on p.guild_id = $1
+                    and p.day >= gs.month::date
+                    and p.day < (gs.month + interval '1 month')::date
                 group by gs.month
                 order by gs.month desc
             )
-            select 
-                coalesce((select extract(epoch from total_playtime) from totals), 0) as total_playtime,
+            select
+                coalesce((select total_playtime from totals), 0) as total_playtime,
                 coalesce((select total_unique_players from totals), 0) as total_unique_players,
                 coalesce((
                     select json_agg(json_build_object(
                         'week', w.week,
                         'year', w.year,
-                        'total', extract(epoch from w.total::interval),
+                        'total', w.total,
                         'unique_players', w.unique_players,
                         'total_sessions', w.total_sessions,
-                        'average_playtime_per_session', extract(epoch from w.avg_playtime::interval)))
+                        'average_playtime_per_session', w.avg_playtime))
                     from weekly_playtime w
                 ), '[]'::json) as weekly_playtime,
                 coalesce((
                     select json_agg(json_build_object(
-                        'day', d.day, 'total', extract(epoch from d.total),
+                        'day', d.day, 'total', d.total,
                         'unique_players', d.unique_players, 'total_sessions', d.total_sessions,
-                        'average_playtime_per_session', extract(epoch from d.avg_playtime)))
+                        'average_playtime_per_session', d.avg_playtime))
                     from daily_playtime d
                 ), '[]'::json) as daily_playtime,
                 coalesce((
@@ -277,20 +319,133 @@ class GuildRepository:
             monthly_playtime=json.loads(data['monthly_playtime']),
         )
 
+    async def has_open_session(self, thorny_id: int) -> bool:
+        return await self.db.fetchval("""
+            SELECT EXISTS(
+                SELECT 1 FROM events.sessions
+                WHERE thorny_id = $1
+                AND disconnect_time IS NULL
+            )
+        """, thorny_id)
+
     async def create_connection(self, model: ConnectionIn, ignore: bool = False) -> ConnectionDB:
         data = await self.db.fetchrow("""
             WITH connection_table AS (
                 INSERT INTO events.connections(type, thorny_id, ignored)
                 VALUES($1, $2, $3)
                 RETURNING *
+            ),
+            opened_session AS (
+                INSERT INTO events.sessions(connect_event_id, thorny_id, connect_time)
+                SELECT connection_id, thorny_id, time FROM connection_table
+                WHERE type = 'connect'
+                AND NOT ignored
+            ),
+            closed_session AS (
+                UPDATE events.sessions s
+                SET disconnect_event_id = c.connection_id,
+                    disconnect_time = c.time
+                FROM connection_table c
+                WHERE c.type = 'disconnect'
+                AND NOT c.ignored
+                AND s.thorny_id = c.thorny_id
+                AND s.disconnect_time IS NULL
             )
             SELECT * FROM connection_table
         """, model.type, model.thorny_id, ignore)
 
         return ConnectionDB.model_validate(dict(data))
 
-    async def create_interaction(self, model: InteractionIn) -> InteractionDB:
-        data = await self.db.fetchrow("""
+    @staticmethod
+    async def fetch_open_sessions(thorny_ids: list[int], conn: PoolConnectionProxy) -> dict[int, datetime]:
+        """The connect time of each user's open session, for those that have one"""
+        data = await conn.fetch("""
+            SELECT thorny_id, max(connect_time) AS connect_time FROM events.sessions
+            WHERE thorny_id = ANY($1::int8[])
+            AND disconnect_time IS NULL
+            GROUP BY thorny_id
+        """, thorny_ids)
+
+        return {row['thorny_id']: row['connect_time'] for row in data}
+
+    @staticmethod
+    async def create_connections(
+            models: list[ConnectionBatchIn],
+            ignored: list[bool],
+            conn: PoolConnectionProxy
+    ) -> list[ConnectionDB]:
+        # COPY cannot return generated values, so IDs and the fallback time are allocated up front
+        allocated = await conn.fetch("""
+            SELECT nextval(pg_get_serial_sequence('events.connections', 'connection_id')) AS connection_id,
+                   now() AS time
+            FROM generate_series(1, $1)
+        """, len(models))
+
+        connections = [
+            ConnectionDB(
+                connection_id=row['connection_id'],
+                type=model.type,
+                thorny_id=model.thorny_id,
+                ignored=ignore,
+                time=model.time or row['time']
+            )
+            for model, ignore, row in zip(models, ignored, allocated)
+        ]
+
+        # Replay the ordered events to work out which sessions open and close in this batch
+        new_sessions: list[list] = []
+        opened: dict[int, list] = {}
+        closed: list[tuple[int, int, datetime]] = []
+
+        for c in connections:
+            if c.ignored:
+                continue
+
+            if c.type == 'connect':
+                session = [c.connection_id, c.thorny_id, c.time, None, None]
+                new_sessions.append(session)
+                opened[c.thorny_id] = session
+            elif c.thorny_id in opened:
+                session = opened.pop(c.thorny_id)
+                session[3], session[4] = c.connection_id, c.time
+            else:
+                closed.append((c.thorny_id, c.connection_id, c.time))
+
+        try:
+            await conn.copy_records_to_table(
+                'connections',
+                schema_name='events',
+                columns=['connection_id', 'time', 'type', 'thorny_id', 'ignored'],
+                records=[(c.connection_id, c.time, c.type, c.thorny_id, c.ignored) for c in connections]
+            )
+        except asyncpg.ForeignKeyViolationError:
+            raise NotFound("User")
+
+        # Close sessions that were already open before inserting the new ones,
+        # otherwise a session opened in this batch would be closed as well
+        if closed:
+            await conn.execute("""
+                UPDATE events.sessions s
+                SET disconnect_event_id = c.connection_id,
+                    disconnect_time = c.time
+                FROM unnest($1::int8[], $2::int8[], $3::timestamptz[]) AS c(thorny_id, connection_id, time)
+                WHERE s.thorny_id = c.thorny_id
+                AND s.disconnect_time IS NULL
+            """, *[list(col) for col in zip(*closed)])
+
+        if new_sessions:
+            await conn.copy_records_to_table(
+                'sessions',
+                schema_name='events',
+                columns=['connect_event_id', 'thorny_id', 'connect_time', 'disconnect_event_id', 'disconnect_time'],
+                records=[tuple(session) for session in new_sessions]
+            )
+
+        return connections
+
+    @staticmethod
+    async def create_interaction(model: InteractionIn, conn: PoolConnectionProxy) -> InteractionDB:
+        data = await conn.fetchrow("""
             WITH interaction_table AS (
                 INSERT INTO events.interactions(
                     thorny_id,
@@ -302,114 +457,154 @@ class GuildRepository:
                     )
                 VALUES($1, $2, $3, $4, $5, $6)
                 RETURNING *
+            ),
+            counted AS (
+                INSERT INTO events.interaction_counts(thorny_id, type, reference, count)
+                SELECT thorny_id, type, reference, 1 FROM interaction_table
+                ON CONFLICT (thorny_id, type, reference)
+                DO UPDATE SET count = events.interaction_counts.count + 1
             )
             SELECT * FROM interaction_table
         """, model.thorny_id, model.type, model.coordinates, model.reference, model.mainhand, model.dimension)
 
         return InteractionDB.model_validate(dict(data))
 
-    async def fetch_interactions(self, query: InteractionQuery) -> list[InteractionDB]:
-        # Build the query dynamically
-        query_parts = ["SELECT * FROM events.interactions i"]
-        conditions = []
-        params = []
+    @staticmethod
+    async def create_interactions(records: list[InteractionRecord], conn: PoolConnectionProxy):
+        await conn.copy_records_to_table(
+            'interactions',
+            schema_name='events',
+            columns=list(InteractionRecord._fields),
+            records=records
+        )
 
-        # Handle coordinates
-        if query.coordinates is not None:
-            coordinates_int = [int(x) for x in query.coordinates]
+        # Pre-summed here, and upserted in key order so concurrent batches lock counters in the same order
+        counts = Counter((r.thorny_id, r.type, r.reference) for r in records)
+        keys = sorted(counts)
+
+        await conn.execute("""
+            INSERT INTO events.interaction_counts(thorny_id, type, reference, count)
+            SELECT * FROM unnest($1::int8[], $2::varchar[], $3::varchar[], $4::int8[])
+            ON CONFLICT (thorny_id, type, reference)
+            DO UPDATE SET count = events.interaction_counts.count + excluded.count
+        """, [k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys], [counts[k] for k in keys])
+
+    async def stream_interactions(self, query: InteractionQuery) -> AsyncIterator[asyncpg.Record]:
+        builder = self._interaction_filters(query)
+
+        async with self.db.get_read_only_transaction() as conn:
+            async for row in conn.cursor(f"""
+                SELECT i.interaction_id, i.thorny_id, i.type, i.coordinates, i.reference,
+                       i.mainhand, i.time, i.dimension
+                FROM events.interactions i
+                {builder.where_sql}
+                ORDER BY i.interaction_id
+            """, *builder.params):
+                yield row
+
+    @staticmethod
+    def _interaction_filters(query: InteractionQuery) -> QueryBuilder:
+        builder = QueryBuilder()
+
+        # Spatial filters go through the GiST index on i.position, the horizontal (x, z) point,
+        # and are then narrowed down on height or exact distance
+        if query.chunk is not None:
+            chunk_x, chunk_z = [int(x) for x in query.chunk]
+            start_x, start_z = builder.param(chunk_x * 16, 'int'), builder.param(chunk_z * 16, 'int')
+            end_x, end_z = builder.param(chunk_x * 16 + 15, 'int'), builder.param(chunk_z * 16 + 15, 'int')
+            builder.where(f"i.position <@ box(point({start_x}, {start_z}), point({end_x}, {end_z}))")
+
+        elif query.coordinates is not None:
+            x, y, z = [int(c) for c in query.coordinates]
 
             if query.coordinates_end is not None:
-                # Area query - between coordinates and coordinates_end
-                param_idx = len(params)
-                conditions.append(
-                    f"i.coordinates[1] BETWEEN ${param_idx + 1}::smallint AND ${param_idx + 4}::smallint AND "
-                    f"i.coordinates[2] BETWEEN ${param_idx + 2}::smallint AND ${param_idx + 5}::smallint AND "
-                    f"i.coordinates[3] BETWEEN ${param_idx + 3}::smallint AND ${param_idx + 6}::smallint"
+                # Area query - the box between coordinates and coordinates_end
+                end_x, end_y, end_z = [int(c) for c in query.coordinates_end]
+                builder.where(
+                    f"i.position <@ box(point({builder.param(x, 'int')}, {builder.param(z, 'int')}), "
+                    f"point({builder.param(end_x, 'int')}, {builder.param(end_z, 'int')})) AND "
+                    f"i.y BETWEEN {builder.param(min(y, end_y), 'smallint')} AND {builder.param(max(y, end_y), 'smallint')}"
+                )
+            elif query.radius is not None:
+                # Radius query - the circle narrows it down, the exact distance is in 3D.
+                # Squared distances overflow int4 far from the center, so they are worked out in int8
+                px, py, pz = builder.param(x, 'int8'), builder.param(y, 'int8'), builder.param(z, 'int8')
+                radius = builder.param(query.radius, 'int8')
+                builder.where(
+                    f"i.position <@ circle(point({px}, {pz}), {radius}) AND "
+                    f"(i.x - {px}) * (i.x - {px}) + (i.y - {py}) * (i.y - {py}) + (i.z - {pz}) * (i.z - {pz}) "
+                    f"<= {radius} * {radius}"
                 )
-
-                coordinates_end_int = [int(x) for x in query.coordinates_end]
-                params.extend([coordinates_int[0], coordinates_int[1], coordinates_int[2],
-                               coordinates_end_int[0], coordinates_end_int[1], coordinates_end_int[2]])
             else:
                 # Exact coordinates match
-                param_idx = len(params)
-                conditions.append(
-                    f"i.coordinates = ARRAY[${param_idx + 1}::smallint, ${param_idx + 2}::smallint, ${param_idx + 3}::smallint]")
-                params.extend([coordinates_int[0], coordinates_int[1], coordinates_int[2]])
+                px, py, pz = builder.param(x, 'int'), builder.param(y, 'smallint'), builder.param(z, 'int')
+                builder.where(f"i.position ~= point({px}, {pz}) AND i.y = {py}")
 
         # Handle thorny_ids (OR condition using ANY)
         if query.thorny_ids is not None and len(query.thorny_ids) > 0:
-            param_idx = len(params)
-            conditions.append(f"i.thorny_id = ANY(${param_idx + 1}::int[])")
-
             thorny_ids_int = [int(x) for x in query.thorny_ids]
-            params.append(thorny_ids_int)
+            builder.where(f"i.thorny_id = ANY({builder.param(thorny_ids_int, 'int[]')})")
 
         # Handle interaction_types (OR condition using ANY)
         if query.interaction_types is not None and len(query.interaction_types) > 0:
             # Convert enum types to their values if needed
             type_values = [t.value if hasattr(t, 'value') else t for t in query.interaction_types]
-            param_idx = len(params)
-            conditions.append(f"i.type = ANY(${param_idx + 1}::text[])")
-            params.append(type_values)
+            builder.where(f"i.type = ANY({builder.param(type_values, 'text[]')})")
 
-        # Handle references (OR condition using ANY)
+        # Handle references (OR condition using ILIKE ANY), one parameter however many patterns there are
         if query.references is not None and len(query.references) > 0:
             # Convert InteractionRef to string if needed
             ref_values = [str(r) for r in query.references]
-            ref_conditions = []
-            for ref in ref_values:
-                param_idx = len(params)
-                ref_conditions.append(f"i.reference ILIKE ${param_idx + 1}::text")
-                params.append(ref)
-            conditions.append(f"({' OR '.join(ref_conditions)})")
+            builder.where(f"i.reference ILIKE ANY({builder.param(ref_values, 'text[]')})")
 
         # Handle dimensions (OR condition using ANY)
         if query.dimensions is not None and len(query.dimensions) > 0:
-            param_idx = len(params)
-            conditions.append(f"i.dimension = ANY(${param_idx + 1}::text[])")
-            params.append(query.dimensions)
+            builder.where(f"i.dimension = ANY({builder.param(query.dimensions, 'text[]')})")
 
         # Handle time filtering
         if query.time_start is not None and query.time_end is not None:
             # Both start and end provided - use BETWEEN
-            param_idx = len(params)
-            conditions.append(f"i.time BETWEEN ${param_idx + 1}::timestamptz AND ${param_idx + 2}::timestamptz")
-            params.extend([
-                query.time_start,
-                query.time_end
-            ])
+            builder.where(f"i.time BETWEEN {builder.param(query.time_start, 'timestamptz')} "
+                          f"AND {builder.param(query.time_end, 'timestamptz')}")
         elif query.time_start is not None:
             # Only start provided - everything after
-            param_idx = len(params)
-            conditions.append(f"i.time >= ${param_idx + 1}::timestamptz")
-            params.append(query.time_start)
+            builder.where(f"i.time >= {builder.param(query.time_start, 'timestamptz')}")
         elif query.time_end is not None:
             # Only end provided - everything before
-            param_idx = len(params)
-            conditions.append(f"i.time <= ${param_idx + 1}::timestamptz")
-            params.append(query.time_end)
+            builder.where(f"i.time <= {builder.param(query.time_end, 'timestamptz')}")
 
-        # Add WHERE clause if we have conditions
-        if conditions:
-            query_parts.append("WHERE")
-            query_parts.append(" AND ".join(conditions))
+        return builder
 
-        # Add ORDER BY clause
-        query_parts.append("ORDER BY i.interaction_id DESC")
+    async def fetch_interactions(self, query: InteractionQuery) -> tuple[list[InteractionDB], Optional[str]]:
+        builder = self._interaction_filters(query)
 
-        # Handle pagination with OFFSET and LIMIT
-        if query.page is not None and query.page_size is not None:
-            # Calculate offset: (page - 1) * page_size
-            offset = (query.page - 1) * query.page_size
-            param_idx = len(params)
+        # Handle the cursor, picking up after the last interaction of the previous page
+        if query.cursor is not None:
+            interaction_id, = decode_cursor(query.cursor, "interactions", int)
+            builder.where(f"i.interaction_id < {builder.param(interaction_id, 'int8')}")
 
-            query_parts.append(f"LIMIT ${param_idx + 1}::int OFFSET ${param_idx + 2}::int")
-            params.extend([query.page_size, offset])
-
-        query = " ".join(query_parts)
+        # Handle pagination, with a cursor taking the place of OFFSET.
+        # One extra row is fetched to know whether there is a next page.
+        limit, offset = None, 0
+        if query.page is not None and query.page_size is not None:
+            limit = query.page_size + 1
+            offset = 0 if query.cursor is not None else (query.page - 1) * query.page_size
+
+        query_sql, params = builder.build(
+            "SELECT i.interaction_id, i.thorny_id, i.type, i.coordinates, i.reference, "
+            "i.mainhand, i.time, i.dimension FROM events.interactions i",
+            "i.interaction_id DESC",
+            limit,
+            offset
+        )
 
         # Execute the query
-        data = await self.db.fetch(query, *params)
+        data = await self.db.fetch(query_sql, *params)
+        interactions = [InteractionDB.model_validate(dict(itr)) for itr in data]
+
+        next_cursor = None
+        if query.page_size is not None and len(interactions) > query.page_size:
+            interactions = interactions[:query.page_size]
+            next_cursor = encode_cursor("interactions", interactions[-1].interaction_id)
 
-        return [InteractionDB.model_validate(dict(itr)) for itr in data]
\ No newline at end of file
+        return interactions, next_cursor
\ No newline at end of file
@@ -0,0 +1,182 @@
+from datetime import date, datetime
+from typing import Optional
+
+from asyncpg.pool import PoolConnectionProxy
+
+from src.dependencies.database import Database
+from src.errors import NotFound
+from src.models.guilds.leaderboards import ALL_TIME, Board, LeaderboardEntry
+
+# Each board's unranked (thorny_id, discord_id, value) rows for a guild ($1).
+# Monthly boards also get the start ($4) and end ($5) of the month.
+BOARD_QUERIES: dict[str, str] = {
+    "playtime": """
+        SELECT p.thorny_id, u.user_id AS discord_id, sum(p.seconds) AS value
+        FROM events.playtime_daily p
+        JOIN users."user" u ON u.thorny_id = p.thorny_id
+        WHERE p.guild_id = $1
+        AND p.day >= $4::date
+        AND p.day < $5::date
+        AND u.active = true
+        GROUP BY p.thorny_id, u.user_id
+    """,
+    "currency": """
+        SELECT thorny_id, user_id AS discord_id, balance AS value
+        FROM users."user"
+        WHERE guild_id = $1
+        AND active = true
+    """,
+    "levels": """
+        SELECT thorny_id, user_id AS discord_id, level AS value
+        FROM users."user"
+        WHERE guild_id = $1
+        AND active = true
+    """,
+    "quests": """
+        SELECT u.thorny_id, u.user_id AS discord_id, count(*) AS value
+        FROM users."user" u
+        JOIN quests_v3.quest_progress qp ON qp.thorny_id = u.thorny_id
+        WHERE u.guild_id = $1
+        AND u.active = true
+        AND qp.status = 'completed'
+        GROUP BY u.thorny_id, u.user_id
+    """,
+}
+
+
+class LeaderboardRepository:
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def fetch_refreshed_at(self, guild_id: int, board: Board, period: str) -> Optional[datetime]:
+        return await self.db.fetchval("""
+            SELECT refreshed_at FROM guilds.leaderboard_refresh
+            WHERE guild_id = $1
+            AND board = $2
+            AND period = $3
+        """, guild_id, board, period)
+
+    async def fetch_stale(self, older_than: datetime, current_periods: list[str]) -> list[tuple[int, str, str]]:
+        """The (guild_id, board, period) of every snapshot of a current period refreshed before `older_than`"""
+        data = await self.db.fetch("""
+            SELECT guild_id, board, period FROM guilds.leaderboard_refresh
+            WHERE refreshed_at < $1
+            AND period = ANY($2::varchar[])
+        """, older_than, current_periods)
+
+        return [(r['guild_id'], r['board'], r['period']) for r in data]
+
+    @staticmethod
+    async def refresh(
+            guild_id: int,
+            board: Board,
+            period: str,
+            month: Optional[date],
+            conn: PoolConnectionProxy
+    ):
+        """
+        Re-ranks one board into its snapshot. Ties are ranked by ThornyID so that ranks are stable.
+        Concurrent refreshes of the same board queue up behind each other instead of interleaving.
+        """
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"leaderboard:{guild_id}:{board}:{period}")
+
+        await conn.execute("""
+            DELETE FROM guilds.leaderboard_snapshot
+            WHERE guild_id = $1
+            AND board = $2
+            AND period = $3
+        """, guild_id, board, period)
+
+        params = [guild_id, board, period]
+        if period != ALL_TIME:
+            params += [month, date(month.year + month.month // 12, month.month % 12 + 1, 1)]
+
+        await conn.execute(f"""
+            INSERT INTO guilds.leaderboard_snapshot(guild_id, board, period, "rank", thorny_id, discord_id, value)
+            SELECT $1, $2, $3, row_number() OVER (ORDER BY t.value DESC, t.thorny_id), t.thorny_id, t.discord_id, t.value
+            FROM ({BOARD_QUERIES[board]}) t
+        """, *params)
+
+        await conn.execute("""
+            INSERT INTO guilds.leaderboard_refresh(guild_id, board, period, refreshed_at)
+            VALUES($1, $2, $3, now())
+            ON CONFLICT (guild_id, board, period)
+            DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+        """, guild_id, board, period)
+
+    @staticmethod
+    def _to_entry(row) -> LeaderboardEntry:
+        # Values are stored as float8, whole numbers go back out as ints like they were ranked
+        return LeaderboardEntry(
+            rank=row['rank'],
+            thorny_id=row['thorny_id'],
+            discord_id=row['discord_id'],
+            value=int(row['value']) if row['value'].is_integer() else row['value']
+        )
+
+    async def fetch(
+            self,
+            guild_id: int,
+            board: Board,
+            period: str,
+            limit: Optional[int],
+            offset: int
+    ) -> list[LeaderboardEntry]:
+        """A page of the snapshot, read as a range of ranks off the primary key"""
+        data = await self.db.replica.fetch("""
+            SELECT "rank", thorny_id, discord_id, value FROM guilds.leaderboard_snapshot
+            WHERE guild_id = $1
+            AND board = $2
+            AND period = $3
+            AND "rank" > $4
+            ORDER BY "rank"
+            LIMIT $5
+        """, guild_id, board, period, offset, limit)
+
+        return [self._to_entry(r) for r in data]
+
+    async def fetch_total(self, guild_id: int, board: Board, period: str) -> int:
+        # Ranks run from 1 without gaps, so the last rank is the total, found without counting
+        total = await self.db.replica.fetchval("""
+            SELECT max("rank") FROM guilds.leaderboard_snapshot
+            WHERE guild_id = $1
+            AND board = $2
+            AND period = $3
+        """, guild_id, board, period)
+
+        return total or 0
+
+    async def fetch_around(
+            self,
+            guild_id: int,
+            board: Board,
+            period: str,
+            thorny_id: int,
+            neighbours: int
+    ) -> list[LeaderboardEntry]:
+        """
+        The user's entry and up to `neighbours` entries either side of it.
+        Two index lookups, one for the user's rank and one for the range around it.
+        Raises NotFound if the user is not on the leaderboard.
+        """
+        data = await self.db.replica.fetch("""
+            WITH own AS (
+                SELECT "rank" FROM guilds.leaderboard_snapshot
+                WHERE guild_id = $1
+                AND board = $2
+                AND period = $3
+                AND thorny_id = $4
+            )
+            SELECT s."rank", s.thorny_id, s.discord_id, s.value
+            FROM guilds.leaderboard_snapshot s, own
+            WHERE s.guild_id = $1
+            AND s.board = $2
+            AND s.period = $3
+            AND s."rank" BETWEEN own."rank" - $5 AND own."rank" + $5
+            ORDER BY s."rank"
+        """, guild_id, board, period, thorny_id, neighbours)
+
+        if not data:
+            raise NotFound("Leaderboard Entry")
+
+        return [self._to_entry(r) for r in data]
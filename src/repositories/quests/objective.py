@@ -86,3 +86,16 @@ class ObjectiveRepository:
         """, quest_id)
 
         return [ObjectiveDB.model_validate(dict(o)) for o in data]
+
+    async def fetch_all_by_quests(self, quest_ids: list[int]) -> dict[int, list[ObjectiveDB]]:
+        data = await self.db.fetch("""
+            SELECT * FROM quests_v3.objective
+            WHERE quest_id = ANY($1::int8[])
+            ORDER BY quest_id, order_index
+        """, quest_ids)
+
+        objectives: dict[int, list[ObjectiveDB]] = {quest_id: [] for quest_id in quest_ids}
+        for o in data:
+            objectives[o['quest_id']].append(ObjectiveDB.model_validate(dict(o)))
+
+        return objectives
@@ -5,7 +5,13 @@ from asyncpg.pool import PoolConnectionProxy
 
 from src.dependencies.database import Database
 from src.errors import AlreadyExists, NotFound
-from src.models.quests.objective_progress import ObjectiveProgressDB, ObjectiveProgressIn, ObjectiveProgressUpdate
+from src.models.quests.objective_progress import (
+    ObjectiveProgressDB,
+    ObjectiveProgressIn,
+    ObjectiveProgressMatch,
+    ObjectiveProgressUpdate,
+    TargetProgressDelta
+)
 
 
 class ObjectiveProgressRepository:
@@ -53,32 +59,118 @@ class ObjectiveProgressRepository:
 
         return ObjectiveProgressDB.model_validate(dict(data))
 
+    @staticmethod
+    async def create_many(
+            progress_id: int,
+            objective_ids: list[int],
+            models: list[ObjectiveProgressIn],
+            conn: PoolConnectionProxy
+    ) -> list[ObjectiveProgressDB]:
+        """
+        Inserts the progress of every objective of a quest in one statement.
+        The first objective is started straight away, the rest are left pending.
+        Returned in the order of `objective_ids`.
+        """
+        try:
+            data = await conn.fetch("""
+                INSERT INTO quests_v3.objective_progress(
+                    progress_id,
+                    objective_id,
+                    target_progress,
+                    customization_progress,
+                    status,
+                    start_time
+                )
+                SELECT $1,
+                       o.objective_id,
+                       o.target_progress,
+                       o.customization_progress,
+                       CASE WHEN o.position = 1 THEN 'active' ELSE 'pending' END,
+                       CASE WHEN o.position = 1 THEN now() END
+                FROM unnest($2::int8[], $3::jsonb[], $4::jsonb[])
+                    WITH ORDINALITY AS o(objective_id, target_progress, customization_progress, position)
+
+                RETURNING *
+            """, progress_id, objective_ids,
+                 [json.dumps([t.model_dump() for t in m.target_progress], default=str) for m in models],
+                 [m.customization_progress.model_dump_json() for m in models])
+        except asyncpg.UniqueViolationError:
+            raise AlreadyExists("Objective Progress")
+
+        positions = {objective_id: i for i, objective_id in enumerate(objective_ids)}
+        objectives = [ObjectiveProgressDB.model_validate(dict(o)) for o in data]
+
+        return sorted(objectives, key=lambda o: positions[o.objective_id])
+
+    @staticmethod
     async def update(
-            self,
             progress_id: int,
             objective_id: int,
             model: ObjectiveProgressUpdate,
             conn: PoolConnectionProxy
     ) -> ObjectiveProgressDB:
-        objective = await self.fetch(objective_id, progress_id)
-
-        updated = objective.model_validate(
-            {**objective.model_dump(), **model.model_dump(exclude_none=True)}
-        )
-
-        await conn.execute("""
+        # Fields left out of the update keep their stored value
+        data = await conn.fetchrow("""
             UPDATE quests_v3.objective_progress
-            SET start_time = $1,
-                end_time = $2,
-                target_progress = $3,
-                customization_progress = $4,
-                status = $5
+            SET start_time = COALESCE($1, start_time),
+                end_time = COALESCE($2, end_time),
+                target_progress = COALESCE($3::jsonb, target_progress),
+                customization_progress = COALESCE($4::jsonb, customization_progress),
+                status = COALESCE($5, status)
             WHERE progress_id = $6
             AND objective_id = $7
-        """, updated.start_time, updated.end_time, json.dumps([t.model_dump() for t in updated.target_progress], default=str),
-             updated.customization_progress.model_dump_json(), updated.status, progress_id, objective_id)
 
-        return updated
+            RETURNING *
+        """, model.start_time, model.end_time,
+             json.dumps([t.model_dump() for t in model.target_progress], default=str) if model.target_progress is not None else None,
+             model.customization_progress.model_dump_json() if model.customization_progress is not None else None,
+             model.status, progress_id, objective_id)
+
+        if not data:
+            raise NotFound("Objective Progress")
+
+        return ObjectiveProgressDB.model_validate(dict(data))
+
+    @staticmethod
+    async def update_targets(
+            progress_id: int,
+            objective_id: int,
+            deltas: list[TargetProgressDelta],
+            conn: PoolConnectionProxy
+    ) -> ObjectiveProgressDB:
+        """
+        Applies increments and absolute counts to single targets in one statement,
+        leaving the rest of `target_progress` as it is. Counts never drop below 0.
+        """
+        data = await conn.fetchrow("""
+            UPDATE quests_v3.objective_progress op
+            SET target_progress = COALESCE((
+                SELECT jsonb_agg(
+                    CASE WHEN d.target_uuid IS NULL THEN t.target
+                    ELSE jsonb_set(
+                        t.target,
+                        '{count}',
+                        to_jsonb(GREATEST(COALESCE(d.count, (t.target->>'count')::int + d.increment), 0))
+                    )
+                    END ORDER BY t.position
+                )
+                FROM jsonb_array_elements(op.target_progress) WITH ORDINALITY AS t(target, position)
+                LEFT JOIN unnest($3::text[], $4::int[], $5::int[]) AS d(target_uuid, increment, count)
+                ON d.target_uuid = t.target->>'target_uuid'
+            ), '[]'::jsonb)
+            WHERE op.progress_id = $1
+            AND op.objective_id = $2
+
+            RETURNING *
+        """, progress_id, objective_id,
+             [str(d.target_uuid) for d in deltas],
+             [d.increment for d in deltas],
+             [d.count for d in deltas])
+
+        if not data:
+            raise NotFound("Objective Progress")
+
+        return ObjectiveProgressDB.model_validate(dict(data))
 
     async def fetch_all(self, progress_id: int) -> list[ObjectiveProgressDB]:
         data = await self.db.fetch("""
@@ -87,3 +179,48 @@ class ObjectiveProgressRepository:
         """, progress_id)
 
         return [ObjectiveProgressDB.model_validate(dict(o)) for o in data]
+
+    @staticmethod
+    async def fetch_matchable(thorny_ids: list[int], conn: PoolConnectionProxy) -> list[ObjectiveProgressMatch]:
+        """
+        The active and pending objectives of these users' active quests, with their definitions,
+        ordered by quest and then objective order. The rows stay locked until the transaction ends.
+        """
+        data = await conn.fetch("""
+            SELECT op.*,
+                   qp.thorny_id,
+                   o.order_index,
+                   o.logic,
+                   o.target_count,
+                   o.targets,
+                   o.customizations
+            FROM quests_v3.quest_progress qp
+            JOIN quests_v3.objective_progress op ON op.progress_id = qp.progress_id
+            JOIN quests_v3.objective o ON o.objective_id = op.objective_id
+            WHERE qp.thorny_id = ANY($1::int[])
+            AND qp.status = 'active'
+            AND op.status IN ('active', 'pending')
+            ORDER BY op.progress_id, o.order_index
+            FOR UPDATE OF op
+        """, thorny_ids)
+
+        return [ObjectiveProgressMatch.model_validate(dict(o)) for o in data]
+
+    @staticmethod
+    async def update_many(models: list[ObjectiveProgressDB], conn: PoolConnectionProxy):
+        await conn.execute("""
+            UPDATE quests_v3.objective_progress op
+            SET start_time = u.start_time,
+                end_time = u.end_time,
+                status = u.status,
+                target_progress = u.target_progress
+            FROM unnest($1::int8[], $2::int8[], $3::timestamptz[], $4::timestamptz[], $5::varchar[], $6::jsonb[])
+                AS u(progress_id, objective_id, start_time, end_time, status, target_progress)
+            WHERE op.progress_id = u.progress_id
+            AND op.objective_id = u.objective_id
+        """, [m.progress_id for m in models],
+             [m.objective_id for m in models],
+             [m.start_time for m in models],
+             [m.end_time for m in models],
+             [m.status for m in models],
+             [json.dumps([t.model_dump() for t in m.target_progress], default=str) for m in models])
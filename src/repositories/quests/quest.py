@@ -1,10 +1,15 @@
+from typing import Optional
+
 import asyncpg
 
 from asyncpg.pool import PoolConnectionProxy
 
 from src.dependencies.database import Database
+from src.dependencies.quest_cache import QUEST_CHANGED_CHANNEL
 from src.errors import AlreadyExists, NotFound
 from src.models.quests.quest import QuestDB, QuestIn, QuestQuery, QuestUpdate
+from src.utils.cursor import decode_cursor, encode_cursor
+from src.utils.query import QueryBuilder
 
 
 class QuestRepository:
@@ -70,79 +75,63 @@ class QuestRepository:
 
         return updated
 
-    async def fetch_all(self, guild_id: int, query: QuestQuery) -> list[QuestDB]:
-        # Build the query dynamically
-        query_parts = ["SELECT * FROM quests_v3.quest q"]
-        conditions = ["q.guild_id = $1"]
-        params: list = [guild_id]
+    @staticmethod
+    async def notify_changed(guild_id: int, quest_id: int, conn: PoolConnectionProxy):
+        # Delivered to every listening replica once the transaction commits
+        await conn.execute("SELECT pg_notify($1, $2)", QUEST_CHANGED_CHANNEL, f"{guild_id}:{quest_id}")
+
+    async def fetch_all(self, guild_id: int, query: QuestQuery) -> tuple[list[QuestDB], Optional[str]]:
+        # Build the query from the filters that are set
+        builder = QueryBuilder()
+        builder.where(f"q.guild_id = {builder.param(guild_id)}")
 
         # Handle thorny_ids (OR condition using ANY)
         if query.creator_thorny_ids is not None and len(query.creator_thorny_ids) > 0:
-            param_idx = len(params)
-            conditions.append(f"q.created_by = ANY(${param_idx + 1}::int[])")
-
             thorny_ids_int = [int(x) for x in query.creator_thorny_ids]
-            params.append(thorny_ids_int)
+            builder.where(f"q.created_by = ANY({builder.param(thorny_ids_int, 'int[]')})")
 
         # Handle interaction_types (OR condition using ANY)
         if query.quest_types is not None and len(query.quest_types) > 0:
-            param_idx = len(params)
-            conditions.append(f"q.quest_type = ANY(${param_idx + 1})")
-
-            params.append(query.quest_types)
-
-        # Handle time filtering
-        if query.time_start is not None and query.time_end is not None:
-            # Both start and end provided - filter between range
-            param_idx = len(params)
-            conditions.append(f"q.start_time >= ${param_idx + 1}::timestamptz AND q.end_time <= ${param_idx + 2}::timestamptz")
-            params.extend([
-                query.time_start,
-                query.time_end
-            ])
-
-        elif query.time_start is not None:
-            # Only start time provided - filter after this time
-            param_idx = len(params)
-            conditions.append(f"q.start_time >= ${param_idx + 1}::timestamptz")
-            params.append(query.time_start)
-
-        elif query.time_end is not None:
-            # Only end time provided - filter before this time
-            param_idx = len(params)
-            conditions.append(f"q.end_time <= ${param_idx + 1}::timestamptz")
-            params.append(query.time_end)
+            builder.where(f"q.quest_type = ANY({builder.param(query.quest_types)})")
+
+        # Handle time filtering, quests starting after time_start and ending before time_end
+        if query.time_start is not None:
+            builder.where(f"q.start_time >= {builder.param(query.time_start, 'timestamptz')}")
+
+        if query.time_end is not None:
+            builder.where(f"q.end_time <= {builder.param(query.time_end, 'timestamptz')}")
 
         # Handle "active", "future" and "past" quests_router
         if query.active:
-            conditions.append(f"NOW() BETWEEN q.start_time AND q.end_time")
+            builder.where("NOW() BETWEEN q.start_time AND q.end_time")
 
         if query.future:
-            conditions.append(f"q.start_time > NOW()")
+            builder.where("q.start_time > NOW()")
 
         if query.past:
-            conditions.append(f"q.end_time < NOW()")
-
-        # Add a WHERE clause if we have conditions
-        if conditions:
-            query_parts.append("WHERE")
-            query_parts.append(" AND ".join(conditions))
+            builder.where("q.end_time < NOW()")
 
-        # Add ORDER BY clause
-        query_parts.append("ORDER BY q.quest_id DESC")
+        # Handle the cursor, picking up after the last quest of the previous page
+        if query.cursor is not None:
+            quest_id, = decode_cursor(query.cursor, "quests", int)
+            builder.where(f"q.quest_id < {builder.param(quest_id, 'int')}")
 
-        # Handle pagination with OFFSET and LIMIT
+        # Handle pagination, with a cursor taking the place of OFFSET.
+        # One extra row is fetched to know whether there is a next page.
+        limit, offset = None, 0
         if query.page is not None and query.page_size is not None:
-            # Calculate offset: (page - 1) * page_size
-            offset = (query.page - 1) * query.page_size
-            param_idx = len(params)
+            limit = query.page_size + 1
+            offset = 0 if query.cursor is not None else (query.page - 1) * query.page_size
 
-            query_parts.append(f"LIMIT ${param_idx + 1}::int OFFSET ${param_idx + 2}::int")
-            params.extend([query.page_size, offset])
-
-        query = " ".join(query_parts)
+        query_sql, params = builder.build("SELECT * FROM quests_v3.quest q", "q.quest_id DESC", limit, offset)
 
         # Execute the query
-        data = await self.db.fetch(query, *params)
+        data = await self.db.fetch(query_sql, *params)
+        quests = [QuestDB.model_validate(dict(q)) for q in data]
+
+        next_cursor = None
+        if query.page_size is not None and len(quests) > query.page_size:
+            quests = quests[:query.page_size]
+            next_cursor = encode_cursor("quests", quests[-1].quest_id)
 
-        return [QuestDB.model_validate(dict(q)) for q in data]
\ No newline at end of file
+        return quests, next_cursor
\ No newline at end of file
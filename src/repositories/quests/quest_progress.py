@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import asyncpg
 from asyncpg.pool import PoolConnectionProxy
 
@@ -78,6 +80,17 @@ class QuestProgressRepository:
 
         return updated
 
+    @staticmethod
+    async def complete_many(end_times: dict[int, datetime], conn: PoolConnectionProxy):
+        """Marks each quest progress as completed, at its given end time"""
+        await conn.execute("""
+            UPDATE quests_v3.quest_progress qp
+            SET status = 'completed',
+                end_time = u.end_time
+            FROM unnest($1::int8[], $2::timestamptz[]) AS u(progress_id, end_time)
+            WHERE qp.progress_id = u.progress_id
+        """, list(end_times.keys()), list(end_times.values()))
+
     async def fetch_all_users_progress(self, thorny_id: int) -> list[QuestProgressDB]:
         data = await self.db.fetch("""
             SELECT * from quests_v3.quest_progress
@@ -79,4 +79,18 @@ class RewardRepository:
             ORDER BY reward_id
         """, objective_id)
 
-        return [RewardDB.model_validate(dict(r)) for r in data]
\ No newline at end of file
+        return [RewardDB.model_validate(dict(r)) for r in data]
+
+    async def fetch_all_by_quests(self, quest_ids: list[int]) -> dict[int, list[RewardDB]]:
+        """Returns the rewards of every objective in the given quests, keyed by objective ID"""
+        data = await self.db.fetch("""
+            SELECT * FROM quests_v3.reward
+            WHERE quest_id = ANY($1::int8[])
+            ORDER BY objective_id, reward_id
+        """, quest_ids)
+
+        rewards: dict[int, list[RewardDB]] = {}
+        for r in data:
+            rewards.setdefault(r['objective_id'], []).append(RewardDB.model_validate(dict(r)))
+
+        return rewards
\ No newline at end of file
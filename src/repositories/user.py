@@ -1,3 +1,6 @@
+import asyncio
+from typing import Optional
+
 import asyncpg
 from src.dependencies.database import Database
 from src.errors import AlreadyExists, NotFound
@@ -10,6 +13,11 @@ class UserRepository:
     def __init__(self, db: Database):
         self.db = db
 
+        # Request-scoped loader state, see load_with_profile
+        self._loaded: dict[tuple[int, int], asyncio.Future] = {}
+        self._pending: dict[int, list[int]] = {}
+        self._dispatch_task: Optional[asyncio.Task] = None
+
     async def fetch(self, guild_id: int, thorny_id: int) -> UserDB:
         data = await self.db.fetchrow("""
             SELECT * FROM users.user
@@ -124,6 +132,64 @@ class UserRepository:
 
         return ProfileDB.model_validate(dict(data))
 
+    async def fetch_many_with_profiles(
+            self,
+            guild_id: int,
+            thorny_ids: list[int]
+    ) -> dict[int, tuple[UserDB, ProfileDB]]:
+        data = await self.db.fetch("""
+            SELECT u.*, to_json(p) AS profile FROM users.user u
+            INNER JOIN users.profile p ON u.thorny_id = p.thorny_id
+            WHERE u.guild_id = $1
+            AND u.thorny_id = ANY($2::int8[])
+        """, guild_id, thorny_ids)
+
+        return {
+            row['thorny_id']: (UserDB.model_validate(dict(row)), ProfileDB.model_validate_json(row['profile']))
+            for row in data
+        }
+
+    async def load_with_profile(self, guild_id: int, thorny_id: int) -> tuple[UserDB, ProfileDB]:
+        """
+        Loads a user and their profile, batching every lookup made in the same loop
+        iteration into a single fetch_many_with_profiles query.
+
+        Results are remembered for the lifetime of this repository, which is one request,
+        so the same user is only ever looked up once.
+        """
+        key = (guild_id, thorny_id)
+        future = self._loaded.get(key)
+
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._loaded[key] = future
+            self._pending.setdefault(guild_id, []).append(thorny_id)
+
+            if self._dispatch_task is None:
+                self._dispatch_task = asyncio.create_task(self._dispatch())
+
+        result = await future
+        if result is None:
+            raise NotFound("User")
+
+        return result
+
+    async def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        self._dispatch_task = None
+
+        for guild_id, thorny_ids in pending.items():
+            try:
+                found = await self.fetch_many_with_profiles(guild_id, thorny_ids)
+            except Exception as e:
+                # Forget the failed lookups, so a later call can try again
+                for thorny_id in thorny_ids:
+                    self._loaded.pop((guild_id, thorny_id)).set_exception(e)
+                continue
+
+            for thorny_id in thorny_ids:
+                self._loaded[(guild_id, thorny_id)].set_result(found.get(thorny_id))
+
     async def update_profile(self, guild_id: int, thorny_id: int, model: ProfileUpdate) -> ProfileDB:
         profile = await self.fetch_profile(guild_id, thorny_id)
 
@@ -1,4 +1,6 @@
 import json
+from datetime import datetime
+from typing import Optional
 
 import asyncpg
 from asyncpg.pool import PoolConnectionProxy
@@ -6,6 +8,8 @@ from asyncpg.pool import PoolConnectionProxy
 from src.dependencies.database import Database
 from src.errors import AlreadyExists, NotFound
 from src.models.wiki.page import PageDB, PageIn, PageQuery, PageUpdate
+from src.utils.cursor import decode_cursor, encode_cursor
+from src.utils.query import QueryBuilder
 
 
 class PageRepository:
@@ -36,65 +40,83 @@ class PageRepository:
 
         return PageDB.model_validate(dict(data))
 
-    async def fetch_all(self, guild_id: int, query: PageQuery) -> list[PageDB]:
-        # Build the query dynamically
-        query_parts = ["SELECT * FROM wiki.page p"]
-        conditions = ["p.guild_id = $1"]
-        params: list = [guild_id]
+    async def fetch_all(self, guild_id: int, query: PageQuery) -> tuple[list[PageDB], Optional[str]]:
+        # Build the query from the filters that are set
+        builder = QueryBuilder()
+        builder.where(f"p.guild_id = {builder.param(guild_id)}")
 
         # Handle published (exact match)
         if query.published is not None:
-            param_idx = len(params)
-            conditions.append(f"p.published = ${param_idx + 1}")
-            params.append(query.published)
+            builder.where(f"p.published = {builder.param(query.published)}")
 
         # Handle category (exact match)
         if query.category is not None:
-            param_idx = len(params)
-            conditions.append(f"p.category = ${param_idx + 1}")
-            params.append(query.category)
+            builder.where(f"p.category = {builder.param(query.category)}")
 
         # Handle tags (match ANY of the given tags - array overlap)
         if query.tags is not None and len(query.tags) > 0:
-            param_idx = len(params)
-            conditions.append(f"p.tags && ${param_idx + 1}::text[]")
-            params.append(query.tags)
+            builder.where(f"p.tags && {builder.param(query.tags, 'text[]')}")
 
         # Handle fuzzy search on title
         if query.search is not None and len(query.search) > 0:
-            param_idx = len(params)
-            conditions.append(f"p.title ILIKE ${param_idx + 1}")
-            params.append(f"%{query.search}%")
+            builder.where(f"p.title ILIKE {builder.param(f'%{query.search}%')}")
 
-        # Add a WHERE clause if we have conditions
-        if conditions:
-            query_parts.append("WHERE")
-            query_parts.append(" AND ".join(conditions))
-
-        # Add ORDER BY clause (whitelist columns to avoid SQL injection via sort_by)
+        # Whitelist sort columns to avoid SQL injection via sort_by.
+        # Without a sort_by, pages come in the order they were created.
         sort_column_map = {
-            "created_at": "p.created_at",
-            "updated_at": "p.updated_at",
-            "title": "p.title",
+            "created_at": ("p.created_at", datetime, "timestamptz"),
+            "updated_at": ("p.updated_at", datetime, "timestamptz"),
+            "title": ("p.title", str, "text"),
         }
         if query.sort_by:
-            sort_column = sort_column_map.get(query.sort_by, "p.created_at")
+            sort_column, sort_type, sort_cast = sort_column_map.get(query.sort_by, sort_column_map["created_at"])
             sort_direction = "ASC" if query.sort_order == "asc" else "DESC"
-            query_parts.append(f"ORDER BY {sort_column} {sort_direction}")
-
-        # Handle pagination with OFFSET and LIMIT
+        else:
+            sort_column, sort_type, sort_cast, sort_direction = None, None, None, "ASC"
+
+        cursor_kind = f"wiki:{query.sort_by}:{sort_direction.lower()}"
+        comparison = ">" if sort_direction == "ASC" else "<"
+
+        # Handle the cursor, picking up after the last page of the previous page of results
+        if query.cursor is not None and sort_column:
+            value, page_id = decode_cursor(query.cursor, cursor_kind, sort_type, int)
+            builder.where(f"({sort_column}, p.page_id) {comparison} "
+                          f"({builder.param(value, sort_cast)}, {builder.param(page_id, 'int')})")
+
+        elif query.cursor is not None:
+            page_id, = decode_cursor(query.cursor, cursor_kind, int)
+            builder.where(f"p.page_id {comparison} {builder.param(page_id, 'int')}")
+
+        # Order with the page ID as a tie-breaker so pages never overlap
+        if sort_column:
+            order_by = f"{sort_column} {sort_direction}, p.page_id {sort_direction}"
+        else:
+            order_by = "p.page_id ASC"
+
+        # Handle pagination, with a cursor taking the place of OFFSET.
+        # One extra row is fetched to know whether there is a next page.
+        limit, offset = None, 0
         if query.page is not None and query.page_size is not None:
-            offset = (query.page - 1) * query.page_size
-            param_idx = len(params)
-            query_parts.append(f"LIMIT ${param_idx + 1}::int OFFSET ${param_idx + 2}::int")
-            params.extend([query.page_size, offset])
+            limit = query.page_size + 1
+            offset = 0 if query.cursor is not None else (query.page - 1) * query.page_size
 
-        sql = " ".join(query_parts)
+        sql, params = builder.build("SELECT * FROM wiki.page p", order_by, limit, offset)
 
         # Execute the query
         data = await self.db.fetch(sql, *params)
+        pages = [PageDB.model_validate(dict(p)) for p in data]
+
+        next_cursor = None
+        if query.page_size is not None and len(pages) > query.page_size:
+            pages = pages[:query.page_size]
+            last = pages[-1]
+
+            if sort_column:
+                next_cursor = encode_cursor(cursor_kind, getattr(last, query.sort_by), last.page_id)
+            else:
+                next_cursor = encode_cursor(cursor_kind, last.page_id)
 
-        return [PageDB.model_validate(dict(p)) for p in data]
+        return pages, next_cursor
 
     @staticmethod
     async def create(guild_id: int, model: PageIn, conn: PoolConnectionProxy) -> PageDB:
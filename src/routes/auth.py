@@ -2,18 +2,16 @@ import base64
 import secrets
 from typing import Optional
 
-from argon2 import PasswordHasher
 from fastapi import APIRouter, Form, Header, Security, status
 
 from src.dependencies.auth import get_current_client
-from src.dependencies.auth.keys import verify_api_key
+from src.dependencies.auth.keys import hash_api_key, verify_api_key
 from src.dependencies.auth.token import create_token
 from src.dependencies.database import db
 from src.errors import InvalidCredentials
 from src.models.auth import ClientCreateRequest, ClientCreateResponse, TokenPayload, TokenResponse, Scope
 
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
-ph = PasswordHasher()
 
 @auth_router.post("/token")
 async def get_token(
@@ -76,7 +74,7 @@ async def register_client(
 ) -> ClientCreateResponse:
     """Master-tier clients only. Creates a guild-scoped API key."""
     raw_key = secrets.token_urlsafe(48)
-    hashed = ph.hash(raw_key)
+    hashed = await hash_api_key(raw_key)
     client_id = await db.fetchval(
         """
         INSERT INTO auth.clients (client_name, hashed_key, tier, guild_id, scopes)
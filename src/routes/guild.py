@@ -1,6 +1,7 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Security, Query
+from fastapi import APIRouter, Depends, Response, Security, Query
+from fastapi.responses import StreamingResponse
 from starlette import status
 
 from src.dependencies.auth import get_current_client, get_guild_client
@@ -12,6 +13,8 @@ from src.models.guilds.interaction import InteractionQuery
 from src.models.guilds.session import SessionQuery
 
 from src.services.guild import GuildService
+from src.utils.cursor import set_next_cursor
+from src.utils.export import EXPORT_MEDIA_TYPES, ExportFormat
 
 guilds_router = APIRouter(prefix='/guilds', tags=['Guilds'])
 
@@ -101,13 +104,41 @@ async def get_online_members(
 @guilds_router.get('/me/sessions')
 async def list_sessions(
         filter_query: Annotated[SessionQuery, Query()],
+        response: Response,
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
         service: GuildService = Depends(get_guild_service)
 ) -> list[guilds.SessionOut]:
     """
     Returns a list of all sessions for the guild.
+
+    Returns at most `page_size` results. When there are more, the `X-Next-Cursor` header
+    holds a cursor to pass as `cursor` for the next page.
+    """
+    sessions, next_cursor = await service.get_sessions(auth.guild_id, filter_query)
+    set_next_cursor(response, next_cursor)
+    return sessions
+
+
+@guilds_router.get('/me/sessions:export', response_class=StreamingResponse,
+                   responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}})
+async def export_sessions(
+        filter_query: Annotated[SessionQuery, Query()],
+        export_format: ExportFormat = Query(default="ndjson", alias="format"),
+        auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
+        service: GuildService = Depends(get_guild_service)
+):
+    """
+    Exports every session of the guild matching the filters, oldest first, as NDJSON or CSV.
+    `playtime` is in seconds.
+
+    The rows are streamed as they are read, so any range can be exported in one request.
+    `page`, `page_size` and `cursor` are ignored.
     """
-    return await service.get_sessions(auth.guild_id, filter_query)
+    return StreamingResponse(
+        service.export_sessions(auth.guild_id, filter_query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="sessions.{export_format}"'}
+    )
 
 
 @guilds_router.post('/me/connection', status_code=status.HTTP_201_CREATED)
@@ -122,6 +153,23 @@ async def create_connection(
     return await service.new_connection(body)
 
 
+@guilds_router.post('/me/connections:batch', status_code=status.HTTP_201_CREATED)
+async def create_connections(
+        body: guilds.ConnectionBatch,
+        _: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_MEMBERS_WRITE]),
+        service: GuildService = Depends(get_guild_service)
+) -> list[guilds.ConnectionOut]:
+    """
+    Creates many connection events at once, in the order they are given.
+
+    Meant for flushing a buffer of joins and leaves, for example after a server restart.
+    Events without a `time` are recorded at the time of the request.
+    Each user's events must be in time order, and a disconnect cannot be before the connect of the session it closes.
+    Returns one result per event, in the same order.
+    """
+    return await service.new_connections(body)
+
+
 @guilds_router.post('/me/interaction', status_code=status.HTTP_201_CREATED)
 async def create_interaction(
         body: guilds.InteractionIn,
@@ -133,13 +181,64 @@ async def create_interaction(
     """
     return await service.new_interaction(body)
 
+
+@guilds_router.post('/me/interactions:batch', status_code=status.HTTP_201_CREATED,
+                    responses={202: {"description": "The interactions were buffered and will be written shortly"},
+                               503: {"description": "The buffer is full, retry after `Retry-After` seconds"}})
+async def create_interactions(
+        body: list[guilds.InteractionIn],
+        response: Response,
+        _: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_MEMBERS_WRITE]),
+        service: GuildService = Depends(get_guild_service)
+) -> guilds.InteractionBatchOut:
+    """
+    Creates many interaction events at once.
+
+    Interactions are recorded at the time of the request. When the write buffer is enabled,
+    they are accepted with a 202 and written in the background, otherwise they are written
+    before responding with a 201.
+    """
+    result = await service.new_interactions(body)
+
+    if result.buffered:
+        response.status_code = status.HTTP_202_ACCEPTED
+
+    return result
+
 @guilds_router.get('/me/interactions')
 async def list_interactions(
         filter_query: Annotated[InteractionQuery, Query()],
+        response: Response,
         _: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
         service: GuildService = Depends(get_guild_service)
 ) -> list[guilds.InteractionOut]:
     """
     Filter interactions by various criteria.
+
+    Returns at most `page_size` results. When there are more, the `X-Next-Cursor` header
+    holds a cursor to pass as `cursor` for the next page.
+    """
+    interactions, next_cursor = await service.get_interactions(filter_query)
+    set_next_cursor(response, next_cursor)
+    return interactions
+
+
+@guilds_router.get('/me/interactions:export', response_class=StreamingResponse,
+                   responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}})
+async def export_interactions(
+        filter_query: Annotated[InteractionQuery, Query()],
+        export_format: ExportFormat = Query(default="ndjson", alias="format"),
+        _: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
+        service: GuildService = Depends(get_guild_service)
+):
+    """
+    Exports every interaction matching the filters, oldest first, as NDJSON or CSV.
+
+    The rows are streamed as they are read, so any range can be exported in one request.
+    `page`, `page_size` and `cursor` are ignored.
     """
-    return await service.get_interactions(filter_query)
+    return StreamingResponse(
+        service.export_interactions(filter_query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="interactions.{export_format}"'}
+    )
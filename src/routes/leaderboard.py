@@ -1,58 +1,78 @@
 from datetime import date
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Security
+from fastapi import APIRouter, Depends, Query, Security
 
 from src.dependencies.auth import get_guild_client
-from src.dependencies.database import db
+from src.dependencies.services import get_leaderboard_service
 from src.models import guilds
 from src.models.auth import TokenPayload, Scope
+from src.models.guilds.leaderboards import Board
+from src.services.leaderboard import LeaderboardService
 
 leaderboard_router = APIRouter(prefix='/guilds/me/leaderboard', tags=['Leaderboards'])
 
 @leaderboard_router.get('/playtime/{month}')
 async def get_playtime_leaderboard(
         month: date,
+        query: Annotated[guilds.LeaderboardQuery, Query()],
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
+        service: LeaderboardService = Depends(get_leaderboard_service),
 ) -> guilds.LeaderboardModel:
     """
-    Returns the guild's playtime leaderboard, in order. Playtime is in seconds.
+    Returns the guild's playtime leaderboard for the month that `month` falls in, in order. Playtime is in seconds.
+    Months after the current one are rejected with a 400.
     """
-    guild_leaderboard = await guilds.LeaderboardModel.fetch_playtime(db, month, auth.guild_id)
-
-    return guild_leaderboard
+    return await service.get(auth.guild_id, "playtime", query, month)
 
 
 @leaderboard_router.get('/currency')
 async def get_currency_leaderboard(
+        query: Annotated[guilds.LeaderboardQuery, Query()],
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
+        service: LeaderboardService = Depends(get_leaderboard_service),
 ) -> guilds.LeaderboardModel:
     """
     Returns the guild's currency leaderboard, in order.
     """
-    guild_leaderboard = await guilds.LeaderboardModel.fetch_currency(db, auth.guild_id)
-
-    return guild_leaderboard
+    return await service.get(auth.guild_id, "currency", query)
 
 
 @leaderboard_router.get('/levels')
 async def get_levels_leaderboard(
+        query: Annotated[guilds.LeaderboardQuery, Query()],
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
+        service: LeaderboardService = Depends(get_leaderboard_service),
 ) -> guilds.LeaderboardModel:
     """
-    Returns the guild's playtime leaderboard, in order. Playtime is in seconds.
+    Returns the guild's levels leaderboard, in order.
     """
-    guild_leaderboard = await guilds.LeaderboardModel.fetch_levels(db, auth.guild_id)
-
-    return guild_leaderboard
+    return await service.get(auth.guild_id, "levels", query)
 
 
 @leaderboard_router.get('/quests')
 async def get_quests_leaderboard(
+        query: Annotated[guilds.LeaderboardQuery, Query()],
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
+        service: LeaderboardService = Depends(get_leaderboard_service),
 ) -> guilds.LeaderboardModel:
     """
-    Returns the guild's playtime leaderboard, in order. Playtime is in seconds.
+    Returns the guild's completed quests leaderboard, in order.
     """
-    guild_leaderboard = await guilds.LeaderboardModel.fetch_quests(db, auth.guild_id)
+    return await service.get(auth.guild_id, "quests", query)
+
 
-    return guild_leaderboard
\ No newline at end of file
+@leaderboard_router.get('/{board}/rank/{thorny_id}')
+async def get_leaderboard_rank(
+        board: Board,
+        thorny_id: int,
+        neighbours: Annotated[int, Query(description="The number of entries to return either side of the user",
+                                         ge=0, le=50)] = 2,
+        month: Annotated[Optional[date], Query(description="The month to rank, required for the playtime board")] = None,
+        auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_READ]),
+        service: LeaderboardService = Depends(get_leaderboard_service),
+) -> guilds.LeaderboardRank:
+    """
+    Returns a user's position on a leaderboard, along with the entries just above and below them.
+    """
+    return await service.get_rank(auth.guild_id, board, thorny_id, neighbours, month)
@@ -4,6 +4,7 @@ from src.dependencies.auth import get_guild_client
 from src.dependencies.services import get_quest_progress_service
 from src.models.auth import TokenPayload, Scope
 
+from src.models.quests.objective_progress import ObjectiveProgressOut, TargetProgressDelta
 from src.models.quests.quest_progress import QuestProgressIn, QuestProgressOut, QuestProgressUpdate
 from src.services.quest_progress import QuestProgressService
 
@@ -13,7 +14,7 @@ quest_progress_router = APIRouter(prefix='/guilds/me/quests/progress', tags=['Qu
 @quest_progress_router.post('', status_code=status.HTTP_201_CREATED)
 async def create_quest_progress(
         body: QuestProgressIn,
-        _: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_QUESTS_WRITE]),
+        auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_QUESTS_WRITE]),
         service: QuestProgressService = Depends(get_quest_progress_service)
 ) -> QuestProgressOut:
     """
@@ -22,7 +23,7 @@ async def create_quest_progress(
     Adds a new quest to a user, tracking their progress.
     Automatically sets the quest progress to "active".
     """
-    return await service.new(body)
+    return await service.new(auth.guild_id, body)
 
 
 @quest_progress_router.get('/user/{thorny_id}')
@@ -81,3 +82,21 @@ async def partial_update_quest_progress(
     Updates a user's quest.
     """
     return await service.update(progress_id, body)
+
+
+@quest_progress_router.patch('/{progress_id}/objectives/{objective_id}/targets')
+async def update_objective_targets(
+        progress_id: int,
+        objective_id: int,
+        body: list[TargetProgressDelta],
+        _: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_QUESTS_WRITE]),
+        service: QuestProgressService = Depends(get_quest_progress_service)
+) -> ObjectiveProgressOut:
+    """
+    Update Objective Target Counts
+
+    Adds to, or sets, the counts of specific targets of an objective without resending the whole objective.
+    Concurrent updates to the same objective never overwrite each other's increments.
+    Prefer `count` over `increment` when a request may be retried.
+    """
+    return await service.update_targets(progress_id, objective_id, body)
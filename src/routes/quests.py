@@ -1,14 +1,15 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Query, Security, Depends, status
+from fastapi import APIRouter, Query, Response, Security, Depends, status
 
 from src.dependencies.auth import get_guild_client
 from src.dependencies.services import get_quest_service
 from src.models.auth import TokenPayload, Scope
 
 from src.models.quests.quest import QuestIn, QuestOut, QuestQuery, QuestUpdate
-from src.models.quests.quest_statistics import QuestStatisticsOut
+from src.models.quests.quest_statistics import QuestStatisticsOut, QuestStatisticsQuery
 from src.services.quest import QuestService
+from src.utils.cursor import set_next_cursor
 
 quests_router = APIRouter(prefix='/guilds/me/quests', tags=['Quests'])
 
@@ -32,13 +33,19 @@ async def create_quest(
 @quests_router.get('')
 async def list_quests(
         filter_query: Annotated[QuestQuery, Query()],
+        response: Response,
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_QUESTS_READ]),
         service: QuestService = Depends(get_quest_service),
 ) -> list[QuestOut]:
     """
     Get a list of Quests
+
+    Returns at most `page_size` results. When there are more, the `X-Next-Cursor` header
+    holds a cursor to pass as `cursor` for the next page.
     """
-    return await service.get_all(auth.guild_id, filter_query)
+    quests, next_cursor = await service.get_all(auth.guild_id, filter_query)
+    set_next_cursor(response, next_cursor)
+    return quests
 
 
 @quests_router.get('/{quest_id}')
@@ -58,6 +65,7 @@ async def get_quest(
 @quests_router.get('/{quest_id}/statistics')
 async def get_quest_statistics(
         quest_id: int,
+        statistics_query: Annotated[QuestStatisticsQuery, Query()],
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_QUESTS_READ]),
         service: QuestService = Depends(get_quest_service),
 ) -> QuestStatisticsOut:
@@ -67,8 +75,9 @@ async def get_quest_statistics(
     Returns aggregated statistics for a specific quest, including funnel data,
     completion timing, per-objective drop-off analysis, and daily activity.
     Useful for quest admins to analyse difficulty, engagement, and player behaviour.
+    The completion time histogram and percentiles can be shaped with the query parameters.
     """
-    return await service.get_statistics(auth.guild_id, quest_id)
+    return await service.get_statistics(auth.guild_id, quest_id, statistics_query)
 
 
 @quests_router.patch('/{quest_id}')
@@ -110,6 +110,5 @@ async def get_playtime(thorny_id: int) -> playtime.PlaytimeSummary:
 async def get_interactions(thorny_id: int) -> interactions.InteractionSummary:
     """
     This returns the user's interaction summary.
-    This may take long to process, so ensure you have the proper timeouts set.
     """
     return await interactions.InteractionSummary.fetch(db, thorny_id)
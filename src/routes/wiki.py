@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Query, Security, Depends, status
+from fastapi import APIRouter, Query, Response, Security, Depends, status
 
 from src.dependencies.auth import get_guild_client
 from src.dependencies.services import get_wiki_service
@@ -8,6 +8,7 @@ from src.models.auth import TokenPayload, Scope
 
 from src.models.wiki.page import PageIn, PageOut, PageQuery, PageUpdate
 from src.services.wiki import WikiService
+from src.utils.cursor import set_next_cursor
 
 wiki_router = APIRouter(prefix='/guilds/me/wiki', tags=['Wiki Pages'])
 
@@ -15,13 +16,19 @@ wiki_router = APIRouter(prefix='/guilds/me/wiki', tags=['Wiki Pages'])
 @wiki_router.get('')
 async def list_wiki_pages(
         filter_query: Annotated[PageQuery, Query()],
+        response: Response,
         auth: TokenPayload = Security(get_guild_client, scopes=[Scope.GUILDS_WIKI_READ]),
         service: WikiService = Depends(get_wiki_service),
 ) -> list[PageOut]:
     """
     Get a list of Wiki Pages
+
+    Returns at most `page_size` results. When there are more, the `X-Next-Cursor` header
+    holds a cursor to pass as `cursor` for the next page.
     """
-    return await service.get_all(auth.guild_id, filter_query)
+    pages, next_cursor = await service.get_all(auth.guild_id, filter_query)
+    set_next_cursor(response, next_cursor)
+    return pages
 
 
 @wiki_router.post('', status_code=status.HTTP_201_CREATED)
@@ -1,8 +1,12 @@
 import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+import asyncpg
 
-from src.dependencies.database import db
 from src.models.guilds import (
     ChannelOut,
+    ConnectionBatchIn,
     ConnectionIn,
     ConnectionOut,
     FeatureOut,
@@ -10,30 +14,42 @@ from src.models.guilds import (
     GuildOut,
     GuildPlaytimeAnalysis,
     GuildUpdate,
+    InteractionBatchOut,
     InteractionIn,
     InteractionOut,
     OnlineMember
 )
 from src.models.guilds.guild import GuildDB
-from src.models.guilds.interaction import InteractionQuery
+from src.models.guilds.interaction import InteractionQuery, InteractionRecord
 from src.models.guilds.session import SessionDB, SessionOut, SessionQuery
-from src.models.users import playtime
 from src.models.users.profile import ProfileOut
 from src.models.users.user import UserOut
 
-from src.repositories.guild import GuildRepository
+from src.dependencies.write_buffer import WriteBehindBuffer
+from src.errors import BadRequest, NotFound
+from src.repositories.guild import GuildRepository, INTERACTION_EXPORT_COLUMNS, SESSION_EXPORT_COLUMNS
+from src.services.quest_progress import QuestProgressService
+from src.settings import settings
 
-from fastapi import HTTPException
 from opentelemetry import trace
 
 from src.repositories.user import UserRepository
+from src.utils.export import ExportFormat, encode_rows
 from src.utils.tracing import traced
 
 
 class GuildService:
-    def __init__(self, guild_repo: GuildRepository, user_repo: UserRepository):
+    def __init__(
+            self,
+            guild_repo: GuildRepository,
+            user_repo: UserRepository,
+            interaction_buffer: WriteBehindBuffer[InteractionRecord],
+            quest_progress_service: QuestProgressService
+    ):
         self.guild_repo = guild_repo
         self.user_repo = user_repo
+        self.interaction_buffer = interaction_buffer
+        self.quest_progress_service = quest_progress_service
 
     async def _to_out(self, guild: GuildDB) -> GuildOut:
         features = await self.get_features(guild.guild_id)
@@ -46,8 +62,7 @@ class GuildService:
         )
 
     async def _session_to_out(self, guild_id: int, session: SessionDB) -> SessionOut:
-        user = await self.user_repo.fetch(guild_id, session.thorny_id)
-        profile = await self.user_repo.fetch_profile(guild_id, session.thorny_id)
+        user, profile = await self.user_repo.load_with_profile(guild_id, session.thorny_id)
 
         return SessionOut(
             start=session.connect_time,
@@ -107,17 +122,17 @@ class GuildService:
         return await self.guild_repo.fetch_online_members(guild_id)
 
     @traced
-    async def get_sessions(self, guild_id: int, query: SessionQuery) -> list[SessionOut]:
+    async def get_sessions(self, guild_id: int, query: SessionQuery) -> tuple[list[SessionOut], Optional[str]]:
         span = trace.get_current_span()
         span.set_attribute("guild.id", guild_id)
 
-        sessions_db = await self.guild_repo.fetch_sessions(guild_id, query)
+        sessions_db, next_cursor = await self.guild_repo.fetch_sessions(guild_id, query)
         span.set_attribute("sessions.count", len(sessions_db))
 
         async with asyncio.TaskGroup() as tg:
             tasks = [tg.create_task(self._session_to_out(guild_id, s)) for s in sessions_db]
 
-        return [t.result() for t in tasks]
+        return [t.result() for t in tasks], next_cursor
 
     @traced
     async def get_playtime_analysis(self, guild_id: int) -> GuildPlaytimeAnalysis:
@@ -132,16 +147,8 @@ class GuildService:
         span.set_attribute("connection.thorny_id", model.thorny_id)
         span.set_attribute("connection.type", model.type)
 
-        ignored = False
-
-        try:
-            user_playtime = await playtime.PlaytimeSummary.fetch(db, model.thorny_id)
-
-            if (model.type == 'connect' and user_playtime.session) or (model.type == 'disconnect' and not user_playtime.session):
-                ignored = True
-        except HTTPException:
-            # In case the playtime summary fetch fails, we still want to create the connection
-            pass
+        has_session = await self.guild_repo.has_open_session(model.thorny_id)
+        ignored = (model.type == 'connect' and has_session) or (model.type == 'disconnect' and not has_session)
 
         span.set_attribute("connection.ignored", ignored)
 
@@ -149,12 +156,136 @@ class GuildService:
 
         return ConnectionOut(**connection_db.model_dump())
 
+    @traced
+    async def new_connections(self, models: list[ConnectionBatchIn]) -> list[ConnectionOut]:
+        span = trace.get_current_span()
+        span.set_attribute("connections.count", len(models))
+
+        if not models:
+            return []
+
+        # Times without a timezone are taken to be UTC, so they can be compared with the aware times below
+        models = [
+            m.model_copy(update={"time": m.time.replace(tzinfo=timezone.utc)})
+            if m.time is not None and m.time.tzinfo is None else m
+            for m in models
+        ]
+
+        # Events without a time are recorded at the time of the request
+        now = datetime.now(timezone.utc)
+        last_time: dict[int, datetime] = {}
+        for index, m in enumerate(models):
+            time = m.time or now
+            if m.thorny_id in last_time and time < last_time[m.thorny_id]:
+                raise BadRequest(f"Connection {index} is earlier than the one before it for ThornyID {m.thorny_id}")
+            last_time[m.thorny_id] = time
+
+        async with self.guild_repo.db.get_transaction() as conn:
+            open_sessions = await self.guild_repo.fetch_open_sessions(list({m.thorny_id for m in models}), conn)
+
+            # A single ordered pass: a connect is ignored if a session is already open,
+            # a disconnect is ignored if there is nothing to close
+            ignored = []
+            for index, m in enumerate(models):
+                is_open = m.thorny_id in open_sessions
+                ignore = is_open if m.type == 'connect' else not is_open
+                ignored.append(ignore)
+
+                if not ignore and m.type == 'connect':
+                    open_sessions[m.thorny_id] = m.time or now
+                elif not ignore:
+                    # A session cannot end before it started, that would be negative playtime
+                    if (m.time or now) < open_sessions[m.thorny_id]:
+                        raise BadRequest(f"Connection {index} disconnects before its session connected")
+                    open_sessions.pop(m.thorny_id)
+
+            connections_db = await self.guild_repo.create_connections(models, ignored, conn)
+
+        span.set_attribute("connections.ignored", sum(ignored))
+
+        return [ConnectionOut(**c.model_dump()) for c in connections_db]
+
+    @staticmethod
+    def _check_interaction_query(query: InteractionQuery):
+        if query.chunk is not None and len(query.chunk) != 2:
+            raise BadRequest('chunk must be the chunk X and Z')
+        if query.coordinates is not None and len(query.coordinates) != 3:
+            raise BadRequest('coordinates must be X, Y and Z')
+        if query.coordinates_end is not None and len(query.coordinates_end) != 3:
+            raise BadRequest('coordinates_end must be X, Y and Z')
+        # x, y and z are stored as smallint
+        for name, coordinates in (('coordinates', query.coordinates), ('coordinates_end', query.coordinates_end)):
+            if coordinates is not None and not all(-32768 <= c <= 32767 for c in coordinates):
+                raise BadRequest(f'{name} must be between -32768 and 32767')
+        if query.radius is not None and (query.coordinates is None or query.coordinates_end is not None):
+            raise BadRequest('radius requires coordinates, and cannot be combined with coordinates_end')
+
     @traced
     async def new_interaction(self, model: InteractionIn) -> InteractionOut:
-        interaction_db = await self.guild_repo.create_interaction(model)
+        async with self.guild_repo.db.get_transaction() as conn:
+            interaction_db = await self.guild_repo.create_interaction(model, conn)
+
+            if settings.QUEST_MATCHING_ENABLED:
+                await self.quest_progress_service.match_interactions([
+                    InteractionRecord(interaction_db.thorny_id, interaction_db.type, interaction_db.coordinates,
+                                      interaction_db.reference, interaction_db.mainhand, interaction_db.dimension,
+                                      interaction_db.time)
+                ], conn)
+
         return InteractionOut(**interaction_db.model_dump())
 
     @traced
-    async def get_interactions(self, query: InteractionQuery) -> list[InteractionOut]:
-        interactions_db = await self.guild_repo.fetch_interactions(query)
-        return [InteractionOut(**i.model_dump()) for i in interactions_db]
\ No newline at end of file
+    async def new_interactions(self, models: list[InteractionIn]) -> InteractionBatchOut:
+        span = trace.get_current_span()
+        span.set_attribute("interactions.count", len(models))
+
+        # Stamped on receipt, so buffered interactions keep the time they happened at
+        now = datetime.now(timezone.utc)
+        records = [
+            InteractionRecord(m.thorny_id, m.type, m.coordinates, m.reference, m.mainhand, m.dimension, now)
+            for m in models
+        ]
+
+        buffered = self.interaction_buffer.running
+        span.set_attribute("interactions.buffered", buffered)
+
+        if buffered:
+            self.interaction_buffer.put(records)
+        elif records:
+            try:
+                await self.write_interactions(records)
+            except asyncpg.ForeignKeyViolationError:
+                raise NotFound("User")
+
+        return InteractionBatchOut(accepted=len(records), buffered=buffered)
+
+    @traced
+    async def write_interactions(self, records: list[InteractionRecord]):
+        async with self.guild_repo.db.get_transaction() as conn:
+            await self.guild_repo.create_interactions(records, conn)
+
+            if settings.QUEST_MATCHING_ENABLED:
+                await self.quest_progress_service.match_interactions(records, conn)
+
+    @traced
+    async def get_interactions(self, query: InteractionQuery) -> tuple[list[InteractionOut], Optional[str]]:
+        self._check_interaction_query(query)
+
+        interactions_db, next_cursor = await self.guild_repo.fetch_interactions(query)
+        return [InteractionOut(**i.model_dump()) for i in interactions_db], next_cursor
+
+    @traced
+    def export_interactions(self, query: InteractionQuery, export_format: ExportFormat) -> AsyncIterator[bytes]:
+        # Checked up front, an error can no longer be returned once the response has started streaming
+        self._check_interaction_query(query)
+
+        rows = self.guild_repo.stream_interactions(query)
+        return encode_rows(rows, export_format, INTERACTION_EXPORT_COLUMNS)
+
+    @traced
+    def export_sessions(self, guild_id: int, query: SessionQuery, export_format: ExportFormat) -> AsyncIterator[bytes]:
+        span = trace.get_current_span()
+        span.set_attribute("guild.id", guild_id)
+
+        rows = self.guild_repo.stream_sessions(guild_id, query)
+        return encode_rows(rows, export_format, SESSION_EXPORT_COLUMNS)
@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from opentelemetry import trace
+
+from src.models.guilds.leaderboards import (
+    ALL_TIME,
+    MONTHLY_BOARDS,
+    Board,
+    LeaderboardModel,
+    LeaderboardQuery,
+    LeaderboardRank,
+    month_period
+)
+from src.errors import BadRequest
+from src.repositories.leaderboard import LeaderboardRepository
+from src.settings import settings
+from src.utils.tracing import traced
+
+# Sessions that started in a month can still be closing shortly after it ends
+MONTH_SETTLE_TIME = timedelta(days=1)
+
+
+class LeaderboardService:
+    def __init__(self, leaderboard_repo: LeaderboardRepository):
+        self.leaderboard_repo = leaderboard_repo
+
+    @staticmethod
+    def _current_periods() -> list[str]:
+        return [ALL_TIME, month_period(datetime.now(timezone.utc).date())]
+
+    @staticmethod
+    def _is_stale(period: str, month: Optional[date], refreshed_at: Optional[datetime]) -> bool:
+        if refreshed_at is None:
+            return True
+
+        now = datetime.now(timezone.utc)
+        if period == ALL_TIME or period == month_period(now.date()):
+            return refreshed_at < now - timedelta(seconds=settings.LEADERBOARD_REFRESH_INTERVAL_S)
+
+        # A past month is final once it has settled, so it is only ranked again if it was ranked too early
+        month_end = datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=timezone.utc)
+        return refreshed_at < month_end + MONTH_SETTLE_TIME
+
+    async def _refresh(self, guild_id: int, board: Board, period: str, month: Optional[date]):
+        async with self.leaderboard_repo.db.get_transaction() as conn:
+            await self.leaderboard_repo.refresh(guild_id, board, period, month, conn)
+
+    async def _ensure_fresh(self, guild_id: int, board: Board, month: Optional[date]) -> tuple[str, bool]:
+        """
+        Ranks the board first if its snapshot is missing or overdue.
+        Returns its period, and whether it was just ranked and has to be read back from the primary.
+        """
+        span = trace.get_current_span()
+        span.set_attribute("guild.id", guild_id)
+        span.set_attribute("leaderboard.board", board)
+
+        if board in MONTHLY_BOARDS and month is None:
+            raise BadRequest(f"The {board} leaderboard is ranked per month, a month is required")
+
+        month = month.replace(day=1) if board in MONTHLY_BOARDS else None
+        if month and month > datetime.now(timezone.utc).date():
+            raise BadRequest(f"The {board} leaderboard for {month_period(month)} has not started yet")
+
+        period = month_period(month) if month else ALL_TIME
+        span.set_attribute("leaderboard.period", period)
+
+        refreshed_at = await self.leaderboard_repo.fetch_refreshed_at(guild_id, board, period)
+        stale = self._is_stale(period, month, refreshed_at)
+        span.set_attribute("leaderboard.refreshed", stale)
+
+        if stale:
+            await self._refresh(guild_id, board, period, month)
+
+        return period, stale
+
+    @traced
+    async def get(
+            self,
+            guild_id: int,
+            board: Board,
+            query: LeaderboardQuery,
+            month: Optional[date] = None
+    ) -> LeaderboardModel:
+        period, refreshed = await self._ensure_fresh(guild_id, board, month)
+
+        with self.leaderboard_repo.db.primary() if refreshed else nullcontext():
+            entries, total = await asyncio.gather(
+                self.leaderboard_repo.fetch(guild_id, board, period, query.limit, query.offset),
+                self.leaderboard_repo.fetch_total(guild_id, board, period)
+            )
+
+        return LeaderboardModel(leaderboard=entries, total=total)
+
+    @traced
+    async def get_rank(
+            self,
+            guild_id: int,
+            board: Board,
+            thorny_id: int,
+            neighbours: int,
+            month: Optional[date] = None
+    ) -> LeaderboardRank:
+        span = trace.get_current_span()
+        span.set_attribute("user.thorny_id", thorny_id)
+
+        period, refreshed = await self._ensure_fresh(guild_id, board, month)
+
+        with self.leaderboard_repo.db.primary() if refreshed else nullcontext():
+            around, total = await asyncio.gather(
+                self.leaderboard_repo.fetch_around(guild_id, board, period, thorny_id, neighbours),
+                self.leaderboard_repo.fetch_total(guild_id, board, period)
+            )
+
+        return LeaderboardRank(
+            entry=next(e for e in around if e.thorny_id == thorny_id),
+            neighbours=around,
+            total=total
+        )
+
+    @traced
+    async def refresh_stale(self):
+        """Re-ranks every snapshot of the current month and all-time boards that is due, ahead of it being read"""
+        span = trace.get_current_span()
+
+        older_than = datetime.now(timezone.utc) - timedelta(seconds=settings.LEADERBOARD_REFRESH_INTERVAL_S)
+        stale = await self.leaderboard_repo.fetch_stale(older_than, self._current_periods())
+        span.set_attribute("leaderboard.stale", len(stale))
+
+        for guild_id, board, period in stale:
+            month = None if period == ALL_TIME else datetime.strptime(period, "%Y-%m").date()
+            await self._refresh(guild_id, board, period, month)
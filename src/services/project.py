@@ -18,9 +18,8 @@ class ProjectService:
         self.user_repo = user_repo
 
     async def _to_out(self, project: ProjectDB) -> ProjectOut:
-        owner, profile, stat = await asyncio.gather(
-            self.user_repo.fetch(project.guild_id, project.owner_id),
-            self.user_repo.fetch_profile(project.guild_id, project.owner_id),
+        (owner, profile), stat = await asyncio.gather(
+            self.user_repo.load_with_profile(project.guild_id, project.owner_id),
             self.project_repo.fetch_status(project.project_id)
         )
 
@@ -1,14 +1,17 @@
 import asyncio
+from typing import Literal, Optional
 
 from opentelemetry import trace
 
 from src.models.quests.objective import ObjectiveOut
 from src.models.quests.quest import QuestDB, QuestIn, QuestOut, QuestQuery, QuestUpdate
 from src.models.quests.quest_statistics import (
+    CompletionPercentile,
     DailyActivityEntry,
     ObjectiveStatistics,
     QuestCompletionBucket,
     QuestStatisticsOut,
+    QuestStatisticsQuery,
 )
 from src.models.quests.reward import RewardOut
 from src.models.users.profile import ProfileOut
@@ -18,6 +21,8 @@ from src.repositories.quests.quest import QuestRepository
 from src.repositories.quests.quest_statistics import QuestStatisticsRepository
 from src.repositories.quests.reward import RewardRepository
 from src.repositories.user import UserRepository
+from src.utils.cache import LRUCache
+from src.utils.histogram import estimate_quantile, linear_edges, log_edges, rebin
 from src.utils.tracing import traced
 
 
@@ -29,60 +34,89 @@ class QuestService:
             reward_repo: RewardRepository,
             user_repo: UserRepository,
             statistics_repo: QuestStatisticsRepository,
+            quest_cache: LRUCache[tuple[int, int], QuestOut],
     ):
         self.quest_repo = quest_repo
         self.objective_repo = objective_repo
         self.reward_repo = reward_repo
         self.user_repo = user_repo
         self.statistics_repo = statistics_repo
+        self.quest_cache = quest_cache
 
-    async def _to_out(self, quest: QuestDB) -> QuestOut:
-        creator_db, profile_db, objectives_db = await asyncio.gather(
-            self.user_repo.fetch(quest.guild_id, quest.created_by),
-            self.user_repo.fetch_profile(quest.guild_id, quest.created_by),
-            self.objective_repo.fetch_all(quest.quest_id)
-        )
+    async def _to_outs(self, quests: list[QuestDB], generation: int) -> list[QuestOut]:
+        """
+        Hydrates quests, from the cache where possible. `generation` is the cache's generation from before
+        `quests` were read, so that quests changed since are not cached with their old contents.
+        """
+        quests_out = {q.quest_id: self.quest_cache.get((q.guild_id, q.quest_id)) for q in quests}
+        missing = [q for q in quests if quests_out[q.quest_id] is None]
 
-        rewards_db = await asyncio.gather(
-            *[self.reward_repo.fetch_all(o.objective_id) for o in objectives_db]
-        )
+        for quest_out, quest in zip(await self._hydrate(missing), missing):
+            self.quest_cache.set((quest.guild_id, quest.quest_id), quest_out, generation=generation)
+            quests_out[quest.quest_id] = quest_out
 
-        return QuestOut(
-            **quest.model_dump(exclude={"created_by"}),
-            created_by=UserOut(
-                **creator_db.model_dump(),
-                profile=ProfileOut(**profile_db.model_dump())
-            ),
-            objectives=[
-                ObjectiveOut(
-                    **o.model_dump(),
-                    rewards=[RewardOut(**r.model_dump()) for r in objective_rewards]
-                )
-                for o, objective_rewards in zip(objectives_db, rewards_db)
-            ]
+        return [quests_out[q.quest_id] for q in quests]
+
+    async def _hydrate(self, quests: list[QuestDB]) -> list[QuestOut]:
+        if not quests:
+            return []
+
+        # Objectives, rewards and creators for every quest at once, whatever the number of quests
+        quest_ids = [q.quest_id for q in quests]
+
+        objectives_db, rewards_db, *creators_db = await asyncio.gather(
+            self.objective_repo.fetch_all_by_quests(quest_ids),
+            self.reward_repo.fetch_all_by_quests(quest_ids),
+            *[self.user_repo.load_with_profile(q.guild_id, q.created_by) for q in quests]
         )
 
+        return [
+            QuestOut(
+                **quest.model_dump(exclude={"created_by"}),
+                created_by=UserOut(
+                    **creator_db.model_dump(),
+                    profile=ProfileOut(**profile_db.model_dump())
+                ),
+                objectives=[
+                    ObjectiveOut(
+                        **o.model_dump(),
+                        rewards=[RewardOut(**r.model_dump()) for r in rewards_db.get(o.objective_id, [])]
+                    )
+                    for o in objectives_db[quest.quest_id]
+                ]
+            )
+            for quest, (creator_db, profile_db) in zip(quests, creators_db)
+        ]
+
+    async def _to_out(self, quest: QuestDB, generation: int) -> QuestOut:
+        quests_out = await self._to_outs([quest], generation)
+        return quests_out[0]
+
     @traced
     async def get(self, guild_id: int, quest_id: int) -> QuestOut:
         span = trace.get_current_span()
         span.set_attribute("guild.id", guild_id)
         span.set_attribute("quest.id", quest_id)
 
+        cached = self.quest_cache.get((guild_id, quest_id))
+        span.set_attribute("quest.cached", cached is not None)
+        if cached is not None:
+            return cached
+
+        generation = self.quest_cache.generation()
         quest_db = await self.quest_repo.fetch(quest_id, guild_id)
-        return await self._to_out(quest_db)
+        return await self._to_out(quest_db, generation)
 
     @traced
-    async def get_all(self, guild_id: int, query: QuestQuery) -> list[QuestOut]:
+    async def get_all(self, guild_id: int, query: QuestQuery) -> tuple[list[QuestOut], Optional[str]]:
         span = trace.get_current_span()
         span.set_attribute("guild.id", guild_id)
 
-        quests_db = await self.quest_repo.fetch_all(guild_id, query)
+        generation = self.quest_cache.generation()
+        quests_db, next_cursor = await self.quest_repo.fetch_all(guild_id, query)
         span.set_attribute("quests.count", len(quests_db))
 
-        async with asyncio.TaskGroup() as tg:
-            tasks = [tg.create_task(self._to_out(q)) for q in quests_db]
-
-        return [t.result() for t in tasks]
+        return await self._to_outs(quests_db, generation), next_cursor
 
     @traced
     async def new(self, guild_id: int, model: QuestIn) -> QuestOut:
@@ -100,7 +134,10 @@ class QuestService:
                 for r in o.rewards:
                     await self.reward_repo.create(objective_db.quest_id, objective_db.objective_id, r, conn)
 
-        return await self._to_out(quest_db)
+            await self.quest_repo.notify_changed(guild_id, quest_db.quest_id, conn)
+
+        self.quest_cache.invalidate((guild_id, quest_db.quest_id))
+        return await self._to_out(quest_db, self.quest_cache.generation())
 
     @traced
     async def update(self, guild_id: int, quest_id: int, model: QuestUpdate) -> QuestOut:
@@ -133,23 +170,28 @@ class QuestService:
                         await self.reward_repo.create(quest_db.quest_id, objective_db.objective_id, r, conn)
                         rewards_created += 1
 
+            await self.quest_repo.notify_changed(guild_id, quest_id, conn)
+
+        self.quest_cache.invalidate((guild_id, quest_id))
+
         span.set_attribute("quest.objectives_updated", objectives_updated)
         span.set_attribute("quest.objectives_created", objectives_created)
         span.set_attribute("quest.rewards_updated", rewards_updated)
         span.set_attribute("quest.rewards_created", rewards_created)
 
-        return await self._to_out(quest_db)
+        return await self._to_out(quest_db, self.quest_cache.generation())
 
     @traced
-    async def get_statistics(self, guild_id: int, quest_id: int) -> QuestStatisticsOut:
+    async def get_statistics(self, guild_id: int, quest_id: int, query: QuestStatisticsQuery) -> QuestStatisticsOut:
         span = trace.get_current_span()
         span.set_attribute("guild.id", guild_id)
         span.set_attribute("quest.id", quest_id)
 
-        summary, objective_rows, completion_times, daily_rows = await asyncio.gather(
+        summary, objective_rows, completion_counts, objective_counts, daily_rows = await asyncio.gather(
             self.statistics_repo.fetch_quest_summary(quest_id, guild_id),
             self.statistics_repo.fetch_objective_statistics(quest_id),
-            self.statistics_repo.fetch_completion_times(quest_id),
+            self.statistics_repo.fetch_completion_histogram(quest_id),
+            self.statistics_repo.fetch_objective_histograms(quest_id),
             self.statistics_repo.fetch_daily_activity(quest_id),
         )
 
@@ -160,7 +202,22 @@ class QuestService:
         completion_rate = total_completed / total_accepts if total_accepts > 0 else 0.0
         started_rate = total_started / total_accepts if total_accepts > 0 else 0.0
 
-        histogram = _build_histogram(completion_times)
+        fastest = summary['fastest_completion_seconds']
+        slowest = summary['slowest_completion_seconds']
+
+        histogram = _build_histogram(completion_counts, fastest, slowest, query.histogram_buckets, query.histogram_scale)
+        median_completion_time = estimate_quantile(completion_counts, 0.5, fastest, slowest)
+
+        percentiles = []
+        for p in query.percentiles:
+            seconds = estimate_quantile(completion_counts, p, fastest, slowest)
+            if seconds is not None:
+                percentiles.append(CompletionPercentile(percentile=p, seconds=int(seconds)))
+
+        objective_medians = {
+            objective_id: estimate_quantile(counts, 0.5)
+            for objective_id, counts in objective_counts.items()
+        }
 
         objectives = [
             ObjectiveStatistics(
@@ -179,7 +236,7 @@ class QuestService:
                     if row['players_reached'] else 0.0
                 ),
                 avg_time_seconds=int(row['avg_time_seconds']) if row['avg_time_seconds'] is not None else None,
-                median_time_seconds=int(row['median_time_seconds']) if row['median_time_seconds'] is not None else None,
+                median_time_seconds=int(objective_medians[row['objective_id']]) if row['objective_id'] in objective_medians else None,
             )
             for row in objective_rows
         ]
@@ -196,13 +253,14 @@ class QuestService:
             completion_rate=completion_rate,
             started_rate=started_rate,
             avg_completion_time_seconds=int(summary['avg_completion_time_seconds']) if summary['avg_completion_time_seconds'] is not None else None,
-            median_completion_time_seconds=int(summary['median_completion_time_seconds']) if summary['median_completion_time_seconds'] is not None else None,
-            fastest_completion_seconds=int(summary['fastest_completion_seconds']) if summary['fastest_completion_seconds'] is not None else None,
-            slowest_completion_seconds=int(summary['slowest_completion_seconds']) if summary['slowest_completion_seconds'] is not None else None,
+            median_completion_time_seconds=int(median_completion_time) if median_completion_time is not None else None,
+            fastest_completion_seconds=int(fastest) if fastest is not None else None,
+            slowest_completion_seconds=int(slowest) if slowest is not None else None,
             unique_players=summary['unique_players'] or 0,
             repeat_attempt_players=summary['repeat_attempt_players'] or 0,
             objectives=objectives,
             completion_time_histogram=histogram,
+            completion_time_percentiles=percentiles,
             daily_activity=[
                 DailyActivityEntry(
                     date=row['date'],
@@ -215,34 +273,34 @@ class QuestService:
         )
 
 
-def _build_histogram(durations: list[float], num_buckets: int = 10) -> list[QuestCompletionBucket]:
-    """Splits completion durations into evenly-spaced buckets."""
-    if not durations:
+def _build_histogram(
+        counts: dict[int, int],
+        fastest: Optional[float],
+        slowest: Optional[float],
+        num_buckets: int = 10,
+        scale: Literal["linear", "log"] = "linear"
+) -> list[QuestCompletionBucket]:
+    """
+    Splits the stored completion time buckets into `num_buckets` buckets between the fastest and slowest.
+    Works from the stored buckets alone, so the cost does not grow with the number of completions.
+    """
+    if not counts or fastest is None or slowest is None:
         return []
 
-    min_d = min(durations)
-    max_d = max(durations)
-
-    if min_d == max_d:
+    if fastest == slowest:
         return [QuestCompletionBucket(
-            bucket_start_seconds=int(min_d),
-            bucket_end_seconds=int(max_d),
-            count=len(durations)
+            bucket_start_seconds=int(fastest),
+            bucket_end_seconds=int(slowest),
+            count=sum(counts.values())
         )]
 
-    bucket_size = (max_d - min_d) / num_buckets
-    buckets: list[QuestCompletionBucket] = []
+    edges = log_edges(fastest, slowest, num_buckets) if scale == "log" else linear_edges(fastest, slowest, num_buckets)
 
-    for i in range(num_buckets):
-        start = min_d + i * bucket_size
-        end = min_d + (i + 1) * bucket_size
-        count = sum(1 for d in durations if start <= d < end)
-        if i == num_buckets - 1:
-            count = sum(1 for d in durations if start <= d <= end)
-        buckets.append(QuestCompletionBucket(
+    return [
+        QuestCompletionBucket(
             bucket_start_seconds=int(start),
             bucket_end_seconds=int(end),
             count=count,
-        ))
-
-    return buckets
\ No newline at end of file
+        )
+        for start, end, count in zip(edges, edges[1:], rebin(counts, edges))
+    ]
@@ -1,12 +1,23 @@
 import asyncio
+from collections import defaultdict
 from datetime import datetime
+from uuid import UUID
 
+from asyncpg.pool import PoolConnectionProxy
 from opentelemetry import trace
 
-from src.models.quests.objective import ObjectiveDB, ObjectiveOut
+from src.errors import BadRequest
+from src.models.guilds.interaction import InteractionRecord
+from src.models.quests.objective import ObjectiveBase, ObjectiveDB, ObjectiveOut
 from src.models.quests.objective_customization.progress import CUSTOMIZATION_TYPE_MAP, CustomizationProgress
-from src.models.quests.objective_progress import ObjectiveProgressIn, ObjectiveProgressOut
+from src.models.quests.objective_progress import (
+    ObjectiveProgressIn,
+    ObjectiveProgressMatch,
+    ObjectiveProgressOut,
+    TargetProgressDelta
+)
 from src.models.quests.objective_targets.progress import TARGET_TYPE_MAP
+from src.models.quests.objective_targets.target import TARGET_REFERENCE_MAP
 from src.models.quests.quest import QuestDB, QuestIn, QuestOut, QuestQuery, QuestUpdate
 from src.models.quests.quest_progress import QuestProgressDB, QuestProgressIn, QuestProgressOut, QuestProgressUpdate
 from src.models.quests.reward import RewardOut
@@ -18,6 +29,7 @@ from src.repositories.quests.quest import QuestRepository
 from src.repositories.quests.quest_progress import QuestProgressRepository
 from src.repositories.quests.reward import RewardRepository
 from src.repositories.user import UserRepository
+from src.utils.cache import LRUCache
 from src.utils.tracing import traced
 
 
@@ -28,11 +40,13 @@ class QuestProgressService:
             objective_repo: ObjectiveRepository,
             quest_progress_repo: QuestProgressRepository,
             objective_progress_repo: ObjectiveProgressRepository,
+            quest_cache: LRUCache[tuple[int, int], QuestOut],
     ):
         self.quest_repo = quest_repo
         self.objective_repo = objective_repo
         self.quest_progress_repo = quest_progress_repo
         self.objective_progress_repo = objective_progress_repo
+        self.quest_cache = quest_cache
 
     async def _to_out(self, quest: QuestProgressDB) -> QuestProgressOut:
         objectives_db = await self.objective_progress_repo.fetch_all(quest.progress_id)
@@ -43,7 +57,7 @@ class QuestProgressService:
         )
 
     @staticmethod
-    async def _generate_target_progress(objective: ObjectiveDB):
+    async def _generate_target_progress(objective: ObjectiveBase):
         target_progress = []
         for target in objective.targets:
             target_model = TARGET_TYPE_MAP.get(target.target_type, None)
@@ -54,7 +68,7 @@ class QuestProgressService:
         return target_progress
 
     @staticmethod
-    async def _generate_customization_progress(objective: ObjectiveDB):
+    async def _generate_customization_progress(objective: ObjectiveBase):
         customization_progress = {}
         for customization in objective.customizations.model_dump().keys():
             customization_model = CUSTOMIZATION_TYPE_MAP.get(customization, None)
@@ -64,6 +78,129 @@ class QuestProgressService:
 
         return CustomizationProgress(**customization_progress)
 
+    @staticmethod
+    def _is_matchable(objective: ObjectiveProgressMatch) -> bool:
+        # Timers, death counts and natural blocks depend on game state, so those objectives stay with the game server
+        customizations = objective.customizations
+        return not (customizations.timer or customizations.maximum_deaths or customizations.natural_block)
+
+    @staticmethod
+    def _passes_customizations(objective: ObjectiveProgressMatch, record: InteractionRecord) -> bool:
+        mainhand = objective.customizations.mainhand
+        if mainhand and record.mainhand != mainhand.item:
+            return False
+
+        location = objective.customizations.location
+        if location:
+            x, y, z = record.coordinates
+            center_x, center_y, center_z = location.coordinates
+
+            if (abs(x - center_x) > location.horizontal_radius or abs(z - center_z) > location.horizontal_radius
+                    or abs(y - center_y) > location.vertical_radius):
+                return False
+
+        return True
+
+    @staticmethod
+    def _count_towards(objective: ObjectiveProgressMatch, target_uuid: UUID) -> bool:
+        """Adds one to a target's progress, if the objective's logic lets that target be counted right now"""
+        required = {t.target_uuid: t.count for t in objective.targets}
+        progress = next((p for p in objective.target_progress if p.target_uuid == target_uuid), None)
+        if progress is None:
+            return False
+
+        if objective.logic == "sequential":
+            current = next((p for p in objective.target_progress if p.count < required.get(p.target_uuid, 0)), None)
+            if current is not progress:
+                return False
+
+        if objective.logic != "or" and progress.count >= required[target_uuid]:
+            return False
+
+        progress.count += 1
+        return True
+
+    @staticmethod
+    def _is_complete(objective: ObjectiveProgressMatch) -> bool:
+        required = {t.target_uuid: t.count for t in objective.targets}
+
+        if objective.logic == "or":
+            if objective.target_count is not None:
+                return sum(p.count for p in objective.target_progress) >= objective.target_count
+            return any(p.count >= required.get(p.target_uuid, 0) for p in objective.target_progress)
+
+        return all(p.count >= required.get(p.target_uuid, 0) for p in objective.target_progress)
+
+    @staticmethod
+    def _index(
+            index: dict[tuple[int, str, str], list[tuple[ObjectiveProgressMatch, UUID]]],
+            objective: ObjectiveProgressMatch
+    ):
+        for target in objective.targets:
+            reference = getattr(target, TARGET_REFERENCE_MAP[target.target_type])
+            index[(objective.thorny_id, target.target_type, reference)].append((objective, target.target_uuid))
+
+    @traced
+    async def match_interactions(self, records: list[InteractionRecord], conn: PoolConnectionProxy):
+        """
+        Counts interactions towards the targets of their users' active objectives,
+        completing objectives and advancing quests as they are reached.
+
+        Runs within the transaction writing the interactions, so progress is
+        never counted for interactions that were not written.
+        """
+        span = trace.get_current_span()
+        span.set_attribute("interactions.count", len(records))
+
+        objectives = await self.objective_progress_repo.fetch_matchable(list({r.thorny_id for r in records}), conn)
+        span.set_attribute("objectives.count", len(objectives))
+
+        quests: dict[int, list[ObjectiveProgressMatch]] = defaultdict(list)
+        index: dict[tuple[int, str, str], list[tuple[ObjectiveProgressMatch, UUID]]] = defaultdict(list)
+        for o in objectives:
+            quests[o.progress_id].append(o)
+
+            if o.status == "active" and self._is_matchable(o):
+                self._index(index, o)
+
+        changed: dict[tuple[int, int], ObjectiveProgressMatch] = {}
+        completed_quests: dict[int, datetime] = {}
+
+        for r in records:
+            for objective, target_uuid in list(index.get((r.thorny_id, r.type, r.reference), [])):
+                if objective.status != "active" or not self._passes_customizations(objective, r):
+                    continue
+
+                if not self._count_towards(objective, target_uuid):
+                    continue
+
+                changed[(objective.progress_id, objective.objective_id)] = objective
+
+                if not self._is_complete(objective):
+                    continue
+
+                objective.status = "completed"
+                objective.end_time = r.time
+
+                upcoming = next((o for o in quests[objective.progress_id] if o.status == "pending"), None)
+                if upcoming:
+                    upcoming.status = "active"
+                    upcoming.start_time = r.time
+                    changed[(upcoming.progress_id, upcoming.objective_id)] = upcoming
+
+                    if self._is_matchable(upcoming):
+                        self._index(index, upcoming)
+                elif all(o.status == "completed" for o in quests[objective.progress_id]):
+                    completed_quests[objective.progress_id] = r.time
+
+        span.set_attribute("objectives.updated", len(changed))
+        span.set_attribute("progress.completed", len(completed_quests))
+
+        if changed:
+            await self.objective_progress_repo.update_many(list(changed.values()), conn)
+        if completed_quests:
+            await self.quest_progress_repo.complete_many(completed_quests, conn)
+
     @traced
     async def get(self, progress_id: int) -> QuestProgressOut:
         span = trace.get_current_span()
@@ -129,41 +266,39 @@ class QuestProgressService:
         return await self.update(quest_progress.progress_id, quest_update)
 
     @traced
-    async def new(self, model: QuestProgressIn) -> QuestProgressOut:
+    async def new(self, guild_id: int, model: QuestProgressIn) -> QuestProgressOut:
         span = trace.get_current_span()
+        span.set_attribute("guild.id", guild_id)
         span.set_attribute("quest.id", model.quest_id)
 
-        objectives_db = await self.objective_repo.fetch_all(model.quest_id)
+        cached = self.quest_cache.get((guild_id, model.quest_id))
+        span.set_attribute("quest.cached", cached is not None)
+
+        objectives_db = cached.objectives if cached else await self.objective_repo.fetch_all(model.quest_id)
         span.set_attribute("quest.objectives_count", len(objectives_db))
 
+        objectives_progress = [
+            ObjectiveProgressIn(
+                target_progress=await self._generate_target_progress(o),
+                customization_progress=await self._generate_customization_progress(o)
+            ) for o in objectives_db
+        ]
+
         async with self.quest_repo.db.get_transaction() as conn:
             quest_progress_db = await self.quest_progress_repo.create(model, conn)
             span.set_attribute("progress.id", quest_progress_db.progress_id)
 
-            for o in objectives_db:
-                await self.objective_progress_repo.create(
-                    quest_progress_db.progress_id,
-                    o.objective_id,
-                    ObjectiveProgressIn(
-                        target_progress=await self._generate_target_progress(o),
-                        customization_progress=await self._generate_customization_progress(o)
-                    ),
-                    conn
-                )
-
-        quest_update = QuestProgressUpdate(**{
-            "objectives": [
-                {
-                    "objective_id": objectives_db[0].objective_id,
-                    "status": "active",
-                    "start_time": datetime.now()
-                }
-            ]
-        })
-
-        await self.update(quest_progress_db.progress_id, quest_update)
+            objectives_progress_db = await self.objective_progress_repo.create_many(
+                quest_progress_db.progress_id,
+                [o.objective_id for o in objectives_db],
+                objectives_progress,
+                conn
+            )
 
-        return await self._to_out(quest_progress_db)
+        return QuestProgressOut(
+            **quest_progress_db.model_dump(),
+            objectives=[ObjectiveProgressOut(**o.model_dump()) for o in objectives_progress_db]
+        )
 
     @traced
     async def update(self, progress_id: int, model: QuestProgressUpdate) -> QuestProgressOut:
@@ -185,4 +320,29 @@ class QuestProgressService:
                 else:
                     await self.objective_progress_repo.create(quest_progress_db.quest_id, o.objective_id, o, conn)
 
-        return await self._to_out(quest_progress_db)
\ No newline at end of file
+        return await self._to_out(quest_progress_db)
+
+    @traced
+    async def update_targets(
+            self,
+            progress_id: int,
+            objective_id: int,
+            deltas: list[TargetProgressDelta]
+    ) -> ObjectiveProgressOut:
+        span = trace.get_current_span()
+        span.set_attribute("progress.id", progress_id)
+        span.set_attribute("objective.id", objective_id)
+        span.set_attribute("targets.submitted", len(deltas))
+
+        target_uuids = {d.target_uuid for d in deltas}
+        if len(target_uuids) != len(deltas):
+            raise BadRequest("Each target can only be updated once per request")
+
+        async with self.quest_repo.db.get_transaction() as conn:
+            objective_db = await self.objective_progress_repo.update_targets(progress_id, objective_id, deltas, conn)
+
+            # Raising here rolls the update back, so either every target is updated or none are
+            if not target_uuids <= {t.target_uuid for t in objective_db.target_progress}:
+                raise BadRequest("Unknown target_uuid for this objective")
+
+        return ObjectiveProgressOut(**objective_db.model_dump())
@@ -1,4 +1,5 @@
 import asyncio
+from typing import Optional
 
 from opentelemetry import trace
 
@@ -27,16 +28,12 @@ class WikiService:
         self.user_repo = user_repo
 
     async def _to_out(self, page: PageDB) -> PageOut:
-        author_db, profile_db, content_db = await asyncio.gather(
-            self.user_repo.fetch(page.guild_id, page.author_id),
-            self.user_repo.fetch_profile(page.guild_id, page.author_id),
+        (author_db, profile_db), content_db = await asyncio.gather(
+            self.user_repo.load_with_profile(page.guild_id, page.author_id),
             self.content_repo.fetch_by_page(page.page_id)
         )
 
-        content_editor_db, content_profile_db = await asyncio.gather(
-            self.user_repo.fetch(page.guild_id, content_db.edited_by),
-            self.user_repo.fetch_profile(page.guild_id, content_db.edited_by),
-        )
+        content_editor_db, content_profile_db = await self.user_repo.load_with_profile(page.guild_id, content_db.edited_by)
 
         return PageOut(
             **page.model_dump(),
@@ -77,17 +74,17 @@ class WikiService:
         return await self._to_out(page_db)
 
     @traced
-    async def get_all(self, guild_id: int, query: PageQuery) -> list[PageOut]:
+    async def get_all(self, guild_id: int, query: PageQuery) -> tuple[list[PageOut], Optional[str]]:
         span = trace.get_current_span()
         span.set_attribute("guild.id", guild_id)
 
-        pages_db = await self.page_repo.fetch_all(guild_id, query)
+        pages_db, next_cursor = await self.page_repo.fetch_all(guild_id, query)
         span.set_attribute("pages.count", len(pages_db))
 
         async with asyncio.TaskGroup() as tg:
             tasks = [tg.create_task(self._to_out(p)) for p in pages_db]
 
-        return [t.result() for t in tasks]
+        return [t.result() for t in tasks], next_cursor
 
     @traced
     async def new(self, guild_id: int, model: PageIn) -> PageOut:
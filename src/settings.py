@@ -1,20 +1,53 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     TOKEN_TTL_SECONDS: int = 3600
+    AUTH_HASH_WORKERS: int = 4
+    AUTH_HASH_MAX_PENDING: int = 64
+    AUTH_CACHE_SIZE: int = 1000
+    AUTH_CACHE_TTL_S: int = 60
+    AUTH_LAST_USED_FLUSH_S: int = 30
+    AUTH_TOKEN_CACHE_SIZE: int = 5000
     DATABASE_NAME: str
     DATABASE_USER: str
     DATABASE_PASSWORD: str
     DATABASE_HOST: str
     DATABASE_PORT: int = 5432
+    DATABASE_POOL_MIN_SIZE: int = 1
+    DATABASE_POOL_MAX_SIZE: int = 10
+    DATABASE_POOL_MAX_IDLE_S: float = 300
+    DATABASE_COMMAND_TIMEOUT_S: Optional[float] = None
+    DATABASE_REPLICA_DSN: str = ""
+    DATABASE_REPLICA_MAX_LAG_S: float = 5
+    DATABASE_REPLICA_LAG_CHECK_S: float = 5
+    DATABASE_EXPORT_MAX_CONNECTIONS: int = 4
+    DATABASE_EXPORT_STATEMENT_TIMEOUT_S: float = 60
+    DATABASE_STATEMENT_CACHE_SIZE: int = 256
+    DATABASE_STATEMENT_LIFETIME_S: int = 3600
     WEBHOOK_URL: str
     R2_ACCESS_KEY: str
     R2_SECRET_KEY: str
     R2_ACCOUNT_ID: str
     R2_BUCKET_NAME: str
     OTEL_EXPORTER_OTLP_ENDPOINT: str = "http://tempo:4317"
+    OTEL_EXPORTER_OTLP_METRICS_ENDPOINT: str = ""
     POSTHOG_API_KEY: str = ""
+    INTERACTION_BUFFER_ENABLED: bool = False
+    INTERACTION_BUFFER_MAX_ROWS: int = 50000
+    INTERACTION_BUFFER_FLUSH_ROWS: int = 5000
+    INTERACTION_BUFFER_FLUSH_MS: int = 1000
+    INTERACTION_BUFFER_MAX_RETRIES: int = 5
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_MAINTENANCE_INTERVAL_S: int = 86400
+    INTERACTION_COUNTS_REBUILD_INTERVAL_S: int = 0
+    QUEST_CACHE_SIZE: int = 1000
+    QUEST_CACHE_TTL_S: int = 300
+    QUEST_MATCHING_ENABLED: bool = False
+    QUEST_STATISTICS_FOLD_INTERVAL_S: float = 10
+    LEADERBOARD_REFRESH_INTERVAL_S: int = 300
 
 settings = Settings()
\ No newline at end of file
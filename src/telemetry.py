@@ -1,8 +1,11 @@
-from opentelemetry import trace
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
 from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
 
 from settings import settings
@@ -17,4 +20,15 @@ def setup_telemetry(service_name: str = "nexuscore"):
         headers={"Authorization": f"Bearer {settings.POSTHOG_API_KEY}"},
     )
     provider.add_span_processor(BatchSpanProcessor(exporter))
-    trace.set_tracer_provider(provider)
\ No newline at end of file
+    trace.set_tracer_provider(provider)
+
+    # Metrics are only exported once an endpoint for them is configured
+    if not settings.OTEL_EXPORTER_OTLP_METRICS_ENDPOINT:
+        return
+
+    metric_exporter = OTLPMetricExporter(
+        endpoint=settings.OTEL_EXPORTER_OTLP_METRICS_ENDPOINT,
+        headers={"Authorization": f"Bearer {settings.POSTHOG_API_KEY}"},
+    )
+    meter_provider = MeterProvider(resource=resource, metric_readers=[PeriodicExportingMetricReader(metric_exporter)])
+    metrics.set_meter_provider(meter_provider)
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+from opentelemetry import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+meter = metrics.get_meter("nexuscore.cache")
+cache_hits = meter.create_counter("cache.hits", description="Lookups answered from an in-process cache")
+cache_misses = meter.create_counter("cache.misses", description="Lookups an in-process cache could not answer")
+cache_evictions = meter.create_counter("cache.evictions", description="Entries dropped to make room in an in-process cache")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A bounded in-process cache. Entries expire `ttl` seconds after being set, unless set
+    with their own ttl, and the least recently used entry is evicted once `max_size` is reached.
+
+    Hits, misses and evictions are counted in OpenTelemetry, labelled with `name`.
+    Cached values are shared between callers, so they must not be mutated.
+
+    A value loaded while an invalidation happens may already be stale. Take `generation()` before
+    loading and pass it to `set`, which then skips storing the value if anything was invalidated since.
+    """
+    def __init__(self, name: str, max_size: int, ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._attributes = {"cache.name": name}
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+
+            cache_misses.add(1, self._attributes)
+            return None
+
+        self._entries.move_to_end(key)
+        cache_hits.add(1, self._attributes)
+        return entry[1]
+
+    def generation(self) -> int:
+        """Changes whenever an entry is invalidated or the cache is cleared"""
+        return self._generation
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None, generation: Optional[int] = None):
+        if generation is not None and generation != self._generation:
+            return
+
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            cache_evictions.add(1, self._attributes)
+
+    def invalidate(self, key: K):
+        self._generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
@@ -0,0 +1,59 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Response
+
+from src.errors import BadRequest
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(kind: str, *values: Any) -> str:
+    """
+    Packs the sort key of the last row on a page into an opaque, URL-safe token.
+
+    `kind` names the listing and its ordering, so a cursor from one listing
+    or sort order is rejected by another instead of silently skipping rows.
+    """
+    payload = [kind, *[v.isoformat() if isinstance(v, datetime) else v for v in values]]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str, *types: type) -> tuple:
+    """
+    Unpacks a token made by `encode_cursor`, converting each value to the given type.
+    None values are passed through as-is.
+
+    Raises BadRequest if the token is malformed or was made for another `kind`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise BadRequest("Invalid cursor")
+
+    if not isinstance(payload, list) or len(payload) != len(types) + 1 or payload[0] != kind:
+        raise BadRequest("Invalid cursor")
+
+    try:
+        return tuple(_convert(value, t) for value, t in zip(payload[1:], types))
+    except (TypeError, ValueError):
+        raise BadRequest("Invalid cursor")
+
+
+def _convert(value: Any, t: type) -> Optional[Any]:
+    if value is None:
+        return None
+    if t is datetime:
+        return datetime.fromisoformat(value)
+    return t(value)
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    """Hands the cursor for the next page back in the `X-Next-Cursor` header, if there is one"""
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
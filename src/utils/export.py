@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, AsyncIterator, Literal, Mapping
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are encoded into one chunk per this many rows, so each write to the client is a sizeable one
+CHUNK_ROWS = 500
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def _csv_value(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return json.dumps(value)
+    return _json_default(value) if isinstance(value, (timedelta, Decimal)) else value
+
+
+async def _ndjson(rows: AsyncIterator[Mapping]) -> AsyncIterator[bytes]:
+    chunk = []
+    async for row in rows:
+        chunk.append(json.dumps(dict(row), default=_json_default, separators=(",", ":")))
+
+        if len(chunk) >= CHUNK_ROWS:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk.clear()
+
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+async def _csv(rows: AsyncIterator[Mapping], columns: list[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    written = 0
+    async for row in rows:
+        writer.writerow([_csv_value(row[c]) for c in columns])
+        written += 1
+
+        if written % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_rows(rows: AsyncIterator[Mapping], export_format: ExportFormat, columns: list[str]) -> AsyncIterator[bytes]:
+    """
+    Encodes database rows as they arrive, for a StreamingResponse.
+
+    Rows are never validated or collected, only serialized in chunks of `CHUNK_ROWS`,
+    so memory stays flat however many rows are exported.
+    `columns` gives the CSV header and column order.
+    """
+    if export_format == "csv":
+        return _csv(rows, columns)
+
+    return _ndjson(rows)
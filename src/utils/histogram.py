@@ -0,0 +1,74 @@
+import bisect
+import math
+from typing import Optional
+
+# Must match quests_v3.duration_bucket: bucket b holds durations in [2^(b/8) - 1, 2^((b+1)/8) - 1) seconds
+BUCKETS_PER_DOUBLING = 8
+
+
+def bucket_bounds(bucket: int) -> tuple[float, float]:
+    """The range of durations, in seconds, counted into a stored bucket"""
+    return 2 ** (bucket / BUCKETS_PER_DOUBLING) - 1, 2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING) - 1
+
+
+def estimate_quantile(
+        counts: dict[int, int],
+        quantile: float,
+        lowest: Optional[float] = None,
+        highest: Optional[float] = None
+) -> Optional[float]:
+    """
+    Estimates a quantile of the durations counted in `counts` (bucket -> count),
+    interpolating linearly within the bucket it falls in.
+
+    The estimate is within one bucket width, about 9% of the value. Passing the exact
+    `lowest` and `highest` durations tightens it at the edges.
+    """
+    total = sum(counts.values())
+    if total == 0:
+        return None
+
+    rank = quantile * total
+    seen = 0
+    for bucket in sorted(counts):
+        count = counts[bucket]
+        if count <= 0:
+            continue
+
+        if seen + count >= rank:
+            start, end = bucket_bounds(bucket)
+            start = max(start, lowest) if lowest is not None else start
+            end = min(end, highest) if highest is not None else end
+
+            return start + (end - start) * (rank - seen) / count
+
+        seen += count
+
+    return highest
+
+
+def rebin(counts: dict[int, int], edges: list[float]) -> list[int]:
+    """
+    Spreads stored bucket counts over the ranges between `edges`, placing each stored bucket by its midpoint.
+    Durations below the first edge or above the last are counted into the first or last range.
+    """
+    binned = [0] * (len(edges) - 1)
+
+    for bucket, count in counts.items():
+        start, end = bucket_bounds(bucket)
+        index = bisect.bisect_right(edges, (start + end) / 2) - 1
+        binned[min(max(index, 0), len(binned) - 1)] += count
+
+    return binned
+
+
+def linear_edges(lowest: float, highest: float, buckets: int) -> list[float]:
+    """Edges `buckets` equal widths apart, ending exactly on `highest`"""
+    width = (highest - lowest) / buckets
+    return [lowest + i * width for i in range(buckets)] + [highest]
+
+
+def log_edges(lowest: float, highest: float, buckets: int) -> list[float]:
+    """Edges growing by a constant ratio, shifted by one second so that a lowest of 0 still works"""
+    low, high = math.log(lowest + 1), math.log(highest + 1)
+    return [math.exp(low + (high - low) * i / buckets) - 1 for i in range(buckets)] + [highest]
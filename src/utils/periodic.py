@@ -0,0 +1,75 @@
+import asyncio
+import contextlib
+from typing import Awaitable, Callable, Optional
+
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+
+
+class PeriodicTask:
+    """
+    Runs a coroutine function in the background every `interval` seconds.
+
+    `trigger()` wakes the task up early, without waiting for the interval.
+    A failing run is recorded on its span and the task carries on.
+    When `run_on_stop` is set, `stop()` runs the function one last time.
+
+    Usage:
+        task = PeriodicTask("interactions.flush", 1.0, buffer.flush, run_on_stop=True)
+        task.start()
+        ...
+        await task.stop()
+    """
+    def __init__(
+            self,
+            name: str,
+            interval: float,
+            func: Callable[[], Awaitable[None]],
+            run_on_stop: bool = False
+    ):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.run_on_stop = run_on_stop
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    def trigger(self):
+        self._wakeup.set()
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+        if self.run_on_stop:
+            await self._run_once()
+
+    async def _run_once(self):
+        tracer = trace.get_tracer(__name__)
+        with tracer.start_as_current_span(self.name) as span:
+            try:
+                await self.func()
+            except Exception as e:
+                span.set_status(Status(StatusCode.ERROR, str(e)))
+                span.record_exception(e)
+
+    async def _run(self):
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+
+            self._wakeup.clear()
+            await self._run_once()
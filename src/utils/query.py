@@ -0,0 +1,37 @@
+from typing import Any, Optional
+
+
+class QueryBuilder:
+    """
+    Collects the filters of a listing query, numbering parameters as they are added.
+
+    The statement text only depends on which filters are set (the query's shape), never on their values,
+    and LIMIT and OFFSET are always parameters. So each shape is one statement that asyncpg prepares
+    once per connection and reuses, instead of a new statement for every page or value.
+    The `db.statements.prepared` and `db.statements.reused` metrics show how often that happens.
+    """
+    def __init__(self):
+        self.conditions: list[str] = []
+        self.params: list[Any] = []
+
+    def param(self, value: Any, cast: Optional[str] = None) -> str:
+        """Adds a parameter and returns its placeholder"""
+        self.params.append(value)
+        return f"${len(self.params)}::{cast}" if cast else f"${len(self.params)}"
+
+    def where(self, condition: str):
+        self.conditions.append(condition)
+
+    @property
+    def where_sql(self) -> str:
+        return f"WHERE {' AND '.join(self.conditions)}" if self.conditions else ""
+
+    def build(self, select: str, order_by: str, limit: Optional[int] = None, offset: int = 0) -> tuple[str, list]:
+        """
+        The full statement and its parameters. A None limit is LIMIT NULL, which Postgres treats as no limit,
+        so unpaged queries share their shape with paged ones.
+        """
+        sql = (f"{select} {self.where_sql} ORDER BY {order_by} "
+               f"LIMIT ${len(self.params) + 1}::int OFFSET ${len(self.params) + 2}::int")
+
+        return sql, [*self.params, limit, offset]